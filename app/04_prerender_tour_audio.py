@@ -0,0 +1,136 @@
+# 04_prerender_tour_audio.py
+"""
+투어 고정 멘트 전체를 미리 합성해서 하나의 오디오 팩으로 저장한다.
+
+- 대상: PHRASES (arrived는 스팟 이름별로 채움), SPOT_SCRIPTS, TOUR_ROUTE 스팟 이름,
+        GEUNJEONGJEON_QA_INTRO  ×  모든 언어
+- ElevenLabs에 PCM(TTS_PACK_FORMAT)으로 요청, 제한된 워커 풀로 동시에 합성
+- 결과: tour_audio_pack.bin (int16 mono PCM 연속) + tour_audio_pack.json (키 → offset/length)
+  speak()는 이 팩을 np.memmap으로 열어 고정 멘트를 네트워크 없이 바로 재생한다.
+
+사용 예:
+    python 04_prerender_tour_audio.py --workers 4
+    python 04_prerender_tour_audio.py --langs ko en
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from main_tour_loop import PHRASES, SPOT_SCRIPTS, GEUNJEONGJEON_QA_INTRO
+from tour_route import TOUR_ROUTE
+from tts_service import (
+    ELEVENLABS_MODEL_ID,
+    ELEVENLABS_VOICE_SETTINGS,
+    TTS_AUDIO_PACK,
+    TTS_PACK_FORMAT,
+    pack_key,
+    pcm_sample_rate,
+    synthesize,
+)
+
+PRERENDER_WORKERS = 4  # Concurrent ElevenLabs requests
+
+
+def collect_utterances(langs=None) -> dict:
+    """All scripted (text, lang) pairs of a tour, keyed by pack key (duplicates removed)."""
+    all_langs = sorted({lang for variants in PHRASES.values() for lang in variants} | set(SPOT_SCRIPTS))
+    langs = [lang for lang in all_langs if langs is None or lang in langs]
+
+    items = []
+    for lang in langs:
+        spot_names = [spot.get(f"name_{lang}", spot["name_en"]) for spot in TOUR_ROUTE]
+        for phrase_key, variants in PHRASES.items():
+            text = variants.get(lang)
+            if not text:
+                continue
+            if "{spot_name}" in text:
+                items.extend((text.format(spot_name=name), lang) for name in spot_names)
+            else:
+                items.append((text, lang))
+        for sentences in SPOT_SCRIPTS.get(lang, {}).values():
+            items.extend((text, lang) for text in sentences)
+        items.extend((name, lang) for name in spot_names)
+        if lang in GEUNJEONGJEON_QA_INTRO:
+            items.append((GEUNJEONGJEON_QA_INTRO[lang], lang))
+
+    return {pack_key(text, lang): (text, lang) for text, lang in items}
+
+
+def _atomic_write(path: str, data: bytes):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def build_pack(utterances: dict, out=TTS_AUDIO_PACK, workers=PRERENDER_WORKERS) -> int:
+    """Synthesize every utterance concurrently and write <out>.bin + <out>.json. Returns failures."""
+    results = {}
+    failed = []
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(synthesize, text, lang, TTS_PACK_FORMAT): key for key, (text, lang) in utterances.items()
+        }
+        for i, future in enumerate(as_completed(futures), 1):
+            key = futures[future]
+            text, lang = utterances[key]
+            try:
+                pcm = future.result()
+            except Exception as e:
+                pcm = None
+                print(f"⚠️ [{lang}] {text[:40]}: {e}")
+            if pcm:
+                results[key] = pcm
+            else:
+                failed.append(key)
+            print(f"  [{i}/{len(utterances)}] {'✅' if pcm else '❌'} ({lang}) {text[:50]}")
+
+    # Deterministic layout (sorted by key) so rebuilding an unchanged tour gives the same pack
+    entries = {}
+    blob = bytearray()
+    for key in sorted(results):
+        pcm = results[key]
+        pcm = pcm[: len(pcm) - len(pcm) % 2]  # whole int16 samples only
+        text, lang = utterances[key]
+        entries[key] = {"offset": len(blob) // 2, "length": len(pcm) // 2, "lang": lang, "text": text}
+        blob.extend(pcm)
+
+    index = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "format": TTS_PACK_FORMAT,
+        "sample_rate": pcm_sample_rate(TTS_PACK_FORMAT),
+        "model_id": ELEVENLABS_MODEL_ID,
+        "voice_settings": ELEVENLABS_VOICE_SETTINGS,
+        "entries": entries,
+    }
+    _atomic_write(f"{out}.bin", bytes(blob))
+    _atomic_write(f"{out}.json", json.dumps(index, ensure_ascii=False, indent=2).encode("utf-8"))
+
+    seconds = len(blob) / 2 / index["sample_rate"]
+    print(f"\n✅ {len(entries)} utterances ({seconds / 60:.1f} min of audio) → {out}.bin / {out}.json "
+          f"in {time.time() - start:.0f}s")
+    return len(failed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prerender scripted tour speech into an audio pack")
+    parser.add_argument("--langs", nargs="+", default=None, help="languages to render (default: all)")
+    parser.add_argument("--workers", type=int, default=PRERENDER_WORKERS)
+    parser.add_argument("--out", default=TTS_AUDIO_PACK, help="pack path without extension")
+    args = parser.parse_args()
+
+    utterances = collect_utterances(args.langs)
+    print(f"📥 {len(utterances)} scripted utterances to render ({TTS_PACK_FORMAT}, {args.workers} workers)")
+    failed = build_pack(utterances, args.out, args.workers)
+    if failed:
+        print(f"⚠️ {failed} utterances failed (quota / network). They will use live TTS; re-run to retry.")
+
+
+if __name__ == "__main__":
+    main()
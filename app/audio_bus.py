@@ -0,0 +1,188 @@
+# audio_bus.py
+"""
+항상 켜져 있는 단일 마이크 캡처 + 링 버퍼.
+
+웨이크워드 리스너, 인라인 인터럽트 감지, 질문 녹음이 각자 sd.rec로 장치를 여는 대신
+하나의 InputStream이 링 버퍼에 계속 쓰고, 소비자들은 복사 없는 numpy 뷰를 받아 간다.
+
+- 쓰기: sounddevice 콜백 하나 (single writer) → 락 없음
+- 읽기: 누적 샘플 위치(position) 기준으로 임의 개수의 reader가 독립적으로 따라감
+- 미러링 버퍼(용량의 2배)에 같은 샘플을 두 번 써서, 경계를 넘는 구간도 항상 연속된 뷰로 반환
+"""
+
+import threading
+import time
+
+import numpy as np
+import sounddevice as sd
+
+SAMPLE_RATE = 16000
+AUDIO_BUS_CAPACITY_SECONDS = 60.0  # History kept in the ring buffer
+AUDIO_BUS_BLOCK_MS = 30  # Capture callback block size (ms)
+
+
+class AudioBus:
+    """
+    Single-writer / multi-reader int16 ring buffer fed by one sd.InputStream.
+
+    Positions are absolute sample counts since start(); view(start, end) returns a
+    read-only numpy view into the buffer (no copy) as long as the range is still
+    inside the retained history.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, capacity_seconds=AUDIO_BUS_CAPACITY_SECONDS, block_ms=AUDIO_BUS_BLOCK_MS):
+        self.sample_rate = sample_rate
+        self.capacity = int(capacity_seconds * sample_rate)
+        self.blocksize = int(sample_rate * block_ms / 1000)
+        self._buf = np.zeros(2 * self.capacity, dtype=np.int16)
+        self._readonly = self._buf.view()
+        self._readonly.flags.writeable = False
+        self._write_pos = 0
+        self._stream = None
+        self.overflows = 0
+
+    # ---------- writer ----------
+    def _callback(self, indata, frames, time_info, status):
+        if status and status.input_overflow:
+            self.overflows += 1
+        data = indata[:, 0]
+        cap = self.capacity
+        start = self._write_pos % cap
+        first = min(frames, cap - start)
+        rest = frames - first
+
+        # Write every block twice (low half + mirrored high half)
+        self._buf[start:start + first] = data[:first]
+        self._buf[start + cap:start + cap + first] = data[:first]
+        if rest:
+            self._buf[0:rest] = data[first:]
+            self._buf[cap:cap + rest] = data[first:]
+
+        # Publish only after the samples are in place (int assignment is atomic under the GIL)
+        self._write_pos += frames
+
+    def start(self):
+        if self._stream is not None:
+            return
+        self._stream = sd.InputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype="int16",
+            blocksize=self.blocksize,
+            callback=self._callback,
+        )
+        self._stream.start()
+        print(f"🎙 Audio bus started ({self.sample_rate} Hz, {self.capacity / self.sample_rate:.0f}s history)")
+
+    def stop(self):
+        if self._stream is None:
+            return
+        self._stream.stop()
+        self._stream.close()
+        self._stream = None
+
+    @property
+    def running(self) -> bool:
+        return self._stream is not None
+
+    # ---------- readers ----------
+    @property
+    def position(self) -> int:
+        """Total number of samples captured so far."""
+        return self._write_pos
+
+    def is_available(self, start: int) -> bool:
+        """True if samples from `start` have not been overwritten yet."""
+        return self._write_pos - start <= self.capacity
+
+    def view(self, start: int, end: int) -> np.ndarray:
+        """
+        Zero-copy read-only view of samples [start, end).
+        Raises ValueError if the range is not (or no longer) in the buffer.
+        """
+        if end > self._write_pos:
+            raise ValueError("audio bus: requested range is in the future")
+        if end - start > self.capacity or not self.is_available(start):
+            raise ValueError("audio bus: requested range was overwritten")
+        offset = start % self.capacity
+        return self._readonly[offset:offset + (end - start)]
+
+    def latest(self, seconds: float) -> np.ndarray:
+        """View of the most recent `seconds` of audio."""
+        end = self._write_pos
+        start = max(0, end - int(seconds * self.sample_rate))
+        return self.view(start, end)
+
+    def wait_until(self, position: int, timeout=None) -> bool:
+        """Block until `position` samples have been captured (polls at block granularity)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        poll = self.blocksize / self.sample_rate / 2
+        while self._write_pos < position:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(poll)
+        return True
+
+    def record(self, seconds: float) -> np.ndarray:
+        """Wait for the next `seconds` of audio and return it as a view."""
+        start = self._write_pos
+        end = start + int(seconds * self.sample_rate)
+        self.wait_until(end)
+        return self.view(start, end)
+
+    def reader(self) -> "AudioBusReader":
+        """New independent cursor starting at the current position."""
+        return AudioBusReader(self)
+
+
+class AudioBusReader:
+    """Independent cursor over an AudioBus (one per consumer)."""
+
+    def __init__(self, bus: AudioBus, start=None):
+        self.bus = bus
+        self.cursor = bus.position if start is None else start
+
+    def read(self, n_samples: int, timeout=None):
+        """
+        Next `n_samples` as a zero-copy view, blocking until available.
+        Returns None on timeout. If the reader fell behind the retained history,
+        it skips forward to the oldest available sample.
+        """
+        if not self.bus.is_available(self.cursor):
+            self.cursor = self.bus.position - self.bus.capacity + n_samples
+        end = self.cursor + n_samples
+        if not self.bus.wait_until(end, timeout):
+            return None
+        frame = self.bus.view(self.cursor, end)
+        self.cursor = end
+        return frame
+
+    def skip_to_now(self):
+        self.cursor = self.bus.position
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def start_audio_bus() -> AudioBus:
+    """Open the shared capture stream (once) and return the bus."""
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = AudioBus()
+        _bus.start()
+        return _bus
+
+
+def get_audio_bus():
+    """Return the running bus, or None if start_audio_bus() was never called."""
+    if _bus is not None and _bus.running:
+        return _bus
+    return None
+
+
+def stop_audio_bus():
+    with _bus_lock:
+        if _bus is not None:
+            _bus.stop()
@@ -1,11 +1,12 @@
 # dori_main.py
 
-import time
+import queue
 from typing import Literal
 
 from wakeword_service import start_wakeword_listener
 from main_tour_loop import run_tour, start_dori_tour
 from tts_service import speak
+from audio_bus import start_audio_bus
 
 # translation_service.py와 동일한 언어 코드 타입
 LanguageCode = Literal["en", "ko"]
@@ -15,7 +16,7 @@ PLACE_ID = "gyeongbokgung"
 
 def on_wakeword_detected(detected_lang: str = "en"):
     """
-    웨이크워드("Hey, Dori")가 감지되었을 때 호출되는 콜백.
+    웨이크워드("Hey, Dori")가 감지되었을 때 메인 스레드에서 호출된다 (리스너는 tour-active로 멈춘 상태).
     여기서 간단한 인사 멘트를 하고, 투어를 시작한다.
     """
     global USER_LANG
@@ -58,21 +59,34 @@ def main():
     print()
     global USER_LANG
 
-    while True:
-        USER_LANG = "en"  # default before detection
-        print(f"[ENTRY] Waiting for wakeword... (voice, auto language detection)")
-        print()
-
-        # 웨이크워드 리스너 시작 (언어 자동 감지)
-        start_wakeword_listener(on_wakeword_detected, use_voice=True, lang=USER_LANG)
-
-        # 메인 스레드는 투어 종료까지 유지, 종료 후 다시 대기
-        try:
-            while True:
-                time.sleep(1.0)
-        except KeyboardInterrupt:
-            print("\n[ENTRY] KeyboardInterrupt: 프로그램을 종료합니다.")
-            break
+    # 마이크는 한 번만 열고, 웨이크워드/인라인 인터럽트/질문 녹음이 같은 버퍼를 공유
+    start_audio_bus()
+
+    # 리스너 스레드는 감지 언어만 큐에 넣고, 투어는 메인 스레드에서 실행
+    # (감지 즉시 리스너는 tour-active 상태로 멈추고, 투어가 끝나면 resume()으로 재무장)
+    detections = queue.Queue()
+    listener = start_wakeword_listener(detections.put, use_voice=True, lang="en")
+
+    try:
+        while True:
+            USER_LANG = "en"  # default before detection
+            print(f"[ENTRY] Waiting for wakeword... (voice, auto language detection)")
+            print()
+
+            detected_lang = None
+            while detected_lang is None:
+                try:
+                    detected_lang = detections.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+
+            try:
+                on_wakeword_detected(detected_lang)
+            finally:
+                listener.resume()
+    except KeyboardInterrupt:
+        print("\n[ENTRY] KeyboardInterrupt: 프로그램을 종료합니다.")
+        listener.stop()
 
 
 if __name__ == "__main__":
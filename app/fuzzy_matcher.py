@@ -0,0 +1,185 @@
+# fuzzy_matcher.py
+"""
+웨이크워드 / 고유명사 퍼지 매칭.
+
+후보 문자열은 생성 시 한 번만 정규화하고,
+- 정확한 포함 여부: 미리 컴파일한 하나의 alternation 정규식
+- 비슷한 단어 찾기: BK-tree + 밴드(Ukkonen) 편집 거리 (cutoff 초과 시 조기 종료)
+로 처리한다. 호출마다 후보를 다시 정규화하거나 정규식을 새로 만들지 않는다.
+"""
+
+import re
+
+_STRIP_CHARS = re.compile(r"[,.?!'\"\-\s]+")
+_WORD_RE = re.compile(r"\b\w+\b")
+
+
+def compact(text: str) -> str:
+    """Lowercase and drop punctuation / whitespace ("Hey, Dori!" → "heydori")."""
+    return _STRIP_CHARS.sub("", text.lower().strip())
+
+
+def levenshtein(s1: str, s2: str) -> int:
+    """Full Levenshtein distance."""
+    return bounded_levenshtein(s1, s2, max(len(s1), len(s2)))
+
+
+def bounded_levenshtein(s1: str, s2: str, max_distance: int) -> int:
+    """
+    Levenshtein distance restricted to the diagonal band |i - j| <= max_distance (Ukkonen).
+    Returns max_distance + 1 as soon as the distance is known to exceed max_distance.
+    """
+    over = max_distance + 1
+    if abs(len(s1) - len(s2)) > max_distance:
+        return over
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    if not s2:
+        return len(s1)
+
+    n = len(s2)
+    previous_row = [j if j <= max_distance else over for j in range(n + 1)]
+    for i in range(1, len(s1) + 1):
+        current_row = [over] * (n + 1)
+        current_row[0] = i if i <= max_distance else over
+        row_min = current_row[0]
+        c1 = s1[i - 1]
+        for j in range(max(1, i - max_distance), min(n, i + max_distance) + 1):
+            value = min(
+                previous_row[j] + 1,  # deletion
+                current_row[j - 1] + 1,  # insertion
+                previous_row[j - 1] + (c1 != s2[j - 1]),  # substitution
+            )
+            current_row[j] = min(value, over)
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return over
+        previous_row = current_row
+    return previous_row[n]
+
+
+class BKTree:
+    """Burkhard-Keller tree over edit distance for "words within k edits" lookups."""
+
+    def __init__(self, words=()):
+        self._root = None  # [word, {distance: child}]
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str):
+        if self._root is None:
+            self._root = [word, {}]
+            return
+        node = self._root
+        while True:
+            d = levenshtein(word, node[0])
+            if d == 0:
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = [word, {}]
+                return
+            node = child
+
+    def search(self, word: str, max_distance: int) -> list:
+        """All (distance, word) pairs with distance <= max_distance, closest first."""
+        results = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node_word, children = stack.pop()
+            # Exact distance only matters up to the farthest child edge we might still follow
+            cutoff = max_distance + (max(children) if children else 0)
+            d = bounded_levenshtein(word, node_word, cutoff)
+            if d <= max_distance:
+                results.append((d, node_word))
+            if d > cutoff:
+                continue
+            for edge, child in children.items():
+                if d - max_distance <= edge <= d + max_distance:
+                    stack.append(child)
+        results.sort()
+        return results
+
+
+class FuzzyMatcher:
+    """
+    Fixed vocabulary of variants mapped to canonical names.
+
+    variants: {canonical: [variant, ...]} or a plain list (each variant is its own canonical).
+    """
+
+    def __init__(self, variants, max_distance=2, min_length=3, normalize=str.lower):
+        if not isinstance(variants, dict):
+            variants = {v: [v] for v in variants}
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.normalize = normalize
+
+        self.canonical = {}  # normalized variant -> canonical
+        for canonical, items in variants.items():
+            for item in items:
+                key = normalize(item)
+                if key:
+                    self.canonical.setdefault(key, canonical)
+
+        # Longest first so "hey dori" wins over "dori" in the alternation
+        ordered = sorted(self.canonical, key=len, reverse=True)
+        self.regex = re.compile("|".join(re.escape(v) for v in ordered), re.IGNORECASE)
+        self.tree = BKTree(ordered)
+        self._substrings = None
+
+    def find(self, text: str):
+        """First exact variant occurring in text → (variant, canonical), or None."""
+        m = self.regex.search(text)
+        if m is None:
+            return None
+        variant = m.group(0).lower()
+        return variant, self.canonical.get(variant, variant)
+
+    def is_fragment(self, text: str) -> bool:
+        """True if text is a (non-empty) substring of some variant."""
+        if self._substrings is None:
+            self._substrings = {
+                v[i:j] for v in self.canonical for i in range(len(v)) for j in range(i + 1, len(v) + 1)
+            }
+        return text in self._substrings
+
+    def closest(self, word: str):
+        """Closest variant within max_distance → (variant, canonical, distance), or None."""
+        if len(word) < self.min_length:
+            return None
+        hits = self.tree.search(word, self.max_distance)
+        if not hits:
+            return None
+        distance, variant = hits[0]
+        return variant, self.canonical[variant], distance
+
+    def matches(self, text: str) -> bool:
+        """Exact variant anywhere in text, or any word of text within max_distance of a variant."""
+        if self.find(text):
+            return True
+        return any(self.closest(word) for word in _WORD_RE.findall(text.lower()))
+
+    def replace(self, text: str, on_match=None) -> str:
+        """
+        Replace exact variants and close-enough words with their canonical name.
+        on_match(found, canonical, distance) is called for every replacement that changed the text.
+        """
+
+        def _exact(m):
+            found = m.group(0)
+            canonical = self.canonical.get(found.lower(), found)
+            if on_match and found.lower() != canonical:
+                on_match(found, canonical, 0)
+            return canonical
+
+        def _fuzzy(m):
+            word = m.group(0)
+            hit = self.closest(word.lower())
+            if hit is None or hit[2] == 0:
+                return word
+            if on_match:
+                on_match(word, hit[1], hit[2])
+            return hit[1]
+
+        return _WORD_RE.sub(_fuzzy, self.regex.sub(_exact, text))
@@ -0,0 +1,409 @@
+# kws_engine.py
+"""
+경량 키워드 스포팅(KWS) 엔진: "hey dori" / "도리야".
+
+웨이크워드를 찾으려고 3초마다 Whisper 전체 전사를 돌리는 대신,
+MFCC 특징 + DTW 템플릿 매칭을 스트리밍 프레임 단위로 돌리고
+후보가 잡혔을 때만 Whisper로 확인(및 언어 감지)한다.
+
+- 템플릿 등록: 사용자가 실제로 말한 "hey dori" / "도리야" 샘플 몇 개를 WAV로 저장
+    python kws_engine.py enroll hey_dori --count 5
+    python kws_engine.py enroll doriya --count 5
+- 라이브 테스트:
+    python kws_engine.py test
+
+템플릿 구조: KWS_TEMPLATE_DIR/<label>/*.wav  (label → 언어는 KWS_LABEL_LANGS)
+            KWS_TEMPLATE_DIR/background.wav (등록 때 녹음한 방 소음, 없으면 합성 잡음)
+템플릿 특징은 라이브와 똑같이 MfccStream(이동 평균 CMN)에 배경 소음을 먼저 흘린 뒤 계산한다.
+"""
+
+import argparse
+import os
+import time
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+KWS_TEMPLATE_DIR = "kws_templates"
+KWS_BACKGROUND_FILE = "background.wav"
+KWS_LABEL_LANGS = {"hey_dori": "en", "doriya": "ko"}
+
+# MFCC parameters (25 ms window, 10 ms hop)
+N_FFT = 512
+WIN_LENGTH = 400
+HOP_LENGTH = 160
+N_MELS = 26
+N_MFCC = 13  # c0 (energy) is dropped → 12-dim features
+PRE_EMPHASIS = 0.97
+CMN_TIME_CONSTANT = 2.0  # Seconds for the running cepstral mean of the live stream
+KWS_LEAD_IN_SECONDS = 2.0  # Background pushed through MfccStream before a template (settles the mean)
+KWS_LEAD_IN_RMS = 60.0  # int16 RMS of the synthetic lead-in when no background was recorded
+
+# Detection
+KWS_DEFAULT_THRESHOLD = 9.0  # Mean per-frame DTW distance when a label has a single template
+KWS_THRESHOLD_SCALE = 1.25  # Calibrated threshold = scale × worst distance between enrolled samples
+KWS_MIN_RMS = 250.0  # int16 RMS below which chunks are treated as silence (no hits)
+KWS_RESET_HANGOVER_SECONDS = 0.3  # Trackers reset (and DTW stops) only after this much continuous silence
+KWS_REFRACTORY_SECONDS = 1.0  # Ignore further hits right after one
+
+
+def _hz_to_mel(f):
+    return 2595.0 * np.log10(1.0 + f / 700.0)
+
+
+def _mel_to_hz(m):
+    return 700.0 * (10.0 ** (m / 2595.0) - 1.0)
+
+
+def _mel_filterbank(n_mels=N_MELS, n_fft=N_FFT, sample_rate=SAMPLE_RATE, fmin=20.0, fmax=None) -> np.ndarray:
+    fmax = fmax or sample_rate / 2
+    mels = np.linspace(_hz_to_mel(fmin), _hz_to_mel(fmax), n_mels + 2)
+    bins = np.floor((n_fft + 1) * _mel_to_hz(mels) / sample_rate).astype(int)
+    fb = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            fb[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            fb[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return fb
+
+
+def _dct_matrix(n_mfcc=N_MFCC, n_mels=N_MELS) -> np.ndarray:
+    """Orthonormal DCT-II matrix (n_mfcc × n_mels)."""
+    n = np.arange(n_mels)
+    k = np.arange(n_mfcc)[:, None]
+    dct = np.cos(np.pi / n_mels * (n + 0.5) * k) * np.sqrt(2.0 / n_mels)
+    dct[0] *= 1.0 / np.sqrt(2.0)
+    return dct.astype(np.float32)
+
+
+_FILTERBANK = _mel_filterbank()
+_DCT = _dct_matrix()
+_WINDOW = np.hamming(WIN_LENGTH).astype(np.float32)
+
+
+def _frames_to_mfcc(frames: np.ndarray) -> np.ndarray:
+    """(n, WIN_LENGTH) pre-emphasized frames → (n, N_MFCC - 1) cepstra without c0."""
+    spec = np.abs(np.fft.rfft(frames * _WINDOW, n=N_FFT)) ** 2
+    log_mel = np.log(spec @ _FILTERBANK.T + 1e-6)
+    return (log_mel @ _DCT.T)[:, 1:]
+
+
+def _frame_indices(n_samples: int) -> np.ndarray:
+    n_frames = 1 + (n_samples - WIN_LENGTH) // HOP_LENGTH if n_samples >= WIN_LENGTH else 0
+    return np.arange(WIN_LENGTH)[None, :] + HOP_LENGTH * np.arange(n_frames)[:, None]
+
+
+def mfcc(samples) -> np.ndarray:
+    """MFCC features of a whole int16 utterance, cepstral-mean normalized."""
+    x = np.asarray(samples).astype(np.float32) / 32768.0
+    if len(x) < WIN_LENGTH:
+        return np.zeros((0, N_MFCC - 1), dtype=np.float32)
+    x = np.append(x[0], x[1:] - PRE_EMPHASIS * x[:-1])
+    feats = _frames_to_mfcc(x[_frame_indices(len(x))])
+    return feats - feats.mean(axis=0)
+
+
+class MfccStream:
+    """Incremental MFCC: push int16 chunks of any size, get the new feature frames."""
+
+    def __init__(self):
+        self._buf = np.zeros(0, dtype=np.float32)
+        self._last_sample = 0.0
+        self._mean = None
+        self._alpha = 1.0 - HOP_LENGTH / (CMN_TIME_CONSTANT * SAMPLE_RATE)
+
+    def push(self, samples) -> np.ndarray:
+        x = np.asarray(samples).astype(np.float32) / 32768.0
+        if x.size == 0:
+            return np.zeros((0, N_MFCC - 1), dtype=np.float32)
+        emph = np.empty_like(x)
+        emph[0] = x[0] - PRE_EMPHASIS * self._last_sample
+        emph[1:] = x[1:] - PRE_EMPHASIS * x[:-1]
+        self._last_sample = float(x[-1])
+
+        self._buf = np.concatenate([self._buf, emph])
+        idx = _frame_indices(len(self._buf))
+        if len(idx) == 0:
+            return np.zeros((0, N_MFCC - 1), dtype=np.float32)
+        feats = _frames_to_mfcc(self._buf[idx])
+        self._buf = self._buf[len(idx) * HOP_LENGTH:]
+
+        # Running cepstral mean (same role as the per-utterance mean of the templates)
+        out = np.empty_like(feats)
+        for i, f in enumerate(feats):
+            self._mean = f.copy() if self._mean is None else self._alpha * self._mean + (1 - self._alpha) * f
+            out[i] = f - self._mean
+        return out
+
+
+def synthetic_lead_in() -> np.ndarray:
+    """Quiet, deterministic white noise standing in for a recorded room background."""
+    rng = np.random.default_rng(0)
+    noise = rng.standard_normal(int(KWS_LEAD_IN_SECONDS * SAMPLE_RATE)) * KWS_LEAD_IN_RMS
+    return noise.astype(np.int16)
+
+
+def stream_mfcc(samples, lead_in=None) -> np.ndarray:
+    """
+    Features of an utterance exactly as the live MfccStream produces them:
+    the lead-in (background) settles the running mean first, then only the utterance frames are kept.
+    """
+    stream = MfccStream()
+    stream.push(synthetic_lead_in() if lead_in is None else lead_in)
+    return stream.push(samples)
+
+
+class _DtwTracker:
+    """
+    Streaming subsequence DTW of one template against the live feature stream.
+
+    Slope-constrained steps (1,1) / (2,1) / (1,2) only look at the previous two columns,
+    so each new frame updates a whole column with a few vector ops (O(template length)).
+    A path may start at any stream frame; a hit is reported when a path reaches the
+    last template frame with a low mean frame distance.
+    """
+
+    def __init__(self, template: np.ndarray, threshold: float, label: str):
+        self.template = template
+        self.threshold = threshold
+        self.label = label
+        self.reset()
+
+    def reset(self):
+        m = len(self.template)
+        self.d1 = np.full(m, np.inf)  # accumulated cost, column j-1
+        self.n1 = np.zeros(m)  # path length, column j-1
+        self.d2 = np.full(m, np.inf)  # column j-2
+        self.n2 = np.zeros(m)
+
+    @staticmethod
+    def _shift(a, k, fill):
+        out = np.empty_like(a)
+        out[:k] = fill
+        out[k:] = a[:-k]
+        return out
+
+    def step(self, feature: np.ndarray) -> float:
+        """Advance by one stream frame; returns the mean distance of the best complete match."""
+        cost = np.linalg.norm(self.template - feature, axis=1)
+
+        cand_d = np.stack([
+            self._shift(self.d1, 1, np.inf),  # (i-1, j-1)
+            self._shift(self.d1, 2, np.inf),  # (i-2, j-1)
+            self._shift(self.d2, 1, np.inf),  # (i-1, j-2)
+        ])
+        cand_n = np.stack([
+            self._shift(self.n1, 1, 0),
+            self._shift(self.n1, 2, 0),
+            self._shift(self.n2, 1, 0),
+        ])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(cand_n > 0, cand_d / np.maximum(cand_n, 1), np.inf)
+        best = np.argmin(mean, axis=0)
+        cols = np.arange(len(cost))
+        d = cand_d[best, cols] + cost
+        n = cand_n[best, cols] + 1
+
+        # Free start: a path may begin at the first template frame on any stream frame
+        d[0], n[0] = cost[0], 1
+
+        self.d2, self.n2 = self.d1, self.n1
+        self.d1, self.n1 = d, n
+        return float(d[-1] / n[-1]) if n[-1] > 0 else np.inf
+
+
+def dtw_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Mean frame distance of the best full alignment of a (template) within b."""
+    tracker = _DtwTracker(a, np.inf, "")
+    best = np.inf
+    for f in b:
+        best = min(best, tracker.step(f))
+    return best
+
+
+def load_wav_int16(path: str) -> np.ndarray:
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2 or wf.getframerate() != SAMPLE_RATE:
+            raise ValueError(f"{path}: KWS templates must be 16-bit PCM @ {SAMPLE_RATE} Hz")
+        audio = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        if wf.getnchannels() > 1:
+            audio = audio.reshape(-1, wf.getnchannels())[:, 0]
+    return audio
+
+
+def save_wav_int16(path: str, samples: np.ndarray):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(np.ascontiguousarray(samples, dtype=np.int16).tobytes())
+
+
+class KeywordSpotter:
+    """
+    Streaming "hey dori" / "도리야" detector.
+    process(int16 chunk) → list of candidate hits {"label", "lang", "score"}.
+    """
+
+    def __init__(self, templates: dict, lead_in=None):
+        """
+        templates: label -> list of stream_mfcc() arrays (one per enrolled sample), built with
+        the same lead_in; it also primes the live stream so the first seconds match too.
+        """
+        self.stream = MfccStream()
+        self.stream.push(synthetic_lead_in() if lead_in is None else lead_in)
+        self.trackers = []
+        self.thresholds = {}
+        for label, feats in templates.items():
+            threshold = self._calibrate(feats)
+            self.thresholds[label] = threshold
+            self.trackers.extend(_DtwTracker(f, threshold, label) for f in feats)
+        self._refractory_until = 0.0
+        self._silent_seconds = 0.0
+        self.frames_processed = 0
+        self.frames_gated = 0
+
+    @staticmethod
+    def _calibrate(feats: list) -> float:
+        """Threshold from the spread between enrolled samples (streamed features, like live)."""
+        if len(feats) < 2:
+            return KWS_DEFAULT_THRESHOLD
+        distances = [dtw_distance(a, b) for i, a in enumerate(feats) for j, b in enumerate(feats) if i != j]
+        distances = [d for d in distances if np.isfinite(d)]
+        if not distances:
+            return KWS_DEFAULT_THRESHOLD
+        return KWS_THRESHOLD_SCALE * max(distances)
+
+    @classmethod
+    def load(cls, template_dir=KWS_TEMPLATE_DIR):
+        """Load enrolled WAV templates; returns None if nothing is enrolled."""
+        if not os.path.isdir(template_dir):
+            return None
+        background_path = os.path.join(template_dir, KWS_BACKGROUND_FILE)
+        lead_in = load_wav_int16(background_path) if os.path.exists(background_path) else synthetic_lead_in()
+        templates = {}
+        for label in sorted(os.listdir(template_dir)):
+            label_dir = os.path.join(template_dir, label)
+            if not os.path.isdir(label_dir):
+                continue
+            feats = [
+                stream_mfcc(load_wav_int16(os.path.join(label_dir, name)), lead_in)
+                for name in sorted(os.listdir(label_dir))
+                if name.lower().endswith(".wav")
+            ]
+            feats = [f for f in feats if len(f) >= 10]
+            if feats:
+                templates[label] = feats
+        if not templates:
+            return None
+        spotter = cls(templates, lead_in)
+        summary = ", ".join(f"{k}×{len(v)} (thr {spotter.thresholds[k]:.2f})" for k, v in templates.items())
+        print(f"🔵 KWS templates loaded: {summary}")
+        return spotter
+
+    def reset(self):
+        for tracker in self.trackers:
+            tracker.reset()
+
+    def process(self, samples) -> list:
+        samples = np.asarray(samples)
+        feats = self.stream.push(samples)
+        if len(feats) == 0:
+            return []
+
+        # Energy gate with hangover: short pauses ("hey … dori", stop closures) and the quiet
+        # tail of the keyword are part of the enrolled templates, so trackers keep stepping
+        # (and scoring) through them; only a long silence resets
+        rms = float(np.sqrt(np.mean(samples.astype(np.float32) ** 2))) if samples.size else 0.0
+        if rms < KWS_MIN_RMS:
+            already_reset = self._silent_seconds >= KWS_RESET_HANGOVER_SECONDS
+            self._silent_seconds += len(samples) / SAMPLE_RATE
+            if already_reset or self._silent_seconds >= KWS_RESET_HANGOVER_SECONDS:
+                self.frames_gated += len(feats)
+                if not already_reset:
+                    self.reset()
+                return []
+        else:
+            self._silent_seconds = 0.0
+
+        hits = []
+        now = time.monotonic()
+        for f in feats:
+            self.frames_processed += 1
+            best = {}
+            for tracker in self.trackers:
+                score = tracker.step(f)
+                if score <= tracker.threshold and score < best.get(tracker.label, np.inf):
+                    best[tracker.label] = score
+            if best and now >= self._refractory_until:
+                label = min(best, key=best.get)
+                hits.append({"label": label, "lang": KWS_LABEL_LANGS.get(label, "en"), "score": best[label]})
+                self._refractory_until = now + KWS_REFRACTORY_SECONDS
+                self.reset()
+                break
+        return hits
+
+
+def _enroll(label: str, count: int, template_dir: str):
+    from stt_service import record_audio, record_audio_vad, _to_int16, _trim_silence
+
+    background_path = os.path.join(template_dir, KWS_BACKGROUND_FILE)
+    if not os.path.exists(background_path):
+        input(f"Enter 키를 누르고 {KWS_LEAD_IN_SECONDS:.0f}초 동안 조용히 해주세요 (배경 소음 녹음)...")
+        save_wav_int16(background_path, _to_int16(record_audio(KWS_LEAD_IN_SECONDS)))
+        print(f"✅ Saved {background_path}")
+
+    label_dir = os.path.join(template_dir, label)
+    os.makedirs(label_dir, exist_ok=True)
+    existing = len([n for n in os.listdir(label_dir) if n.endswith(".wav")])
+    for i in range(count):
+        input(f"[{i + 1}/{count}] Enter 키를 누르고 '{label}'를 한 번 말하세요...")
+        audio = record_audio_vad(max_seconds=3.0, silence_seconds=0.5)
+        if not audio:
+            print("⚠️  음성이 감지되지 않았습니다. 다시 시도하세요.")
+            continue
+        samples = _trim_silence(_to_int16(audio))
+        path = os.path.join(label_dir, f"{label}_{existing + i + 1:02d}.wav")
+        save_wav_int16(path, samples)
+        print(f"✅ Saved {path} ({len(samples) / SAMPLE_RATE:.2f}s)")
+
+
+def _live_test(template_dir: str):
+    from audio_bus import start_audio_bus
+
+    spotter = KeywordSpotter.load(template_dir)
+    if spotter is None:
+        print(f"⚠️ No templates in {template_dir}. Run: python kws_engine.py enroll hey_dori")
+        return
+    reader = start_audio_bus().reader()
+    print("🎙 Listening... (Ctrl+C to stop)")
+    try:
+        while True:
+            for hit in spotter.process(reader.read(int(SAMPLE_RATE * 0.03))):
+                print(f"🔔 {hit['label']} ({hit['lang']}) score={hit['score']:.2f}")
+    except KeyboardInterrupt:
+        print(f"\nframes processed={spotter.frames_processed}, gated={spotter.frames_gated}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dori keyword spotting (MFCC + DTW)")
+    parser.add_argument("--template-dir", default=KWS_TEMPLATE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    enroll = sub.add_parser("enroll", help="record keyword samples")
+    enroll.add_argument("label", choices=list(KWS_LABEL_LANGS))
+    enroll.add_argument("--count", type=int, default=5)
+    sub.add_parser("test", help="live detection from the microphone")
+    args = parser.parse_args()
+
+    if args.command == "enroll":
+        _enroll(args.label, args.count, args.template_dir)
+    else:
+        _live_test(args.template_dir)
+
+
+if __name__ == "__main__":
+    main()
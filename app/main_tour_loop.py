@@ -2,11 +2,13 @@
 
 import time
 import re
-from tour_route import TOUR_ROUTE
-from stt_service import listen_for_seconds
-from tts_service import speak
+from concurrent.futures import ThreadPoolExecutor
+from tour_route import TOUR_ROUTE, PALACE_PROPER_NOUNS
+from stt_service import listen_for_seconds, listen_streaming
+from tts_service import speak, speak_sequence
 from llm_client import call_llm
-from wakeword_service import is_wakeword, wakeword_label, _levenshtein_distance, _fuzzy_match
+from wakeword_service import is_wakeword, wakeword_label
+from fuzzy_matcher import FuzzyMatcher
 from rag_pipeline import build_llm_prompt_for_qa, _truncate_to_two_sentences
 from translation_service import translate_question_to_en, translate_answer_from_en, translate, LanguageCode
 
@@ -336,6 +338,19 @@ SPOT_SCRIPTS = {
 }
 
 
+# geunjeongjeon Q&A 안내 (geunjeongmun + geunjeongjeon 설명을 함께 마무리)
+GEUNJEONGJEON_QA_INTRO = {
+    "ko": "Geunjeongmun과 Geunjeongjeon에 대한 설명이 끝났습니다. 질문이 있으신가요? 있으시면 말씀해주세요. 없으시면 '패스'라고 말해주셔도 좋아요.",
+    "en": "That concludes the explanation of Geun-jeong-mun and Geun-jeong-jeon. Do you have any questions? If not, you can say 'pass'.",
+    "zh": "关于勤政门和勤政殿的说明已结束。您有什么问题吗？如果有请告诉我。如果没有，您可以说'跳过'。",
+    "ja": "勤政門と勤政殿の説明が終わりました。ご質問はありますか？ある場合はお知らせください。ない場合は「パス」と言っていただいても結構です。",
+    "fr": "L'explication de Geun-jeong-mun et Geun-jeong-jeon est terminée. Avez-vous des questions ? Si oui, dites-le moi. Sinon, vous pouvez dire 'passer'.",
+    "es": "Eso concluye la explicación de Geun-jeong-mun y Geun-jeong-jeon. ¿Tiene alguna pregunta? Si la tiene, dígamelo. Si no, puede decir 'pasar'.",
+    "vi": "Phần giải thích về Geun-jeong-mun và Geun-jeong-jeon đã kết thúc. Bạn có câu hỏi nào không? Nếu có, hãy cho tôi biết. Nếu không, bạn có thể nói 'bỏ qua'.",
+    "th": "คำอธิบายเกี่ยวกับคึนจองมุนและคึนจองจอนจบแล้ว คุณมีคำถามไหม? ถ้ามีกรุณาบอกฉัน ถ้าไม่มีคุณสามารถพูดว่า 'ผ่าน' ได้",
+}
+
+
 # ===========================================================
 # 1) 스팟 스크립트 읽기
 # ===========================================================
@@ -346,70 +361,124 @@ def run_spot_intro(spot_code, lang):
     # 하드코딩된 스크립트 사용 (언어별로 직접 제공)
     scripts = SPOT_SCRIPTS.get(lang, {}).get(spot_code) or SPOT_SCRIPTS["en"].get(spot_code, [])
     
-    for text in scripts:
-        speak(text, lang)
+    # 다음 문장은 지금 문장이 재생되는 동안 미리 합성된다 (speak_sequence)
+    # _after_sentence(인라인 웨이크워드 확인 / Q&A)는 재생 스레드가 아닌 이 투어 스레드에서 돈다
+    def _after_sentence(index, text):
         time.sleep(0.3)
         if _check_wakeword_inline(lang):
             _handle_inline_question(spot_code, lang)
-        time.sleep(0.2)
+
+    speak_sequence(scripts, lang, pause=0.2, after_each=_after_sentence)
 
 
 # ===========================================================
 # Proper noun normalization for Gyeongbokgung Palace
 # ===========================================================
-# Palace-related proper nouns with common variations
-PALACE_PROPER_NOUNS = {
-    "gwanghwamun": ["gwanghwamun", "gwanghwa mun", "gwang hwa mun", "kwanghwamun", "kwanghwa mun"],
-    "heungnyemun": ["heungnyemun", "heung nye mun", "heungnye mun", "hungnyemun", "hung nye mun"],
-    "geunjeongmun": ["geunjeongmun", "geun jeong mun", "geunjeong mun", "keunjeongmun", "keun jeong mun"],
-    "geunjeongjeon": ["geunjeongjeon", "geun jeong jeon", "geunjeong jeon", "keunjeongjeon", "keun jeong jeon"],
-    "sujeongjeon": ["sujeongjeon", "su jeong jeon", "sujeong jeon", "sujeongjeon", "su jeong jeon"],
-    "gyeonghoeru": ["gyeonghoeru", "gyeong hoe ru", "gyeonghoe ru", "kyeonghoeru", "kyeong hoe ru"],
-    "gyeongbokgung": ["gyeongbokgung", "gyeongbok gung", "gyeong bok gung", "kyeongbokgung", "kyeongbok gung"],
-}
+# Palace-related proper nouns with common variations: PALACE_PROPER_NOUNS (tour_route.py)
+
+
+_PALACE_MATCHER = FuzzyMatcher(PALACE_PROPER_NOUNS, max_distance=2, min_length=4)
+
+
+def _log_proper_noun_match(found: str, correct_name: str, distance: int):
+    if distance == 0:
+        print(f"🔍 Matched '{found}' → '{correct_name}'")
+    else:
+        print(f"🔍 Fuzzy matched '{found}' → '{correct_name}' (distance: {distance})")
 
 
 def _normalize_palace_proper_nouns(text: str, lang: str) -> str:
     """
     Normalize mispronounced palace proper nouns in the question text.
-    Uses fuzzy matching to recognize similar pronunciations.
+    Exact variations are replaced in one pass of a precompiled regex; remaining words
+    are looked up in a BK-tree of variations (edit distance <= 2).
     """
-    normalized_text = text
-    text_lower = text.lower()
-    
-    # For each proper noun, check if any variation appears in the text
-    for correct_name, variations in PALACE_PROPER_NOUNS.items():
-        # Check for exact matches first (most common case)
-        for variation in variations:
-            if variation in text_lower:
-                # Replace with correct name (case-insensitive)
-                pattern = re.compile(re.escape(variation), re.IGNORECASE)
-                normalized_text = pattern.sub(correct_name, normalized_text)
-                if variation != correct_name:
-                    print(f"🔍 Matched '{variation}' → '{correct_name}'")
-                break
-        else:
-            # If no exact match, try fuzzy matching on words
-            words = re.findall(r'\b\w+\b', text_lower)
-            for word in words:
-                # Check if this word is similar to any variation
-                for variation in variations:
-                    # Only check words of similar length
-                    if abs(len(word) - len(variation)) <= 2 and len(word) >= 4:
-                        distance = _levenshtein_distance(word, variation)
-                        if distance <= 2:
-                            # Replace the word with correct name
-                            pattern = re.compile(r'\b' + re.escape(word) + r'\b', re.IGNORECASE)
-                            normalized_text = pattern.sub(correct_name, normalized_text)
-                            print(f"🔍 Fuzzy matched '{word}' → '{correct_name}' (distance: {distance})")
-                            break
-    
-    return normalized_text
+    return _PALACE_MATCHER.replace(text, on_match=_log_proper_noun_match)
 
 
 # ===========================================================
 # 2) 스팟 Q&A 세션
 # ===========================================================
+# 스트리밍 STT 사용 시, 방문객이 말하는 동안 확정된(committed) 앞부분으로
+# 번역 + RAG 프롬프트 생성을 미리 시작한다. 최종 문장이 같으면 그 결과를 그대로 사용.
+USE_STREAMING_QA = True
+SPECULATE_MIN_WORDS = 3  # 이 단어 수 이상 확정되면 미리 번역/검색 시작
+
+_speculation_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qa-speculate")
+
+
+def _translate_and_build_prompt(spot_code, normalized, lang):
+    """질문 번역(영어) + RAG 프롬프트 생성. (question_en, prompt) 반환"""
+    question_en = translate_question_to_en(normalized, src=lang)
+
+    # RAG 컨텍스트를 포함한 프롬프트 생성
+    # Note: build_llm_prompt_for_qa() checks ENABLE_RAG flag internally
+    # If RAG is disabled, it will generate a prompt without context
+    prompt = build_llm_prompt_for_qa(
+        spot_code=spot_code,
+        user_question=question_en,
+        place_id="gyeongbokgung",
+        language="en",  # LLM은 항상 영어로 답변, 이후 번역
+    )
+    return question_en, prompt
+
+
+def _speculative_prepare(spot_code, text, lang):
+    normalized = _normalize_palace_proper_nouns(text.lower().strip(), lang)
+    return normalized, _translate_and_build_prompt(spot_code, normalized, lang)
+
+
+def _listen_question(spot_code, lang, seconds):
+    """
+    질문 듣기. 스트리밍 모드에서는 확정된 앞부분으로 번역/검색을 미리 시작한다.
+    (user_text, speculation) 반환 - speculation은 (committed_text, Future) 또는 None
+    """
+    if not USE_STREAMING_QA:
+        return listen_for_seconds(lang=lang, seconds=seconds, policy="question"), None
+
+    speculation = {"text": None, "future": None}
+
+    def on_partial(hyp):
+        committed = hyp["committed"]
+        # zh/ja/th는 띄어쓰기가 없으므로 글자 수 기준 (대략 단어당 3글자)
+        units = len(committed) // 3 if lang in ("zh", "ja", "th") else len(committed.split())
+        if units < SPECULATE_MIN_WORDS or committed == speculation["text"]:
+            return
+        # 최신 확정 문장만 유지 (이전 추측 작업은 아직 시작 전이면 취소)
+        if speculation["future"] is not None:
+            speculation["future"].cancel()
+        speculation["text"] = committed
+        speculation["future"] = _speculation_pool.submit(_speculative_prepare, spot_code, committed, lang)
+
+    user_text = listen_streaming(lang=lang, seconds=seconds, on_partial=on_partial, policy="question")
+    if speculation["future"] is None:
+        return user_text, None
+    return user_text, (speculation["text"], speculation["future"])
+
+
+def _use_speculation(speculation, normalized, lang):
+    """
+    추측 작업의 질문이 최종 질문과 같으면 (question_en, prompt) 반환, 아니면 None
+    - 확정 문장을 먼저 비교하고, 다르면 결과를 기다리지 않고 취소 (버릴 번역/RAG 왕복을 기다리지 않음)
+    """
+    if speculation is None:
+        return None
+    text, future = speculation
+    # 구두점 차이("...?")는 무시하고 비교
+    spec_normalized = _normalize_palace_proper_nouns(text.lower().strip(), lang)
+    if re.sub(r'[^\w\s]', '', spec_normalized).strip() != re.sub(r'[^\w\s]', '', normalized).strip():
+        future.cancel()
+        return None
+    if future.cancelled():
+        return None
+    try:
+        _spec_normalized, prepared = future.result()
+    except Exception:
+        return None
+    print("⚡ Reusing translation/retrieval prepared while the visitor was speaking")
+    return prepared
+
+
 def run_qa_session(spot_code, lang):
     """
     질문 → RAG → LLM → TTS
@@ -423,31 +492,14 @@ def run_qa_session(spot_code, lang):
     """
     # Special intro for geunjeongjeon (covers both geunjeongmun and geunjeongjeon)
     if spot_code == "geunjeongjeon":
-        if lang == "ko":
-            intro_text = "Geunjeongmun과 Geunjeongjeon에 대한 설명이 끝났습니다. 질문이 있으신가요? 있으시면 말씀해주세요. 없으시면 '패스'라고 말해주셔도 좋아요."
-        elif lang == "en":
-            intro_text = "That concludes the explanation of Geun-jeong-mun and Geun-jeong-jeon. Do you have any questions? If not, you can say 'pass'."
-        elif lang == "zh":
-            intro_text = "关于勤政门和勤政殿的说明已结束。您有什么问题吗？如果有请告诉我。如果没有，您可以说'跳过'。"
-        elif lang == "ja":
-            intro_text = "勤政門と勤政殿の説明が終わりました。ご質問はありますか？ある場合はお知らせください。ない場合は「パス」と言っていただいても結構です。"
-        elif lang == "fr":
-            intro_text = "L'explication de Geun-jeong-mun et Geun-jeong-jeon est terminée. Avez-vous des questions ? Si oui, dites-le moi. Sinon, vous pouvez dire 'passer'."
-        elif lang == "es":
-            intro_text = "Eso concluye la explicación de Geun-jeong-mun y Geun-jeong-jeon. ¿Tiene alguna pregunta? Si la tiene, dígamelo. Si no, puede decir 'pasar'."
-        elif lang == "vi":
-            intro_text = "Phần giải thích về Geun-jeong-mun và Geun-jeong-jeon đã kết thúc. Bạn có câu hỏi nào không? Nếu có, hãy cho tôi biết. Nếu không, bạn có thể nói 'bỏ qua'."
-        elif lang == "th":
-            intro_text = "คำอธิบายเกี่ยวกับคึนจองมุนและคึนจองจอนจบแล้ว คุณมีคำถามไหม? ถ้ามีกรุณาบอกฉัน ถ้าไม่มีคุณสามารถพูดว่า 'ผ่าน' ได้"
-        else:
-            intro_text = "That concludes the explanation of Geun-jeong-mun and Geun-jeong-jeon. Do you have any questions? If not, you can say 'pass'."
+        intro_text = GEUNJEONGJEON_QA_INTRO.get(lang, GEUNJEONGJEON_QA_INTRO["en"])
         speak(intro_text, lang)
     else:
         speak(PHRASES["qa_intro"][lang], lang)
 
     while True:
         print("🎙 STT 대기중... (최대 10초)")
-        user_text = listen_for_seconds(lang=lang, seconds=10)
+        user_text, speculation = _listen_question(spot_code, lang, seconds=10)
 
         # --- 10초 동안 아무 말 없으면 ---
         if not user_text:
@@ -499,19 +551,13 @@ def run_qa_session(spot_code, lang):
         # ====================================================================
         print(f"사용자 질문: {normalized}")
 
-        # 질문을 영어로 번역 (RAG는 영어로 작동)
-        question_en = translate_question_to_en(normalized, src=lang)
+        # 질문을 영어로 번역 (RAG는 영어로 작동) + RAG 프롬프트 생성
+        # 스트리밍 중 미리 준비된 결과가 있으면 재사용
+        prepared = _use_speculation(speculation, normalized, lang)
+        if prepared is None:
+            prepared = _translate_and_build_prompt(spot_code, normalized, lang)
+        question_en, prompt = prepared
         print(f"[Q&A] Translated to EN → '{question_en}'")
-
-        # RAG 컨텍스트를 포함한 프롬프트 생성
-        # Note: build_llm_prompt_for_qa() checks ENABLE_RAG flag internally
-        # If RAG is disabled, it will generate a prompt without context
-        prompt = build_llm_prompt_for_qa(
-            spot_code=spot_code,
-            user_question=question_en,
-            place_id="gyeongbokgung",
-            language="en",  # LLM은 항상 영어로 답변, 이후 번역
-        )
         
         # LLM으로 답변 생성 (영어로 답변받음, 짧은 답변 강제)
         answer_en = call_llm(prompt, temperature=0.7, max_tokens=150).strip()
@@ -596,7 +642,7 @@ def _check_wakeword_inline(lang: str) -> bool:
     짧게 STT를 돌려 웨이크워드가 들렸는지 확인.
     - 2초 청취, 선택된 언어 코드 사용
     """
-    text = listen_for_seconds(lang=lang, seconds=2)
+    text = listen_for_seconds(lang=lang, seconds=2, policy="inline")
     if not text:
         return False
     print(f"[WakeWord-inline] captured: {text}")
@@ -609,7 +655,7 @@ def _handle_inline_question(spot_code: str, lang: str):
     """
     speak(PHRASES["qa_intro"][lang], lang)
 
-    user_text = listen_for_seconds(lang=lang, seconds=6)
+    user_text = listen_for_seconds(lang=lang, seconds=6, policy="question")
     if not user_text:
         speak(PHRASES["qa_silence"][lang], lang)
         return
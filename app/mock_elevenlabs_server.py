@@ -0,0 +1,242 @@
+# mock_elevenlabs_server.py
+"""
+ElevenLabs text-to-speech API 로컬 대역 서버 (크레딧/네트워크 없이 tts_service 벤치마크·회귀 테스트용).
+
+구현한 계약:
+- POST /v1/text-to-speech/{voice_id}          → 전체 오디오 한 번에 (Content-Length)
+- POST /v1/text-to-speech/{voice_id}/stream   → chunked 전송으로 합성되는 대로 조금씩
+- ?output_format=pcm_16000|pcm_22050|pcm_24000|pcm_44100 → int16 mono PCM (사인파)
+  그 외 / 생략 → audio/mpeg (무음 MP3 프레임)
+- xi-api-key 없음 → 401 {"detail": {"status": "invalid_api_key"}}
+- 글자 수 할당량(--quota-chars) 초과 → 401 {"detail": {"status": "quota_exceeded"}}
+- 동시 요청 수(--max-concurrent) 초과 또는 --rate-limit-prob 확률 → 429 (+ Retry-After)
+
+지연/처리량:
+- --latency      : 첫 바이트까지 걸리는 시간 (s), --jitter 만큼 무작위로 흔들림
+- --realtime     : 오디오 생성 속도 (실시간 대비 배수, 4 = 1초 분량을 0.25초에 생성)
+- --chars-per-sec: 텍스트 길이 → 오디오 길이 (초당 글자 수)
+
+사용 예:
+    python mock_elevenlabs_server.py --port 8765 --latency 0.4 --realtime 4
+    ELEVENLABS_BASE_URL=http://127.0.0.1:8765 ELEVENLABS_API_KEY=mock python dori_main.py
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MOCK_HOST = "127.0.0.1"
+MOCK_PORT = 8765
+MOCK_LATENCY = 0.3  # Seconds to first byte
+MOCK_JITTER = 0.1  # ± seconds added to MOCK_LATENCY
+MOCK_REALTIME = 4.0  # Audio generated this many times faster than it plays
+MOCK_CHARS_PER_SEC = 15.0  # Speech rate used to size the audio
+MOCK_CHUNK_SECONDS = 0.1  # Audio per streamed chunk
+MOCK_TONE_HZ = 220.0
+
+_PATH_RE = re.compile(r"^/v1/text-to-speech/([^/]+)(/stream)?$")
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz frame with empty side info (= silence), 1152 samples
+_MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+_MP3_FRAME_SECONDS = 1152 / 44100
+
+
+class MockConfig:
+    def __init__(self, latency=MOCK_LATENCY, jitter=MOCK_JITTER, realtime=MOCK_REALTIME,
+                 chars_per_sec=MOCK_CHARS_PER_SEC, quota_chars=None, max_concurrent=None,
+                 rate_limit_prob=0.0, retry_after=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.realtime = realtime
+        self.chars_per_sec = chars_per_sec
+        self.quota_chars = quota_chars  # None = unlimited
+        self.max_concurrent = max_concurrent  # None = unlimited
+        self.rate_limit_prob = rate_limit_prob
+        self.retry_after = retry_after
+
+
+class MockElevenLabsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: MockConfig):
+        super().__init__(address, _Handler)
+        self.config = config
+        self.lock = threading.Lock()
+        self.active = 0
+        self.chars_used = 0
+        self.stats = {"requests": 0, "ok": 0, "stream": 0, "401": 0, "429": 0, "chars": 0, "audio_seconds": 0.0}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return dict(self.stats)
+
+
+def _pcm_tone(seconds: float, sample_rate: int) -> bytes:
+    n = int(seconds * sample_rate)
+    step = 2 * math.pi * MOCK_TONE_HZ / sample_rate
+    return struct.pack(f"<{n}h", *(int(3000 * math.sin(step * i)) for i in range(n)))
+
+
+def _mp3_silence(seconds: float) -> bytes:
+    return _MP3_FRAME * max(1, int(seconds / _MP3_FRAME_SECONDS))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so tts_service's pooled session is exercised
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _count(self, key: str):
+        with self.server.lock:
+            self.server.stats[key] += 1
+
+    def do_POST(self):
+        server = self.server
+        config = server.config
+        url = urlparse(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._count("requests")
+
+        m = _PATH_RE.match(url.path)
+        if m is None:
+            self._send_json(404, {"detail": "Not Found"})
+            return
+        stream = bool(m.group(2))
+        try:
+            text = json.loads(body or b"{}").get("text") or ""
+        except ValueError:
+            self._send_json(422, {"detail": "invalid JSON body"})
+            return
+        if not text:
+            self._send_json(422, {"detail": "text is required"})
+            return
+
+        if not self.headers.get("xi-api-key"):
+            self._count("401")
+            self._send_json(401, {"detail": {"status": "invalid_api_key", "message": "missing xi-api-key"}})
+            return
+
+        with server.lock:
+            if config.quota_chars is not None and server.chars_used + len(text) > config.quota_chars:
+                status = "quota"
+            elif config.max_concurrent is not None and server.active >= config.max_concurrent:
+                status = "busy"
+            elif random.random() < config.rate_limit_prob:
+                status = "busy"
+            else:
+                status = "ok"
+                server.active += 1
+                server.chars_used += len(text)
+        if status == "quota":
+            self._count("401")
+            self._send_json(401, {"detail": {"status": "quota_exceeded",
+                                             "message": "This request exceeds your quota."}})
+            return
+        if status == "busy":
+            self._count("429")
+            self._send_json(429, {"detail": {"status": "too_many_concurrent_requests"}},
+                            {"Retry-After": str(config.retry_after)})
+            return
+
+        try:
+            self._send_audio(text, parse_qs(url.query).get("output_format", ["mp3_44100_128"])[0], stream)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _send_audio(self, text: str, output_format: str, stream: bool):
+        config = self.server.config
+        seconds = max(0.2, len(text) / config.chars_per_sec)
+        if output_format.startswith("pcm_"):
+            sample_rate = int(output_format.split("_")[1])
+            audio = _pcm_tone(seconds, sample_rate)
+            content_type = "audio/pcm"
+            chunk_bytes = 2 * int(MOCK_CHUNK_SECONDS * sample_rate)
+        else:
+            audio = _mp3_silence(seconds)
+            content_type = "audio/mpeg"
+            chunk_bytes = len(_MP3_FRAME) * max(1, int(MOCK_CHUNK_SECONDS / _MP3_FRAME_SECONDS))
+        chunk_delay = MOCK_CHUNK_SECONDS / config.realtime
+
+        time.sleep(max(0.0, config.latency + random.uniform(-config.jitter, config.jitter)))
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        if stream:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(audio), chunk_bytes):
+                if i:
+                    time.sleep(chunk_delay)
+                chunk = audio[i:i + chunk_bytes]
+                self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            time.sleep(seconds / config.realtime)  # whole body only once it is fully "synthesized"
+            self.send_header("Content-Length", str(len(audio)))
+            self.end_headers()
+            self.wfile.write(audio)
+
+        with self.server.lock:
+            stats = self.server.stats
+            stats["ok"] += 1
+            stats["stream"] += stream
+            stats["chars"] += len(text)
+            stats["audio_seconds"] += seconds
+
+
+def start_mock_server(host=MOCK_HOST, port=0, config=None) -> MockElevenLabsServer:
+    """Start the mock in a background thread (port 0 = any free port). Stop with server.shutdown()."""
+    server = MockElevenLabsServer((host, port), config or MockConfig())
+    threading.Thread(target=server.serve_forever, daemon=True, name="mock-elevenlabs").start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the ElevenLabs text-to-speech API")
+    parser.add_argument("--host", default=MOCK_HOST)
+    parser.add_argument("--port", type=int, default=MOCK_PORT)
+    parser.add_argument("--latency", type=float, default=MOCK_LATENCY, help="seconds to first byte")
+    parser.add_argument("--jitter", type=float, default=MOCK_JITTER)
+    parser.add_argument("--realtime", type=float, default=MOCK_REALTIME, help="generation speed vs. playback")
+    parser.add_argument("--chars-per-sec", type=float, default=MOCK_CHARS_PER_SEC)
+    parser.add_argument("--quota-chars", type=int, default=None, help="401 quota_exceeded after this many chars")
+    parser.add_argument("--max-concurrent", type=int, default=None, help="429 above this many requests in flight")
+    parser.add_argument("--rate-limit-prob", type=float, default=0.0, help="random 429 probability")
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency, args.jitter, args.realtime, args.chars_per_sec,
+                        args.quota_chars, args.max_concurrent, args.rate_limit_prob, args.retry_after)
+    server = MockElevenLabsServer((args.host, args.port), config)
+    print(f"🟢 Mock ElevenLabs on {server.base_url}  (ELEVENLABS_BASE_URL={server.base_url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 {server.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
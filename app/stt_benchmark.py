@@ -0,0 +1,344 @@
+# stt_benchmark.py
+"""
+STT 벤치마크.
+
+1) rtf   : 같은 WAV 하나로 백엔드별 real-time factor 비교
+2) suite : 라벨된 WAV 디렉터리 전체를 speech_to_text 경로로 돌려 모델 크기/백엔드별로
+           RTF, p50/p95 지연, WER, 거절률(_is_valid_transcription/신뢰도 게이트)을 JSON으로 저장
+
+RTF = 디코딩 시간 / 오디오 길이  (1.0 미만이면 실시간보다 빠름)
+
+suite 픽스처 구조 (언어 코드 = WHISPER_LANGS 키):
+    fixtures/
+        en/when_was_geunjeongjeon_built.wav
+        en/when_was_geunjeongjeon_built.txt   ← 정답 문장 (UTF-8 한 줄)
+        ko/q01.wav
+        ko/q01.txt
+        ...
+
+사용 예:
+    python stt_benchmark.py rtf question.wav --lang en --policy question
+    python stt_benchmark.py suite fixtures/ --model-sizes base small --backends openai-whisper faster-whisper --out stt_bench.json
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+import wave
+
+import numpy as np
+
+import stt_service
+from stt_service import (
+    DECODE_POLICIES,
+    DEFAULT_DECODE_POLICY,
+    STT_BACKENDS,
+    WHISPER_LANGS,
+    WHISPER_MODEL_SIZE,
+    load_whisper,
+)
+
+SAMPLE_RATE = 16000
+CHAR_LEVEL_LANGS = ("zh", "ja", "th")  # No spaces between words: report character error rate
+
+
+def load_wav(path: str) -> np.ndarray:
+    """
+    Load a PCM WAV file as mono float32 @16 kHz (the format speech_to_text feeds Whisper).
+    """
+    with wave.open(path, "rb") as wf:
+        n_channels = wf.getnchannels()
+        sample_width = wf.getsampwidth()
+        rate = wf.getframerate()
+        frames = wf.readframes(wf.getnframes())
+
+    if sample_width != 2:
+        raise ValueError(f"{path}: only 16-bit PCM WAV is supported (got {sample_width * 8}-bit)")
+
+    audio = np.frombuffer(frames, dtype=np.int16)
+    if n_channels > 1:
+        audio = audio.reshape(-1, n_channels).mean(axis=1).astype(np.int16)
+
+    audio = audio.astype(np.float32) / 32768.0
+    if rate != SAMPLE_RATE:
+        from scipy.signal import resample_poly
+
+        g = np.gcd(rate, SAMPLE_RATE)
+        audio = resample_poly(audio, SAMPLE_RATE // g, rate // g).astype(np.float32)
+    return audio
+
+
+def load_wav_int16(path: str) -> np.ndarray:
+    """Same as load_wav, but int16 samples (what record_audio hands to speech_to_text)."""
+    return (np.clip(load_wav(path), -1.0, 1.0) * 32767).astype(np.int16)
+
+
+# ===========================================================
+# 1) Backend RTF comparison
+# ===========================================================
+def measure_rtf(np_audio: np.ndarray, backend: str, model_size: str, lang=None, runs: int = 3,
+                policy=DEFAULT_DECODE_POLICY) -> dict:
+    """
+    Decode the same audio `runs` times with one backend and report timing.
+    Every backend runs one decode_pass() with the same DECODE_POLICIES options (beam size,
+    first temperature of the schedule, thresholds), not each library's own defaults
+    (faster-whisper would otherwise beam-search where openai-whisper decodes greedily).
+    The first (warm-up) call is excluded so model loading does not skew the numbers.
+    """
+    audio_seconds = len(np_audio) / SAMPLE_RATE
+    pol = DECODE_POLICIES[policy]
+    temperature = pol["temperatures"][0] if pol["temperatures"] else 0.0
+    language = WHISPER_LANGS.get(lang, lang)
+
+    load_start = time.perf_counter()
+    model = load_whisper(backend=backend, model_size=model_size)
+    load_seconds = time.perf_counter() - load_start
+
+    model.decode_pass(np_audio, language, temperature, pol)  # warm-up
+
+    timings = []
+    result = {}
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = model.decode_pass(np_audio, language, temperature, pol)
+        timings.append(time.perf_counter() - start)
+
+    mean_seconds = float(np.mean(timings))
+    return {
+        "backend": backend,
+        "model_size": model_size,
+        "policy": policy,
+        "beam_size": pol.get("beam_size") or 1,
+        "temperature": temperature,
+        "audio_seconds": round(audio_seconds, 3),
+        "load_seconds": round(load_seconds, 3),
+        "decode_seconds_mean": round(mean_seconds, 3),
+        "rtf": round(mean_seconds / audio_seconds, 3) if audio_seconds > 0 else None,
+        "text": result.get("text", "").strip(),
+        "language": result.get("language"),
+    }
+
+
+def compare_backends(np_audio: np.ndarray, backends=None, model_size=None, lang=None, runs: int = 3,
+                     policy=DEFAULT_DECODE_POLICY) -> list[dict]:
+    """Run measure_rtf for every backend on the same audio with the same decode policy."""
+    backends = backends or list(STT_BACKENDS)
+    model_size = model_size or WHISPER_MODEL_SIZE
+    return [measure_rtf(np_audio, b, model_size, lang=lang, runs=runs, policy=policy) for b in backends]
+
+
+# ===========================================================
+# 2) Labelled fixture suite
+# ===========================================================
+def load_fixtures(root: str) -> list[dict]:
+    """Collect <root>/<lang>/<name>.wav files that have a <name>.txt reference next to them."""
+    fixtures = []
+    for lang in sorted(os.listdir(root)):
+        lang_dir = os.path.join(root, lang)
+        if lang not in WHISPER_LANGS or not os.path.isdir(lang_dir):
+            continue
+        for name in sorted(os.listdir(lang_dir)):
+            if not name.lower().endswith(".wav"):
+                continue
+            wav_path = os.path.join(lang_dir, name)
+            ref_path = os.path.splitext(wav_path)[0] + ".txt"
+            if not os.path.exists(ref_path):
+                print(f"⚠️  No reference transcript for {wav_path}, skipped")
+                continue
+            with open(ref_path, encoding="utf-8") as f:
+                reference = f.read().strip()
+            fixtures.append({"path": wav_path, "lang": lang, "reference": reference})
+    return fixtures
+
+
+def _tokens(text: str, lang: str) -> list:
+    text = re.sub(r"[^\w\s]", " ", (text or "").lower())
+    if lang in CHAR_LEVEL_LANGS:
+        return list(text.replace(" ", ""))
+    return text.split()
+
+
+def _edit_distance(ref: list, hyp: list) -> int:
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1]
+
+
+def word_error_rate(reference: str, hypothesis: str, lang: str) -> tuple[int, int]:
+    """(edit errors, reference length) - words, or characters for zh/ja/th."""
+    ref = _tokens(reference, lang)
+    hyp = _tokens(hypothesis, lang)
+    return _edit_distance(ref, hyp), len(ref)
+
+
+def _summarize(items: list[dict]) -> dict:
+    if not items:
+        return {}
+    latencies = np.array([it["latency_seconds"] for it in items])
+    audio_seconds = sum(it["audio_seconds"] for it in items)
+    errors = sum(it["errors"] for it in items)
+    ref_len = sum(it["reference_length"] for it in items)
+    outcomes = [it["outcome"] for it in items]
+    return {
+        "count": len(items),
+        "audio_seconds": round(audio_seconds, 3),
+        "rtf": round(float(latencies.sum()) / audio_seconds, 4) if audio_seconds else None,
+        "latency_p50": round(float(np.percentile(latencies, 50)), 4),
+        "latency_p95": round(float(np.percentile(latencies, 95)), 4),
+        "wer": round(errors / ref_len, 4) if ref_len else None,
+        "rejection_rate": round(outcomes.count("rejected") / len(items), 4),
+        "no_speech_rate": round(outcomes.count("no_speech") / len(items), 4),
+        "decode_passes": sum(it["decode_passes"] for it in items),
+    }
+
+
+def run_suite(fixtures: list[dict], backend: str, model_size: str, min_confidence=None, en_model_size=None) -> dict:
+    """
+    Run every fixture through speech_to_text (preprocessing, decode policy, gating) with one
+    backend/model size. The raw pre-gating hypothesis is used for WER so rejected items still count.
+    en_model_size: English-only model for "en" fixtures (None = measure `model_size` for every language)
+    """
+    stt_service.STT_BACKEND = backend
+    stt_service.WHISPER_MODEL_SIZE = model_size
+    stt_service.WHISPER_EN_MODEL_SIZE = en_model_size
+    # Exclude model loading from latency
+    for lang in sorted({fx["lang"] for fx in fixtures}):
+        load_whisper(model_size=stt_service.model_size_for_lang(lang))
+
+    items = []
+    for fx in fixtures:
+        samples = load_wav_int16(fx["path"])
+        before = stt_service.get_last_decode_stats()
+
+        start = time.perf_counter()
+        text = stt_service.speech_to_text(samples, lang=fx["lang"], min_confidence=min_confidence, policy="question")
+        latency = time.perf_counter() - start
+
+        stats = stt_service.get_last_decode_stats()
+        decoded = stats is not None and stats is not before
+        raw_text = stats["text"] if decoded else ""
+        if not decoded:
+            outcome = "no_speech"
+        elif text is None:
+            outcome = "rejected"
+        else:
+            outcome = "accepted"
+
+        errors, ref_len = word_error_rate(fx["reference"], raw_text, fx["lang"])
+        items.append({
+            "path": fx["path"],
+            "lang": fx["lang"],
+            "reference": fx["reference"],
+            "hypothesis": raw_text,
+            "accepted_text": text,
+            "outcome": outcome,
+            "avg_logprob": stats["avg_logprob"] if decoded else None,
+            "decode_passes": stats["passes"] if decoded else 0,
+            "audio_seconds": round(len(samples) / SAMPLE_RATE, 3),
+            "latency_seconds": round(latency, 4),
+            "errors": errors,
+            "reference_length": ref_len,
+        })
+        print(f"  [{fx['lang']}] {os.path.basename(fx['path'])}: {outcome} {latency:.2f}s '{raw_text}'")
+
+    by_lang = {}
+    for it in items:
+        by_lang.setdefault(it["lang"], []).append(it)
+
+    return {
+        "backend": backend,
+        "model_size": model_size,
+        "en_model_size": en_model_size,
+        "min_avg_logprob": min_confidence if min_confidence is not None else stt_service.MIN_AVG_LOGPROB,
+        "summary": _summarize(items),
+        "per_lang": {lang: _summarize(lang_items) for lang, lang_items in sorted(by_lang.items())},
+        "items": items,
+    }
+
+
+def _run_rtf(args):
+    np_audio = load_wav(args.wav)
+    print(f"📥 {args.wav}: {len(np_audio) / SAMPLE_RATE:.2f}s")
+
+    rows = compare_backends(np_audio, args.backends, args.model_size, args.lang, args.runs, args.policy)
+
+    print(f"\n⚙️  Decode policy '{rows[0]['policy']}': beam_size={rows[0]['beam_size']}, "
+          f"temperature={rows[0]['temperature']} (same options for every backend)")
+    print(f"{'backend':<16} {'model':<8} {'load(s)':>8} {'decode(s)':>10} {'RTF':>6}  text")
+    for r in rows:
+        print(
+            f"{r['backend']:<16} {r['model_size']:<8} {r['load_seconds']:>8.2f} "
+            f"{r['decode_seconds_mean']:>10.2f} {r['rtf']:>6.2f}  {r['text']}"
+        )
+
+    if len(rows) == 2 and rows[1]["rtf"]:
+        print(f"\n⚡ Speed-up {rows[1]['backend']} vs {rows[0]['backend']}: {rows[0]['rtf'] / rows[1]['rtf']:.2f}x")
+
+
+def _run_suite(args):
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"⚠️ No labelled WAV fixtures found under {args.fixtures}")
+        return
+    langs = sorted({fx["lang"] for fx in fixtures})
+    print(f"📥 {len(fixtures)} fixtures ({', '.join(langs)})")
+
+    runs = []
+    for backend in args.backends:
+        for model_size in args.model_sizes:
+            print(f"\n🔵 {backend} / {model_size}")
+            run = run_suite(fixtures, backend, model_size, args.min_confidence, args.en_model_size)
+            summary = run["summary"]
+            print(
+                f"   RTF {summary['rtf']}  p50 {summary['latency_p50']}s  p95 {summary['latency_p95']}s  "
+                f"WER {summary['wer']}  rejected {summary['rejection_rate']:.0%}"
+            )
+            runs.append(run)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "fixtures": os.path.abspath(args.fixtures),
+        "preprocessing": stt_service.USE_PREPROCESSING,
+        "runs": runs,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Report saved to {args.out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="STT benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rtf = sub.add_parser("rtf", help="compare backend real-time factor on one WAV")
+    rtf.add_argument("wav", help="16-bit PCM WAV file")
+    rtf.add_argument("--backends", nargs="+", default=list(STT_BACKENDS), choices=list(STT_BACKENDS))
+    rtf.add_argument("--model-size", default=WHISPER_MODEL_SIZE)
+    rtf.add_argument("--lang", default=None, help="language hint (default: auto-detect)")
+    rtf.add_argument("--runs", type=int, default=3)
+    rtf.add_argument("--policy", default=DEFAULT_DECODE_POLICY, choices=list(DECODE_POLICIES),
+                     help="decode options shared by every backend")
+
+    suite = sub.add_parser("suite", help="run labelled WAV fixtures through speech_to_text")
+    suite.add_argument("fixtures", help="directory with <lang>/<name>.wav + <name>.txt")
+    suite.add_argument("--backends", nargs="+", default=[stt_service.STT_BACKEND], choices=list(STT_BACKENDS))
+    suite.add_argument("--model-sizes", nargs="+", default=[WHISPER_MODEL_SIZE])
+    suite.add_argument("--en-model-size", default=None, help="English-only model for en fixtures, e.g. base.en")
+    suite.add_argument("--min-confidence", type=float, default=None, help="override MIN_AVG_LOGPROB")
+    suite.add_argument("--out", default="stt_bench.json")
+
+    args = parser.parse_args()
+    if args.command == "rtf":
+        _run_rtf(args)
+    else:
+        _run_suite(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,20 @@ import tempfile
 
 import re
 
+import threading
+
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait as futures_wait
+
 import numpy as np
 
 import sounddevice as sd
 
 import whisper
 
+from audio_bus import get_audio_bus
+from tour_route import TOUR_ROUTE, PALACE_PROPER_NOUNS
+
 
 
 # ===== 언어 코드 매핑 =====
@@ -56,26 +64,357 @@ MIN_AVG_LOGPROB = -1.2
 MIN_TEXT_LENGTH = 2  # Minimum characters for valid transcription
 MAX_CONSECUTIVE_REPEATS = 3  # Max consecutive repeated characters (e.g., "aaa")
 
-_whisper_model = None
+# ===== VAD (voice activity) endpointing for streaming capture =====
+# With VAD capture, `seconds` in listen_for_seconds becomes the maximum duration:
+# recording stops as soon as the visitor stops talking.
+USE_VAD_CAPTURE = True
+VAD_FRAME_MS = 30  # Analysis frame length (ms)
+VAD_MIN_RMS = 300.0  # Absolute int16 RMS floor for speech (quiet room)
+VAD_SNR = 2.5  # Speech must be this many times louder than the running noise floor
+VAD_MIN_SPEECH = 0.15  # Seconds of consecutive speech frames needed to start an utterance
+VAD_END_SILENCE = 0.8  # Seconds of trailing silence that end an utterance
+VAD_PRE_ROLL = 0.3  # Seconds of audio kept before speech onset (avoid clipping first syllable)
+
+# ===== STT Backend Configuration =====
+# "openai-whisper": reference PyTorch implementation (fp32 on CPU)
+# "faster-whisper": CTranslate2 engine with quantized weights - several times faster on ARM CPUs (Orin)
+STT_BACKEND = "openai-whisper"
+FASTER_WHISPER_COMPUTE_TYPE = "int8"  # "int8", "int8_float32", "float32"
+FASTER_WHISPER_CPU_THREADS = 0  # 0 = let CTranslate2 pick the number of threads
+
+# ===== Language ID =====
+# Auto-detect path (wakeword windows): detect the language first and only transcribe
+# if Whisper is at least this sure about it. Noise/unknown speech is dropped cheaply.
+LANG_ID_MIN_PROB = 0.5
+
+# ===== Decode policies =====
+# Whisper's default temperature fallback can re-decode the same audio up to 6 times
+# (0.0 → 1.0) on noisy audio. Each policy caps the schedule and the wall-clock time.
+# - beam_size: beam search width at temperature 0 (None = greedy)
+# - best_of: candidates sampled at temperature > 0
+# - temperatures: fallback schedule, tried in order
+# - compression_ratio_threshold / logprob_threshold: a pass failing either triggers the next temperature
+# - no_speech_threshold: segments this likely to be silence never trigger fallback
+#   (the library also drops such segments unless their avg_logprob beats logprob_threshold,
+#    so both thresholds are always passed through, see _library_thresholds)
+# - budget_seconds: no new pass is started if it would likely exceed this budget
+# - redecode: _redecode strategies tried on a rejected transcript (() = none)
+# - max_retries: re-recordings after that, unless the caller passes max_retries
+WHISPER_DEFAULT_LOGPROB_THRESHOLD = -1.0  # openai-whisper / faster-whisper default
+
+DECODE_POLICIES = {
+    # 3s wakeword windows: one greedy pass, speed over accuracy
+    "wakeword": {
+        "beam_size": None,
+        "best_of": None,
+        "temperatures": (0.0,),
+        "compression_ratio_threshold": 2.4,
+        "logprob_threshold": -1.0,
+        "no_speech_threshold": 0.6,
+        "budget_seconds": 1.5,
+        "redecode": (),
+        "max_retries": 0,
+    },
+    # 2s inline interrupt check while a script is playing
+    "inline": {
+        "beam_size": None,
+        "best_of": 2,
+        "temperatures": (0.0, 0.4),
+        "compression_ratio_threshold": 2.4,
+        "logprob_threshold": -1.0,
+        "no_speech_threshold": 0.6,
+        "budget_seconds": 2.0,
+        "redecode": (),  # Runs after every script sentence: a miss is cheaper than a slow tour
+        "max_retries": 0,
+    },
+    # Streaming partials: re-decoded every STREAM_STEP_MS, must stay well under the step
+    "stream": {
+        "beam_size": None,
+        "best_of": None,
+        "temperatures": (0.0,),
+        "compression_ratio_threshold": None,
+        "logprob_threshold": None,
+        "no_speech_threshold": 0.6,
+        "budget_seconds": 1.0,
+        "redecode": (),
+        "max_retries": 0,
+    },
+    # Full visitor question: beam search, limited fallback
+    "question": {
+        "beam_size": 5,
+        "best_of": 3,
+        "temperatures": (0.0, 0.2, 0.4, 0.6),
+        "compression_ratio_threshold": 2.4,
+        "logprob_threshold": -1.0,
+        "no_speech_threshold": 0.6,
+        "budget_seconds": 6.0,
+        "redecode": ("trim", "prompt", "temperature"),
+        "max_retries": 1,
+    },
+}
+DEFAULT_DECODE_POLICY = "question"
+
+# Per-policy counters: calls, total passes, calls that needed fallback, calls stopped by the budget
+DECODE_STATS = {}
+_decode_stats_lock = threading.Lock()
+_last_decode = threading.local()
+
+# ===== Re-decode before re-record =====
+# When a transcript is rejected, the captured buffer is decoded again with the policy's
+# "redecode" strategies (in order) before asking the visitor to repeat themselves:
+# - "trim": leading/trailing silence removed
+# - "prompt": initial_prompt with palace proper nouns (helps "Geunjeongjeon" etc.)
+# - "temperature": a single sampled pass at REDECODE_TEMPERATURE
+REDECODE_TEMPERATURE = 0.4
+
+# ===== Audio preprocessing (int16 buffer → Whisper input) =====
+# Whisper pads every input to 30s, so silence and rumble only cost CPU time.
+# Before decoding: trim leading/trailing silence, high-pass filter, normalize level (AGC).
+# Buffers without any speech energy skip Whisper entirely.
+USE_PREPROCESSING = True
+TRIM_FRAME_MS = 20  # Frame size for energy analysis / trimming
+TRIM_MARGIN = 0.2  # Seconds of audio kept around the detected speech
+PREPROC_MIN_VOICED_SECONDS = 0.1  # Less voiced audio than this = no speech, skip Whisper
+PREPROC_MIN_RMS = 50.0  # Absolute int16 RMS floor for voiced frames (below quiet speech; the AGC lifts the rest)
+PREPROC_HIGHPASS_HZ = 80.0  # Removes wind / handling / motor rumble (0 disables)
+PREPROC_TARGET_RMS = 0.1  # AGC target level of voiced frames (float scale, about -20 dBFS)
+PREPROC_MAX_GAIN = 10.0  # AGC never amplifies more than this (avoid boosting noise)
+
+# Totals: buffers seen, buffers skipped (no speech), seconds of silence trimmed
+PREPROC_STATS = {"calls": 0, "skipped": 0, "trimmed_seconds": 0.0}
+_highpass_sos = None
+_noise_floor_estimate = None  # Latest _VadEndpointer noise floor (int16 RMS), used by _voiced_frames
+
+# ===== Streaming transcription (local agreement) =====
+# The growing buffer is re-decoded every STREAM_STEP_MS; the longest common prefix of
+# the last two hypotheses (LocalAgreement-2) is committed and never changes afterwards.
+STREAM_STEP_MS = 500
+STREAM_MIN_AUDIO = 1.0  # Seconds of speech before the first partial decode
+STREAM_CHAR_LANGS = ("zh", "ja", "th")  # No spaces between words: agree on characters
+
+_partial_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stt-partial")
+
+# Run decoding in a dedicated worker process (stt_worker.py) instead of on the calling thread
+USE_STT_WORKER = False
+STT_WORKER_RESULT_TIMEOUT = 30.0  # Seconds to wait for the worker before decoding in-process
+
+# ===== Per-session model selection / model registry =====
+# English sessions use an English-only (.en) model: smaller, faster and more accurate for English.
+# Auto-detect paths (wakeword) always use the multilingual WHISPER_MODEL_SIZE.
+WHISPER_EN_MODEL_SIZE = "base.en"  # None = use WHISPER_MODEL_SIZE for English too
+MODEL_MEMORY_CAP_MB = 1500  # Least recently used models are unloaded above this estimate
+
+# Approximate parameter counts (millions) for memory estimates
+WHISPER_MODEL_PARAMS_M = {
+    "tiny": 39, "tiny.en": 39,
+    "base": 74, "base.en": 74,
+    "small": 244, "small.en": 244,
+    "medium": 769, "medium.en": 769,
+    "large": 1550, "large-v2": 1550, "large-v3": 1550,
+}
 
+_whisper_models = OrderedDict()  # (backend, model_size) -> backend instance, least recently used first
+_whisper_models_lock = threading.Lock()
 
 
+class OpenAIWhisperBackend:
+    """openai-whisper engine. Returns the native Whisper result dict."""
 
+    name = "openai-whisper"
 
-def load_whisper():
+    def __init__(self, model_size: str):
+        # Force CPU usage to avoid CUDA memory issues
+        self.model_size = model_size
+        self.model = whisper.load_model(model_size, device="cpu")
+
+    def transcribe(self, np_audio: np.ndarray, language=None, **options) -> dict:
+        return self.model.transcribe(np_audio, language=language, fp16=False, **options)
+
+    def detect_language(self, np_audio: np.ndarray):
+        """
+        Language ID from one encoder pass + one decoder step.
+        Returns (language, probability, encoder_features); the features can be
+        handed to decode_pass() so the encoder does not run twice.
+        """
+        import torch
 
-    global _whisper_model
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(np_audio), self.model.dims.n_mels)
+        with torch.no_grad():
+            features = self.model.embed_audio(mel.unsqueeze(0).to(self.model.device))
+        # detect_language() skips the encoder when given encoder output
+        _, probs = self.model.detect_language(features)
+        probs = probs[0]
+        language = max(probs, key=probs.get)
+        return language, float(probs[language]), features
+
+    def decode_pass(self, np_audio: np.ndarray, language, temperature: float, policy: dict, features=None, **extra) -> dict:
+        """
+        One decoding pass at a single temperature (no internal fallback).
+        If encoder `features` from detect_language() are given, decode them directly
+        instead of re-running the encoder.
+        """
+        beam_size = policy.get("beam_size") if temperature == 0 else None
+        best_of = policy.get("best_of") if temperature > 0 else None
+
+        if features is None:
+            return self.transcribe(
+                np_audio,
+                language=language,
+                temperature=temperature,
+                beam_size=beam_size,
+                best_of=best_of,
+                **_library_thresholds(policy, "logprob_threshold"),
+                condition_on_previous_text=False,
+                **extra,
+            )
+
+        # decode() skips the encoder when the input already has the encoder shape
+        options = whisper.DecodingOptions(
+            language=language,
+            temperature=temperature,
+            beam_size=beam_size,
+            best_of=best_of,
+            prompt=extra.get("initial_prompt"),
+            fp16=False,
+        )
+        decoded = whisper.decode(self.model, features, options)[0]
+        return {
+            "text": decoded.text,
+            "language": language,
+            "segments": [
+                {
+                    "start": 0.0,
+                    "end": len(np_audio) / 16000,
+                    "text": decoded.text,
+                    "avg_logprob": decoded.avg_logprob,
+                    "compression_ratio": decoded.compression_ratio,
+                    "no_speech_prob": decoded.no_speech_prob,
+                    "temperature": decoded.temperature,
+                }
+            ],
+        }
+
+
+class FasterWhisperBackend:
+    """
+    faster-whisper (CTranslate2) engine with int8 quantization.
+    Results are converted to the openai-whisper dict layout
+    (text / language / segments[start, end, avg_logprob, ...]) so the
+    validity and confidence checks work unchanged.
+    """
 
-    if _whisper_model is None:
+    name = "faster-whisper"
+
+    def __init__(self, model_size: str):
+        from faster_whisper import WhisperModel
+
+        self.model_size = model_size
+        self.model = WhisperModel(
+            model_size,
+            device="cpu",
+            compute_type=FASTER_WHISPER_COMPUTE_TYPE,
+            cpu_threads=FASTER_WHISPER_CPU_THREADS,
+        )
+
+    def transcribe(self, np_audio: np.ndarray, language=None, **options) -> dict:
+        segments, info = self.model.transcribe(np_audio, language=language, **options)
+        # segments is a lazy generator: decoding happens while we iterate
+        seg_list = [
+            {
+                "id": seg.id,
+                "start": seg.start,
+                "end": seg.end,
+                "text": seg.text,
+                "avg_logprob": seg.avg_logprob,
+                "compression_ratio": seg.compression_ratio,
+                "no_speech_prob": seg.no_speech_prob,
+                "temperature": seg.temperature,
+            }
+            for seg in segments
+        ]
+        return {
+            "text": "".join(seg["text"] for seg in seg_list),
+            "language": info.language,
+            "language_probability": info.language_probability,
+            "segments": seg_list,
+        }
+
+    def detect_language(self, np_audio: np.ndarray):
+        """
+        Language ID without transcription (faster-whisper >= 1.1).
+        CTranslate2 does not expose reusable encoder output, so features is None.
+        """
+        language, probability, _all_probs = self.model.detect_language(np_audio)
+        return language, float(probability), None
+
+    def decode_pass(self, np_audio: np.ndarray, language, temperature: float, policy: dict, features=None, **extra) -> dict:
+        """One decoding pass at a single temperature (features are ignored, see detect_language)."""
+        return self.transcribe(
+            np_audio,
+            language=language,
+            temperature=temperature,
+            beam_size=policy.get("beam_size") or 1,
+            best_of=policy.get("best_of") or 1,
+            **_library_thresholds(policy, "log_prob_threshold"),
+            condition_on_previous_text=False,
+            **extra,
+        )
+
+
+STT_BACKENDS = {
+    OpenAIWhisperBackend.name: OpenAIWhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
 
-        print(f"🔵 Loading Whisper model: {WHISPER_MODEL_SIZE} (CPU)")
 
-        # Force CPU usage to avoid CUDA memory issues
-        import torch
-        device = "cpu"
-        _whisper_model = whisper.load_model(WHISPER_MODEL_SIZE, device=device)
+def estimate_model_memory_mb(backend: str, model_size: str) -> float:
+    """Rough resident size: fp32 weights for openai-whisper, ~1 byte/param for int8 CTranslate2."""
+    params_m = WHISPER_MODEL_PARAMS_M.get(model_size, WHISPER_MODEL_PARAMS_M["small"])
+    if backend == FasterWhisperBackend.name and FASTER_WHISPER_COMPUTE_TYPE.startswith("int8"):
+        bytes_per_param = 1.2
+    else:
+        bytes_per_param = 4.2
+    return params_m * bytes_per_param
+
+
+def model_size_for_lang(lang) -> str:
+    """Model size for a session language: English-only model for "en", multilingual otherwise."""
+    if WHISPER_EN_MODEL_SIZE and lang and str(lang).startswith("en"):
+        return WHISPER_EN_MODEL_SIZE
+    return WHISPER_MODEL_SIZE
+
+
+def load_whisper(backend=None, model_size=None):
+    """
+    Load (lazily) and return the STT engine selected by STT_BACKEND / WHISPER_MODEL_SIZE.
+    Loaded models are kept in a small LRU registry bounded by MODEL_MEMORY_CAP_MB.
+    The returned object exposes transcribe(np_audio, language=None, **options) -> dict.
+    """
+    backend = backend or STT_BACKEND
+    model_size = model_size or WHISPER_MODEL_SIZE
+
+    if backend not in STT_BACKENDS:
+        raise ValueError(f"Unknown STT backend: {backend} (options: {', '.join(STT_BACKENDS)})")
+
+    key = (backend, model_size)
+    with _whisper_models_lock:
+        if key in _whisper_models:
+            _whisper_models.move_to_end(key)
+            return _whisper_models[key]
+
+        # Unload least recently used models until the new one fits under the cap
+        needed = estimate_model_memory_mb(backend, model_size)
+        while _whisper_models:
+            used = sum(estimate_model_memory_mb(*k) for k in _whisper_models)
+            if used + needed <= MODEL_MEMORY_CAP_MB:
+                break
+            evicted, _ = _whisper_models.popitem(last=False)
+            print(f"🧹 Unloading Whisper model {evicted[1]} ({evicted[0]}) to stay under {MODEL_MEMORY_CAP_MB} MB")
+
+        print(f"🔵 Loading Whisper model: {model_size} ({backend}, CPU, ~{needed:.0f} MB)")
+        _whisper_models[key] = STT_BACKENDS[backend](model_size)
+        return _whisper_models[key]
 
-    return _whisper_model
 
 
 
@@ -86,11 +425,17 @@ def record_audio(seconds=3.0, sample_rate=16000):
     """
 
     Record mono audio using sounddevice and return raw int16 bytes.
+    If the shared audio bus is running, the next `seconds` of audio come from the bus
+    instead of opening the input device again (copied out: the ring buffer is overwritten later).
 
     """
 
     print(f"🎙 Recording {seconds}s ...")
 
+    bus = get_audio_bus()
+    if bus is not None:
+        return bus.record(seconds).tobytes()
+
     data = sd.rec(int(seconds * sample_rate), samplerate=sample_rate, channels=1, dtype="int16")
 
     sd.wait()
@@ -98,7 +443,395 @@ def record_audio(seconds=3.0, sample_rate=16000):
     return data.tobytes()
 
 
+def _frame_rms(frame: np.ndarray) -> float:
+    """RMS energy of an int16 frame (computed in float to avoid overflow)."""
+    if frame.size == 0:
+        return 0.0
+    samples = frame.astype(np.float32)
+    return float(np.sqrt(np.mean(samples * samples)))
+
+
+def _capture_frames(frame_len: int, max_frames: int, sample_rate=16000):
+    """
+    Yield up to `max_frames` int16 frames of `frame_len` samples.
+    Reads from the shared audio bus when it is running (zero-copy views),
+    otherwise from a dedicated InputStream.
+    """
+    bus = get_audio_bus()
+    if bus is not None:
+        reader = bus.reader()
+        for _ in range(max_frames):
+            yield reader.read(frame_len)
+        return
+
+    with sd.InputStream(samplerate=sample_rate, channels=1, dtype="int16", blocksize=frame_len) as stream:
+        for _ in range(max_frames):
+            block, _overflowed = stream.read(frame_len)
+            yield block[:, 0].copy()
+
+
+class _VadEndpointer:
+    """
+    Frame-by-frame VAD state machine shared by record_audio_vad and transcribe_streaming.
+    push(frame) returns True once the utterance has ended (or no speech started in time).
+    """
+
+    def __init__(self, max_seconds, silence_seconds=None, no_speech_seconds=None):
+        silence_seconds = VAD_END_SILENCE if silence_seconds is None else silence_seconds
+        no_speech_seconds = max_seconds if no_speech_seconds is None else min(no_speech_seconds, max_seconds)
+
+        self.no_speech_frames = int(no_speech_seconds * 1000 / VAD_FRAME_MS)
+        self.end_silence_frames = max(1, int(silence_seconds * 1000 / VAD_FRAME_MS))
+        self.min_speech_frames = max(1, int(VAD_MIN_SPEECH * 1000 / VAD_FRAME_MS))
+
+        self.pre_roll = deque(maxlen=max(1, int(VAD_PRE_ROLL * 1000 / VAD_FRAME_MS)))
+        self.captured = []
+        self.noise_floor = None
+        self.speech_frames = 0
+        self.silent_run = 0
+        self.in_speech = False
+        self.n_frames = 0
+
+    def push(self, frame: np.ndarray) -> bool:
+        self.n_frames += 1
+        rms = _frame_rms(frame)
+
+        # Adaptive noise floor: track quiet frames only, so speech doesn't raise it
+        global _noise_floor_estimate
+        if self.noise_floor is None:
+            self.noise_floor = rms
+        elif not self.in_speech:
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+            _noise_floor_estimate = self.noise_floor
+        threshold = max(VAD_MIN_RMS, self.noise_floor * VAD_SNR)
+        is_speech = rms >= threshold
+
+        if not self.in_speech:
+            self.pre_roll.append(frame)
+            if is_speech:
+                self.speech_frames += 1
+                if self.speech_frames >= self.min_speech_frames:
+                    self.in_speech = True
+                    self.captured.extend(self.pre_roll)
+                    self.pre_roll.clear()
+                    self.silent_run = 0
+                return False
+            self.speech_frames = 0
+            return self.n_frames >= self.no_speech_frames
+
+        self.captured.append(frame)
+        if is_speech:
+            self.silent_run = 0
+            return False
+        self.silent_run += 1
+        return self.silent_run >= self.end_silence_frames
+
+    def audio(self) -> np.ndarray:
+        """
+        Captured int16 audio (pre-roll + speech). Keeps a little of the trailing
+        silence (Whisper likes a short tail) but drops the rest.
+        """
+        if not self.captured:
+            return np.zeros(0, dtype=np.int16)
+        keep_tail = min(self.silent_run, max(1, self.end_silence_frames // 3))
+        frames = self.captured
+        if self.silent_run > keep_tail:
+            frames = frames[: len(frames) - (self.silent_run - keep_tail)]
+        return np.concatenate(frames)
+
+
+def record_audio_vad(max_seconds=10.0, sample_rate=16000, silence_seconds=None, no_speech_seconds=None):
+    """
+    Record mono audio from a continuous stream (InputStream or the shared audio bus)
+    and stop as soon as the speaker finishes (trailing silence), instead of always
+    blocking for the full window.
+
+    - max_seconds: hard upper bound on the capture length
+    - silence_seconds: trailing silence that ends the utterance (VAD_END_SILENCE if None)
+    - no_speech_seconds: give up if no speech starts within this time (max_seconds if None)
+
+    Returns raw int16 bytes (pre-roll + speech), or b"" if no speech was detected.
+    """
+    frame_len = int(sample_rate * VAD_FRAME_MS / 1000)
+    max_frames = int(max_seconds * 1000 / VAD_FRAME_MS)
+    endpointer = _VadEndpointer(max_seconds, silence_seconds, no_speech_seconds)
+
+    print(f"🎙 Listening (VAD, max {max_seconds}s) ...")
+    start = time.time()
+
+    for frame in _capture_frames(frame_len, max_frames, sample_rate):
+        if endpointer.push(frame):
+            break
+
+    if not endpointer.captured:
+        print(f"🎙 No speech detected ({time.time() - start:.1f}s)")
+        return b""
+
+    audio = endpointer.audio()
+    print(f"🎙 Captured {len(audio) / sample_rate:.1f}s of speech in {time.time() - start:.1f}s")
+    return audio.tobytes()
+
+
+def capture_audio(seconds, sample_rate=16000, use_vad=None):
+    """
+    Capture an utterance for STT.
+    - use_vad=True: VAD-gated streaming capture, `seconds` is the maximum duration
+    - use_vad=False: fixed-length recording of `seconds`
+    - use_vad=None: follow USE_VAD_CAPTURE
+    """
+    if use_vad is None:
+        use_vad = USE_VAD_CAPTURE
+    if use_vad:
+        return record_audio_vad(max_seconds=seconds, sample_rate=sample_rate)
+    return record_audio(seconds=seconds, sample_rate=sample_rate)
+
+
+
+
+
+def _needs_fallback(result: dict, policy: dict) -> bool:
+    """Same criteria as Whisper's internal fallback: repetitive output or low logprob (unless silence)."""
+    segments = result.get("segments", [])
+    if not segments:
+        return False
+
+    ratio_threshold = policy.get("compression_ratio_threshold")
+    if ratio_threshold is not None and any(seg.get("compression_ratio", 0.0) > ratio_threshold for seg in segments):
+        return True
+
+    logprob_threshold = policy.get("logprob_threshold")
+    if logprob_threshold is not None and _calculate_avg_logprob(result) < logprob_threshold:
+        no_speech_threshold = policy.get("no_speech_threshold")
+        is_silence = no_speech_threshold is not None and all(
+            seg.get("no_speech_prob", 0.0) > no_speech_threshold for seg in segments
+        )
+        return not is_silence
+
+    return False
+
+
+def _record_decode_stats(stats: dict):
+    _last_decode.stats = stats
+    with _decode_stats_lock:
+        totals = DECODE_STATS.setdefault(
+            stats["policy"], {"calls": 0, "passes": 0, "fallback_calls": 0, "budget_stops": 0}
+        )
+        totals["calls"] += 1
+        totals["passes"] += stats["passes"]
+        totals["fallback_calls"] += 1 if stats["passes"] > 1 else 0
+        totals["budget_stops"] += 1 if stats["budget_exhausted"] else 0
+
+
+def get_last_decode_stats():
+    """
+    Stats of the last decode on this thread: policy, passes, temperatures, seconds,
+    budget_exhausted, and the raw (pre-gating) text / language / avg_logprob.
+    """
+    return getattr(_last_decode, "stats", None)
+
+
+def _library_thresholds(policy: dict, logprob_name: str) -> dict:
+    """
+    Threshold arguments for the backend's transcribe(). With a single temperature per call the
+    library never re-decodes; the thresholds only decide whether a no-speech segment is dropped.
+    A None logprob threshold would drop confident speech too, so the library default is used then.
+    """
+    logprob_threshold = policy.get("logprob_threshold")
+    return {
+        "compression_ratio_threshold": policy.get("compression_ratio_threshold"),
+        logprob_name: WHISPER_DEFAULT_LOGPROB_THRESHOLD if logprob_threshold is None else logprob_threshold,
+        "no_speech_threshold": policy.get("no_speech_threshold"),
+    }
+
+
+def _decode_with_policy(model, np_audio: np.ndarray, language, policy=None, features=None, temperatures=None, **extra) -> dict:
+    """
+    Decode with an explicit temperature schedule and wall-clock budget.
+    Returns the first pass that needs no fallback, otherwise the most confident pass.
+    - temperatures: override the policy's schedule (used by re-decode)
+    - extra: passed to the backend (e.g. initial_prompt)
+    """
+    policy_name = policy or DEFAULT_DECODE_POLICY
+    pol = DECODE_POLICIES[policy_name]
+    budget = pol.get("budget_seconds")
+    schedule = pol["temperatures"] if temperatures is None else temperatures
+    if not schedule:
+        schedule = (0.0,)
+
+    start = time.perf_counter()
+    best = None
+    best_logprob = None
+    temperatures = []
+    budget_exhausted = False
+
+    for temperature in schedule:
+        elapsed = time.perf_counter() - start
+        if temperatures and budget is not None:
+            # Assume the next pass takes about as long as the average pass so far
+            if elapsed + elapsed / len(temperatures) > budget:
+                budget_exhausted = True
+                break
+
+        result = model.decode_pass(np_audio, language, temperature, pol, features=features, **extra)
+        temperatures.append(temperature)
+
+        logprob = _calculate_avg_logprob(result)
+        if best is None or logprob > best_logprob:
+            best, best_logprob = result, logprob
+
+        if not _needs_fallback(result, pol):
+            best, best_logprob = result, logprob
+            break
+
+    stats = {
+        "policy": policy_name,
+        "passes": len(temperatures),
+        "temperatures": temperatures,
+        "seconds": round(time.perf_counter() - start, 3),
+        "budget_exhausted": budget_exhausted,
+        "text": best.get("text", "").strip(),
+        "language": best.get("language", language),
+        "avg_logprob": best_logprob,
+    }
+    _record_decode_stats(stats)
+    if len(temperatures) > 1 or budget_exhausted:
+        print(f"🔁 Decode [{policy_name}] used {len(temperatures)} pass(es) {temperatures} in {stats['seconds']:.2f}s"
+              + (" (budget exhausted)" if budget_exhausted else ""))
+
+    best["decode_stats"] = stats
+    return best
+
+
+def _frame_rms_all(samples: np.ndarray, frame_len: int) -> np.ndarray:
+    """Per-frame RMS of an int16 buffer (vectorized; trailing partial frame ignored)."""
+    n_frames = len(samples) // frame_len
+    frames = samples[: n_frames * frame_len].reshape(n_frames, frame_len).astype(np.float32)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+def _voiced_frames(rms: np.ndarray, noise_floor=None) -> np.ndarray:
+    """
+    Indices of frames above the speech threshold: noise floor × VAD_SNR (never below PREPROC_MIN_RMS).
+    noise_floor: int16 RMS of the capture's background; None = this process's last endpointer estimate.
+    Not VAD_MIN_RMS: this runs before the AGC, so quiet speech must still count as speech.
+    (Not a percentile of the buffer either: a VAD-captured clip is almost all speech.)
+    """
+    if rms.size == 0:
+        return rms.astype(np.int64)
+    if noise_floor is None:
+        noise_floor = _noise_floor_estimate
+    threshold = PREPROC_MIN_RMS
+    if noise_floor is not None:
+        threshold = max(threshold, noise_floor * VAD_SNR)
+    return np.flatnonzero(rms >= threshold)
+
+
+def _trim_silence(audio, sample_rate=16000, noise_floor=None) -> np.ndarray:
+    """
+    Drop leading/trailing low-energy frames from an int16 buffer (keeps TRIM_MARGIN around speech).
+    Returns the (possibly unchanged) int16 array.
+    """
+    samples = _to_int16(audio)
+    frame_len = int(sample_rate * TRIM_FRAME_MS / 1000)
+    rms = _frame_rms_all(samples, frame_len)
+    voiced = _voiced_frames(rms, noise_floor)
+    if voiced.size == 0:
+        return samples
+
+    margin = int(TRIM_MARGIN * 1000 / TRIM_FRAME_MS)
+    first = max(0, voiced[0] - margin) * frame_len
+    last = min(len(rms), voiced[-1] + 1 + margin) * frame_len
+    return samples[first:last]
+
+
+def _highpass(np_audio: np.ndarray, sample_rate=16000) -> np.ndarray:
+    global _highpass_sos
+    if PREPROC_HIGHPASS_HZ <= 0:
+        return np_audio
+    from scipy.signal import butter, sosfilt
+
+    if _highpass_sos is None:
+        _highpass_sos = butter(2, PREPROC_HIGHPASS_HZ, btype="highpass", fs=sample_rate, output="sos")
+    return sosfilt(_highpass_sos, np_audio).astype(np.float32)
+
+
+def preprocess_audio(audio, sample_rate=16000, noise_floor=None):
+    """
+    int16 buffer → float32 Whisper input, with silence trim, high-pass and AGC.
+    noise_floor: background int16 RMS for the speech gate (see _voiced_frames)
+
+    Returns (np_audio, info). np_audio is None when the buffer has no speech energy,
+    in which case Whisper should not be called at all.
+    info: {"speech", "input_seconds", "trimmed_seconds", "gain"}
+    """
+    samples = _to_int16(audio)
+    input_seconds = len(samples) / sample_rate
+
+    if not USE_PREPROCESSING:
+        return samples.astype(np.float32) / 32768.0, {
+            "speech": True, "input_seconds": input_seconds, "trimmed_seconds": 0.0, "gain": 1.0,
+        }
+
+    # 1) Trim leading/trailing silence (on the int16 buffer, no copy)
+    trimmed = _trim_silence(samples, sample_rate, noise_floor)
+    frame_len = int(sample_rate * TRIM_FRAME_MS / 1000)
+    rms = _frame_rms_all(trimmed, frame_len)
+    voiced = _voiced_frames(rms, noise_floor)
+    voiced_seconds = voiced.size * TRIM_FRAME_MS / 1000
+
+    with _decode_stats_lock:
+        PREPROC_STATS["calls"] += 1
 
+    if voiced_seconds < PREPROC_MIN_VOICED_SECONDS:
+        with _decode_stats_lock:
+            PREPROC_STATS["skipped"] += 1
+        print(f"🔇 No speech energy in {input_seconds:.1f}s buffer - skipped Whisper")
+        return None, {"speech": False, "input_seconds": input_seconds, "trimmed_seconds": input_seconds, "gain": 1.0}
+
+    trimmed_seconds = input_seconds - len(trimmed) / sample_rate
+
+    # 2) Float conversion + high-pass
+    np_audio = _highpass(trimmed.astype(np.float32) / 32768.0, sample_rate)
+
+    # 3) AGC: bring voiced frames to the target level
+    voiced_rms = float(np.mean(rms[voiced])) / 32768.0
+    gain = float(np.clip(PREPROC_TARGET_RMS / max(voiced_rms, 1e-6), 1.0 / PREPROC_MAX_GAIN, PREPROC_MAX_GAIN))
+    np_audio = np.clip(np_audio * gain, -1.0, 1.0)
+
+    with _decode_stats_lock:
+        PREPROC_STATS["trimmed_seconds"] += trimmed_seconds
+    if trimmed_seconds >= 0.1:
+        print(f"✂️  Trimmed {trimmed_seconds:.1f}s of silence ({input_seconds:.1f}s → {len(trimmed) / sample_rate:.1f}s, gain x{gain:.1f})")
+
+    return np_audio.astype(np.float32, copy=False), {
+        "speech": True, "input_seconds": input_seconds, "trimmed_seconds": trimmed_seconds, "gain": gain,
+    }
+
+
+def detect_language(audio, sample_rate=16000):
+    """
+    Cheap language ID (no transcription).
+    Returns (language_code, probability), or (None, 0.0) for empty audio.
+    """
+    if not _has_audio(audio):
+        return None, 0.0
+    np_audio, _info = preprocess_audio(audio, sample_rate)
+    if np_audio is None:
+        return None, 0.0
+    language, probability, _features = load_whisper().detect_language(np_audio)
+    return language, probability
+
+
+def _has_audio(audio) -> bool:
+    """True for a non-empty bytes buffer or int16 array (audio bus views are arrays)."""
+    return audio is not None and len(audio) > 0
+
+
+def _to_int16(audio) -> np.ndarray:
+    """int16 samples from raw bytes or an int16 array, without copying."""
+    if isinstance(audio, np.ndarray):
+        return audio.astype(np.int16, copy=False).reshape(-1)
+    return np.frombuffer(audio, dtype=np.int16)
 
 
 def _is_valid_transcription(text: str) -> bool:
@@ -191,31 +924,42 @@ def _calculate_avg_logprob(result: dict) -> float:
     return -1.0
 
 
-def speech_to_text(audio_bytes: bytes, lang="en", sample_rate=16000, min_confidence=None):
+def speech_to_text(audio_bytes: bytes, lang="en", sample_rate=16000, min_confidence=None, policy=None,
+                   initial_prompt=None, temperatures=None, noise_floor=None):
 
     """
 
     Transcribe given audio bytes with Whisper (offline).
 
     Args:
-        audio_bytes: Audio data
+        audio_bytes: Audio data (raw int16 bytes or an int16 numpy array)
         lang: Language code
         sample_rate: Sample rate
         min_confidence: Minimum average logprob threshold (uses global MIN_AVG_LOGPROB if None)
+        policy: DECODE_POLICIES key ("wakeword", "inline", "question"); DEFAULT_DECODE_POLICY if None
+        initial_prompt: Vocabulary/context prompt for the decoder
+        temperatures: Override the policy's temperature schedule
+        noise_floor: Background int16 RMS of the capture (None = this process's VAD estimate)
 
     Returns:
         Transcribed text or None if quality checks fail
     """
 
-    if not audio_bytes:
+    if not _has_audio(audio_bytes):
 
         return None
 
 
 
-    model = load_whisper()
+    np_audio, _info = preprocess_audio(audio_bytes, sample_rate, noise_floor)
+
+    if np_audio is None:
+
+        return None
+
+
 
-    np_audio = np.frombuffer(audio_bytes, dtype=np.int16).astype(np.float32) / 32768.0
+    model = load_whisper(model_size=model_size_for_lang(lang))
 
 
 
@@ -225,7 +969,8 @@ def speech_to_text(audio_bytes: bytes, lang="en", sample_rate=16000, min_confide
 
     # Whisper accepts NumPy float32 PCM directly; avoids external ffmpeg dependency
 
-    result = model.transcribe(np_audio, language=language, fp16=False)
+    extra = {"initial_prompt": initial_prompt} if initial_prompt else {}
+    result = _decode_with_policy(model, np_audio, language, policy, temperatures=temperatures, **extra)
 
     text = result.get("text", "").strip()
     
@@ -264,7 +1009,8 @@ def speech_to_text(audio_bytes: bytes, lang="en", sample_rate=16000, min_confide
 
 
 
-def speech_to_text_with_lang(audio_bytes: bytes, sample_rate=16000, lang_hint=None, min_confidence=None):
+def speech_to_text_with_lang(audio_bytes: bytes, sample_rate=16000, lang_hint=None, min_confidence=None, policy="wakeword",
+                             noise_floor=None):
 
     """
 
@@ -272,24 +1018,41 @@ def speech_to_text_with_lang(audio_bytes: bytes, sample_rate=16000, lang_hint=No
 
     - lang_hint: use None or "auto" for detection; otherwise language code hint.
     - min_confidence: Minimum average logprob threshold
+    - policy: DECODE_POLICIES key (wakeword windows by default)
+    - noise_floor: background int16 RMS of the capture (None = this process's VAD estimate)
 
     """
 
-    if not audio_bytes:
+    if not _has_audio(audio_bytes):
 
         return None, None
 
 
 
-    model = load_whisper()
+    np_audio, _info = preprocess_audio(audio_bytes, sample_rate, noise_floor)
+
+    if np_audio is None:
+
+        return None, None
 
-    np_audio = np.frombuffer(audio_bytes, dtype=np.int16).astype(np.float32) / 32768.0
 
 
+    # Language detection needs the multilingual model; a known hint can use the per-language one
+    auto = lang_hint in (None, "auto")
+    model = load_whisper(model_size=WHISPER_MODEL_SIZE if auto else model_size_for_lang(lang_hint))
 
-    language = WHISPER_LANGS.get(lang_hint, lang_hint) if lang_hint not in (None, "auto") else None
 
-    result = model.transcribe(np_audio, language=language, fp16=False)
+
+    if not auto:
+        language = WHISPER_LANGS.get(lang_hint, lang_hint)
+        result = _decode_with_policy(model, np_audio, language, policy)
+    else:
+        # Detect first (encoder + 1 decoder step), transcribe only if the language is clear
+        detected, probability, features = model.detect_language(np_audio)
+        if probability < LANG_ID_MIN_PROB:
+            print(f"⚠️  Skipped transcription (language {detected} p={probability:.2f} < {LANG_ID_MIN_PROB:.2f})")
+            return None, detected
+        result = _decode_with_policy(model, np_audio, detected, policy, features=features)
 
     text = result.get("text", "").strip()
 
@@ -329,31 +1092,131 @@ def speech_to_text_with_lang(audio_bytes: bytes, sample_rate=16000, lang_hint=No
 
 
 
-def listen_for_seconds(lang="ko", seconds=10, max_retries=1):
+def _transcribe_captured(audio: bytes, lang="en", policy=None, **options):
+    """Transcribe a captured buffer in-process, or in the STT worker when USE_STT_WORKER is on."""
+    if USE_STT_WORKER:
+        # The worker has no endpointer of its own: send this process's noise floor with the audio
+        result = _worker_result(lambda worker: worker.submit(
+            audio, lang=lang, policy=policy, noise_floor=_noise_floor_estimate, **options))
+        if result is not _WORKER_FAILED:
+            return result
+    return speech_to_text(audio_bytes=audio, lang=lang, sample_rate=16000, policy=policy, **options)
+
+
+def transcribe_with_lang(audio, lang_hint=None, policy="wakeword"):
+    """
+    (text, detected_lang) for a captured buffer (bytes or int16 array), decoded in the STT worker
+    when USE_STT_WORKER is on so wakeword decodes do not hold the GIL against the tour thread.
+    """
+    if USE_STT_WORKER:
+        result = _worker_result(lambda worker: worker.submit_with_lang(
+            audio, lang_hint=lang_hint, policy=policy, noise_floor=_noise_floor_estimate))
+        if result is not _WORKER_FAILED:
+            return result
+    return speech_to_text_with_lang(audio_bytes=audio, sample_rate=16000, lang_hint=lang_hint, policy=policy)
+
+
+_WORKER_FAILED = object()
+
+
+def _worker_result(submit):
+    """
+    submit(worker) -> Future on the STT worker, waited with STT_WORKER_RESULT_TIMEOUT.
+    Returns _WORKER_FAILED when the worker is unavailable, died or timed out.
+    """
+    from stt_worker import get_stt_worker
+
+    worker = get_stt_worker()
+    if worker is None:
+        return _WORKER_FAILED
+    future = submit(worker)
+    try:
+        return future.result(timeout=STT_WORKER_RESULT_TIMEOUT)
+    except FutureTimeoutError:
+        future.cancel()
+        print(f"⚠️ STT worker did not answer in {STT_WORKER_RESULT_TIMEOUT:.0f}s, decoding in-process")
+    except RuntimeError as e:
+        print(f"⚠️ {e}, decoding in-process")
+    return _WORKER_FAILED
+
+
+def _vocabulary_prompt(lang: str) -> str:
+    """Decoder prompt listing the palace proper nouns in the visitor's language."""
+    if lang == "ko":
+        names = [spot["name_ko"] for spot in TOUR_ROUTE] + ["경복궁"]
+    else:
+        names = [name.capitalize() for name in PALACE_PROPER_NOUNS]
+    return ", ".join(names) + "."
+
+
+def _redecode(audio, lang="en", policy=None):
+    """
+    Re-decode a rejected buffer with the policy's "redecode" strategies, cheapest first.
+    Returns the first accepted transcript, or None if every strategy fails.
+    """
+    for strategy in DECODE_POLICIES[policy or DEFAULT_DECODE_POLICY].get("redecode", ()):
+        if strategy == "trim":
+            if USE_PREPROCESSING:
+                continue  # preprocess_audio already trimmed this buffer
+            trimmed = _trim_silence(audio)
+            if len(trimmed) >= len(_to_int16(audio)):
+                continue  # nothing to trim
+            print(f"🔁 Re-decoding trimmed audio ({len(trimmed) / 16000:.1f}s)")
+            text = _transcribe_captured(trimmed, lang=lang, policy=policy)
+        elif strategy == "prompt":
+            print("🔁 Re-decoding with palace vocabulary prompt")
+            text = _transcribe_captured(audio, lang=lang, policy=policy, initial_prompt=_vocabulary_prompt(lang))
+        elif strategy == "temperature":
+            print(f"🔁 Re-decoding at temperature {REDECODE_TEMPERATURE}")
+            text = _transcribe_captured(audio, lang=lang, policy=policy, temperatures=(REDECODE_TEMPERATURE,))
+        else:
+            continue
+        if text:
+            return text
+    return None
+
+
+
+
+
+def listen_for_seconds(lang="ko", seconds=10, max_retries=None, use_vad=None, policy=None):
 
     """
 
     Offline STT using Whisper.
 
-    - records for `seconds`, returns transcript or None.
-    - max_retries: Number of retries if transcription quality is low
+    - records up to `seconds` (stops early on trailing silence when VAD capture is on),
+      returns transcript or None.
+    - max_retries: Number of re-recordings if transcription quality is low
+      (the same buffer is re-decoded with the policy's "redecode" strategies before re-recording);
+      None = the policy's "max_retries"
+    - use_vad: override USE_VAD_CAPTURE for this call
+    - policy: decode policy ("wakeword", "inline", "question"); DEFAULT_DECODE_POLICY if None
 
     """
 
+    if max_retries is None:
+        max_retries = DECODE_POLICIES[policy or DEFAULT_DECODE_POLICY].get("max_retries", 0)
+
     for attempt in range(max_retries + 1):
-        audio = record_audio(seconds=seconds, sample_rate=16000)
+        audio = capture_audio(seconds, sample_rate=16000, use_vad=use_vad)
 
-        if not audio:
+        if not _has_audio(audio):
 
             print("⏳ STT timeout (no speech)")
 
             return None
 
-        result = speech_to_text(audio_bytes=audio, lang=lang, sample_rate=16000)
+        result = _transcribe_captured(audio, lang=lang, policy=policy)
         
         # If we got a valid result, return it
         if result:
             return result
+
+        # Re-decode the same buffer before asking the visitor to repeat
+        result = _redecode(audio, lang=lang, policy=policy)
+        if result:
+            return result
         
         # If this wasn't the last attempt, retry
         if attempt < max_retries:
@@ -368,20 +1231,178 @@ def listen_for_seconds(lang="ko", seconds=10, max_retries=1):
 
 
 
-def listen_for_seconds_with_lang(seconds=3):
+def listen_for_seconds_with_lang(seconds=3, use_vad=None, policy="wakeword"):
 
     """
 
-    Record audio and return (text, detected_language).
+    Record audio (up to `seconds` with VAD capture) and return (text, detected_language).
 
     """
 
-    audio = record_audio(seconds=seconds, sample_rate=16000)
+    audio = capture_audio(seconds, sample_rate=16000, use_vad=use_vad)
 
-    if not audio:
+    if not _has_audio(audio):
 
         print("⏳ STT timeout (no speech)")
 
         return None, None
 
-    return speech_to_text_with_lang(audio_bytes=audio, sample_rate=16000, lang_hint=None)
+    return transcribe_with_lang(audio, lang_hint=None, policy=policy)
+
+
+
+
+
+def _stream_tokens(text: str, lang) -> list:
+    if lang in STREAM_CHAR_LANGS:
+        return list(text.replace(" ", ""))
+    return text.split()
+
+
+def _join_tokens(tokens: list, lang) -> str:
+    return ("" if lang in STREAM_CHAR_LANGS else " ").join(tokens)
+
+
+def _common_prefix(a: list, b: list) -> list:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return a[:n]
+
+
+def transcribe_streaming(lang="en", max_seconds=10.0, step_ms=None, sample_rate=16000, policy="question"):
+
+    """
+
+    Incremental transcription while the visitor is still speaking.
+
+    Generator of hypothesis dicts:
+    - {"type": "partial", "committed": str, "tentative": str, "text": str}
+      emitted whenever the hypothesis changes; `committed` only ever grows
+    - {"type": "final", "text": str or None, "committed": str, "speech": bool}
+      emitted once after the endpoint, from a full-quality decode (same path as listen_for_seconds:
+      STT worker when USE_STT_WORKER, then _redecode if the transcript is rejected)
+
+    - policy: decode policy of the final pass (partials always use "stream")
+    Partials are decoded off the capture loop so endpointing never waits for them: in the
+    STT worker when USE_STT_WORKER is on (no second model in this process), otherwise on a
+    background thread.
+
+    """
+
+    step_seconds = (step_ms or STREAM_STEP_MS) / 1000
+    frame_len = int(sample_rate * VAD_FRAME_MS / 1000)
+    max_frames = int(max_seconds * 1000 / VAD_FRAME_MS)
+    endpointer = _VadEndpointer(max_seconds)
+
+    worker = None
+    if USE_STT_WORKER:
+        from stt_worker import get_stt_worker
+
+        worker = get_stt_worker()  # None = unavailable, decode partials in-process
+
+    committed = []
+    previous = []
+    last_decode = 0.0
+    pending = None  # Future of the partial decode in flight (at most one)
+
+    print(f"🎙 Listening (streaming, max {max_seconds}s) ...")
+
+    for frame in _capture_frames(frame_len, max_frames, sample_rate):
+        if endpointer.push(frame):
+            break
+
+        if pending is not None and pending.done():
+            try:
+                hypothesis = _stream_tokens(pending.result() or "", lang)
+            except Exception:
+                hypothesis = previous
+            pending = None
+
+            # LocalAgreement-2: commit what the last two hypotheses agree on
+            agreed = _common_prefix(previous, hypothesis)
+            if len(agreed) > len(committed) and agreed[: len(committed)] == committed:
+                committed = agreed
+            previous = hypothesis
+
+            tentative = hypothesis[len(committed):] if hypothesis[: len(committed)] == committed else []
+            yield {
+                "type": "partial",
+                "committed": _join_tokens(committed, lang),
+                "tentative": _join_tokens(tentative, lang),
+                "text": _join_tokens(committed + tentative, lang),
+            }
+
+        if not endpointer.in_speech or pending is not None:
+            continue
+
+        n_samples = len(endpointer.captured) * frame_len
+        now = time.monotonic()
+        # Time-based stepping; while a partial is still decoding no new one is started
+        if n_samples < STREAM_MIN_AUDIO * sample_rate or now - last_decode < step_seconds:
+            continue
+        last_decode = now
+
+        audio_so_far = np.concatenate(endpointer.captured)
+        if worker is not None:
+            pending = worker.submit_partial(audio_so_far, lang=lang)
+        else:
+            pending = _partial_pool.submit(decode_partial, audio_so_far, lang)
+
+    if pending is not None and worker is None:
+        # The in-process model is not safe to run from two threads at once: let the last partial finish
+        # (the worker runs requests in order, so the final pass simply queues behind it there)
+        futures_wait([pending])
+
+    if not endpointer.captured:
+        print("⏳ STT timeout (no speech)")
+        yield {"type": "final", "text": None, "committed": "", "speech": False}
+        return
+
+    audio = endpointer.audio()
+    final_text = _transcribe_captured(audio, lang=lang, policy=policy) or _redecode(audio, lang=lang, policy=policy)
+    yield {"type": "final", "text": final_text, "committed": _join_tokens(committed, lang), "speech": True}
+
+
+
+
+
+def decode_partial(audio, lang="en") -> str:
+    """
+    Raw "stream"-policy decode of the audio captured so far (no preprocessing or quality gates:
+    LocalAgreement needs every hypothesis). Returns the text ("" if nothing was decoded).
+    """
+    language = WHISPER_LANGS.get(lang, "en") if lang not in (None, "auto") else None
+    model = load_whisper(model_size=model_size_for_lang(lang))
+    np_audio = _to_int16(audio).astype(np.float32) / 32768.0
+    return _decode_with_policy(model, np_audio, language, "stream").get("text", "").strip()
+
+
+def listen_streaming(lang="en", seconds=10, on_partial=None, policy="question", max_retries=None):
+
+    """
+
+    Streaming counterpart of listen_for_seconds: returns the final transcript (or None)
+    and calls on_partial(hypothesis_dict) for every partial hypothesis.
+    - max_retries: like listen_for_seconds, re-record when speech was heard but every
+      decode (including _redecode) was rejected; retries use listen_for_seconds
+      (None = the policy's "max_retries")
+
+    """
+
+    if max_retries is None:
+        max_retries = DECODE_POLICIES[policy or DEFAULT_DECODE_POLICY].get("max_retries", 0)
+
+    for hyp in transcribe_streaming(lang=lang, max_seconds=seconds, policy=policy):
+        if hyp["type"] != "final":
+            if on_partial is not None:
+                on_partial(hyp)
+            continue
+        if hyp["text"] or not hyp["speech"] or max_retries <= 0:
+            return hyp["text"]
+        print("🔄 Retrying transcription (re-recording)...")
+        time.sleep(0.5)
+        return listen_for_seconds(lang=lang, seconds=seconds, max_retries=max_retries - 1, policy=policy)
+    return None
@@ -0,0 +1,273 @@
+# stt_worker.py
+"""
+전용 STT 워커 프로세스.
+
+Whisper 모델을 별도 프로세스에 한 번만 로드하고, 오디오는 공유 메모리 슬롯으로 전달한다.
+호출한 스레드는 Future를 받아 바로 다른 일(TTS 재생 등)을 계속할 수 있고,
+디코딩은 GIL/torch intra-op 스레드 경쟁 없이 워커 프로세스의 코어에서 돌아간다.
+
+사용 예:
+    from stt_worker import get_stt_worker
+    future = get_stt_worker().submit(audio_bytes, lang="en")
+    ...  # 다른 작업
+    text = future.result(timeout=30)
+
+워커 프로세스가 죽으면(OOM, 모델 로드 실패 ...) 대기 중인 Future는 모두 예외로 끝나고,
+get_stt_worker()는 None을 돌려주어 호출 측이 프로세스 안에서 디코딩하도록 한다.
+"""
+
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+STT_WORKER_SLOTS = 4  # Concurrent in-flight requests (one shared-memory buffer each)
+STT_WORKER_SLOT_SECONDS = 30.0  # Max audio length per request (Whisper window)
+STT_WORKER_TORCH_THREADS = 2  # torch intra-op threads inside the worker
+STT_WORKER_CPUS = None  # e.g. {4, 5, 6, 7} to pin the worker to dedicated cores (Linux only)
+STT_WORKER_START_TIMEOUT = 120.0  # Seconds to wait for the model to load at start-up
+STT_WORKER_POLL_SECONDS = 0.5  # How often the collector checks that the worker is still alive
+
+_SLOT_BYTES = int(STT_WORKER_SLOT_SECONDS * SAMPLE_RATE) * 2  # int16
+
+
+def _worker_main(request_q, response_q, shm_names, backend, model_size):
+    """Worker process entry point: load the model once, then serve requests until None arrives."""
+    if STT_WORKER_CPUS and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, STT_WORKER_CPUS)
+    try:
+        import torch
+
+        torch.set_num_threads(STT_WORKER_TORCH_THREADS)
+    except ImportError:
+        pass
+
+    import stt_service
+
+    stt_service.STT_BACKEND = backend
+    stt_service.WHISPER_MODEL_SIZE = model_size
+    try:
+        stt_service.load_whisper()
+    except Exception as e:
+        response_q.put(("load_error", None, repr(e)))
+        return
+
+    slots = [shared_memory.SharedMemory(name=name) for name in shm_names]
+    response_q.put(("ready", None, None))
+
+    while True:
+        request = request_q.get()
+        if request is None:
+            break
+        request_id, slot, nbytes, kind, kwargs = request
+        try:
+            # Copy out of the slot so the parent can reuse it as soon as we reply
+            audio_bytes = bytes(slots[slot].buf[:nbytes])
+            if kind == "with_lang":
+                result = stt_service.speech_to_text_with_lang(audio_bytes, **kwargs)
+            elif kind == "partial":
+                result = stt_service.decode_partial(audio_bytes, **kwargs)
+            else:
+                result = stt_service.speech_to_text(audio_bytes, **kwargs)
+            response_q.put((request_id, result, None))
+        except Exception as e:
+            response_q.put((request_id, None, repr(e)))
+
+    for shm in slots:
+        shm.close()
+
+
+class STTWorker:
+    """
+    Parent-side handle of the STT worker process.
+    submit() copies audio into a free shared-memory slot and returns a Future.
+    """
+
+    def __init__(self, backend=None, model_size=None):
+        import stt_service
+
+        # Spawned children re-import stt_service, so pass the parent's current selection along
+        backend = backend or stt_service.STT_BACKEND
+        model_size = model_size or stt_service.WHISPER_MODEL_SIZE
+
+        ctx = mp.get_context("spawn")  # torch is not fork-safe
+        self._slots = [shared_memory.SharedMemory(create=True, size=_SLOT_BYTES) for _ in range(STT_WORKER_SLOTS)]
+        self._free_slots = queue.Queue()
+        for i in range(STT_WORKER_SLOTS):
+            self._free_slots.put(i)
+
+        self._request_q = ctx.Queue()
+        self._response_q = ctx.Queue()
+        self._pending = {}  # request_id -> (future, slot)
+        self._pending_lock = threading.Lock()
+        self._ids = itertools.count()
+        self._ready = threading.Event()
+        self.error = None  # Set once the worker failed to load or exited
+
+        self._process = ctx.Process(
+            target=_worker_main,
+            args=(self._request_q, self._response_q, [s.name for s in self._slots], backend, model_size),
+            daemon=True,
+        )
+        self._process.start()
+
+        self._collector = threading.Thread(target=self._collect_results, daemon=True)
+        self._collector.start()
+
+    @property
+    def alive(self) -> bool:
+        return self.error is None and self._process.is_alive()
+
+    def _collect_results(self):
+        while True:
+            try:
+                request_id, result, error = self._response_q.get(timeout=STT_WORKER_POLL_SECONDS)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    self._fail_pending(f"STT worker exited (exit code {self._process.exitcode})")
+                    break
+                continue
+            if request_id == "ready":
+                self._ready.set()
+                continue
+            if request_id == "load_error":
+                self._fail_pending(f"STT worker failed to load the model: {error}")
+                break
+            if request_id is None:
+                break
+            with self._pending_lock:
+                future, slot = self._pending.pop(request_id)
+            self._free_slots.put(slot)
+            if future.cancelled():  # caller gave up waiting (timeout)
+                continue
+            if error:
+                future.set_exception(RuntimeError(f"STT worker error: {error}"))
+            else:
+                future.set_result(result)
+
+    def _fail_pending(self, message: str):
+        """Mark the worker dead and resolve every in-flight request with an error."""
+        if self.error is None:
+            self.error = message
+        self._ready.set()  # wake wait_ready(); it raises on self.error
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for future, slot in pending.values():
+            self._free_slots.put(slot)
+            if not future.done():
+                future.set_exception(RuntimeError(message))
+
+    def wait_ready(self, timeout=None) -> bool:
+        """
+        Block until the worker has loaded the model.
+        Returns False on timeout; raises RuntimeError if the worker failed to load or exited.
+        """
+        ready = self._ready.wait(timeout)
+        if self.error is not None:
+            raise RuntimeError(self.error)
+        return ready
+
+    def _submit(self, kind: str, audio, kwargs: dict) -> Future:
+        future = Future()
+        if self.error is not None:
+            future.set_exception(RuntimeError(self.error))
+            return future
+        # int16 numpy buffers are copied straight into shared memory (no intermediate bytes)
+        if isinstance(audio, np.ndarray):
+            data = memoryview(np.ascontiguousarray(audio, dtype=np.int16)).cast("B")
+        else:
+            data = memoryview(audio or b"")
+        if data.nbytes == 0:
+            future.set_result((None, None) if kind == "with_lang" else None)
+            return future
+        if data.nbytes > _SLOT_BYTES:
+            raise ValueError(f"Audio longer than {STT_WORKER_SLOT_SECONDS}s cannot be sent to the STT worker")
+
+        slot = self._free_slots.get()  # blocks if every slot is in flight
+        self._slots[slot].buf[: data.nbytes] = data
+        request_id = next(self._ids)
+        with self._pending_lock:
+            self._pending[request_id] = (future, slot)
+        self._request_q.put((request_id, slot, data.nbytes, kind, kwargs))
+        return future
+
+    def submit(self, audio, lang="en", min_confidence=None, policy=None, **options) -> Future:
+        """
+        Future resolving to speech_to_text(...) -> text or None.
+        audio: raw int16 bytes or an int16 numpy array.
+        options: extra speech_to_text arguments (initial_prompt, temperatures, noise_floor)
+        """
+        kwargs = {"lang": lang, "min_confidence": min_confidence, "policy": policy, **options}
+        return self._submit("text", audio, kwargs)
+
+    def submit_with_lang(self, audio, lang_hint=None, min_confidence=None, policy="wakeword", noise_floor=None) -> Future:
+        """Future resolving to speech_to_text_with_lang(...) -> (text, detected_lang)."""
+        return self._submit("with_lang", audio, {
+            "lang_hint": lang_hint, "min_confidence": min_confidence, "policy": policy, "noise_floor": noise_floor,
+        })
+
+    def submit_partial(self, audio, lang="en") -> Future:
+        """Future resolving to decode_partial(...) -> raw text of a streaming partial ("" if none)."""
+        return self._submit("partial", audio, {"lang": lang})
+
+    def shutdown(self, timeout=5.0):
+        self._request_q.put(None)
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._response_q.put((None, None, None))
+        self._fail_pending("STT worker shut down")
+        for shm in self._slots:
+            shm.close()
+            shm.unlink()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+_worker_failed = False
+
+
+def get_stt_worker():
+    """
+    Start (once) and return the shared STT worker, or None if it could not start or has died
+    (callers then decode in-process).
+    """
+    global _worker, _worker_failed
+    with _worker_lock:
+        if _worker_failed:
+            return None
+        if _worker is None:
+            print("🔵 Starting STT worker process ...")
+            _worker = STTWorker()
+            try:
+                if not _worker.wait_ready(STT_WORKER_START_TIMEOUT):
+                    raise RuntimeError(f"model not loaded after {STT_WORKER_START_TIMEOUT:.0f}s")
+            except RuntimeError as e:
+                print(f"⚠️ STT worker unavailable, decoding in-process: {e}")
+                _worker.shutdown()
+                _worker = None
+                _worker_failed = True
+                return None
+        if not _worker.alive:
+            print(f"⚠️ {_worker.error or 'STT worker exited'}, decoding in-process from now on")
+            _worker.shutdown()
+            _worker = None
+            _worker_failed = True
+            return None
+        return _worker
+
+
+def shutdown_stt_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is not None:
+            _worker.shutdown()
+            _worker = None
@@ -84,3 +84,15 @@ TOUR_ROUTE = [
         "name_th": "คยองฮเวรู",
     },
 ]
+
+
+# 궁궐 고유명사와 흔한 발음/표기 변형 (질문 정규화, STT 어휘 프롬프트에 사용)
+PALACE_PROPER_NOUNS = {
+    "gwanghwamun": ["gwanghwamun", "gwanghwa mun", "gwang hwa mun", "kwanghwamun", "kwanghwa mun"],
+    "heungnyemun": ["heungnyemun", "heung nye mun", "heungnye mun", "hungnyemun", "hung nye mun"],
+    "geunjeongmun": ["geunjeongmun", "geun jeong mun", "geunjeong mun", "keunjeongmun", "keun jeong mun"],
+    "geunjeongjeon": ["geunjeongjeon", "geun jeong jeon", "geunjeong jeon", "keunjeongjeon", "keun jeong jeon"],
+    "sujeongjeon": ["sujeongjeon", "su jeong jeon", "sujeong jeon", "sujeongjeon", "su jeong jeon"],
+    "gyeonghoeru": ["gyeonghoeru", "gyeong hoe ru", "gyeonghoe ru", "kyeonghoeru", "kyeong hoe ru"],
+    "gyeongbokgung": ["gyeongbokgung", "gyeongbok gung", "gyeong bok gung", "kyeongbokgung", "kyeongbok gung"],
+}
@@ -0,0 +1,349 @@
+# tts_benchmark.py
+"""
+TTS 지연/처리량 벤치마크.
+
+1) tour : 실제 투어 흐름(도착 멘트 speak → 스팟 스크립트 speak_sequence → 이동 대기)을 재생해서
+          스팟마다 첫 소리까지 시간(time-to-first-sound), 문장 사이 공백, 문장 안 끊김(underrun)을 측정
+2) load : 로봇 N대가 같은 API 키로 동시에 _speak_single_chunk를 반복 호출 →
+          처리량(문장/s, 글자/s, 오디오 s/s), TTFS p50/p95, 건너뛴 문장(429 / quota) 측정
+
+기본은 프로세스 안에서 mock_elevenlabs_server를 띄워서 크레딧 없이 돌린다 (--live: 실제 API, 크레딧 소모).
+소리는 장치 대신 실시간으로 "재생"되는 null 출력에 쓰므로 사운드 장치 없이도 돌아간다.
+디스크 캐시와 오디오 팩은 끈다 (합성 경로 자체를 측정).
+
+사용 예:
+    python tts_benchmark.py tour --lang en --spots 3
+    python tts_benchmark.py load --robots 4 --utterances 20 --max-concurrent 3
+    python tts_benchmark.py tour --mode download --latency 1.0 --realtime 2
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+import tts_service
+from mock_elevenlabs_server import MockConfig, start_mock_server
+
+NULL_OUTPUT_RATES = (16000, 22050, 24000, 44100)
+
+# Sentences for the load test (unless --script is given)
+SAMPLE_SENTENCES = [
+    "Welcome to Gyeongbokgung, the main royal palace of the Joseon dynasty.",
+    "It was first built in 1395, three years after the dynasty was founded.",
+    "The name means the palace greatly blessed by heaven.",
+    "Most of the buildings were burned down during the Japanese invasions in 1592.",
+    "They were restored in the 1860s under the regent Heungseon Daewongun.",
+    "Please follow me to the throne hall, Geunjeongjeon.",
+]
+
+
+class _Timeline:
+    """Playback log shared by all null outputs: per-thread audio intervals and end-of-utterance marks."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.until = {}  # thread id -> time its queued audio finishes
+        self.events = {}  # thread id -> [("audio", start, end) | ("mark", time)]
+        self.pending = []
+
+    def log(self, tid=None) -> list:
+        with self.lock:
+            return list(self.events.get(tid or threading.get_ident(), []))
+
+
+class _NullOutput:
+    """
+    Stand-in for tts_service.PcmOutput: audio "plays" in real time without a device.
+    Each thread has its own timeline (= one robot's speaker).
+    """
+
+    latency = 0.0
+
+    def __init__(self, sample_rate: int, timeline: _Timeline):
+        self.sample_rate = sample_rate
+        self.timeline = timeline
+
+    def write(self, pcm: bytes):
+        if not pcm:
+            return
+        tl = self.timeline
+        tid = threading.get_ident()
+        now = time.perf_counter()
+        with tl.lock:
+            start = max(now, tl.until.get(tid, 0.0))
+            end = start + len(pcm) / 2 / self.sample_rate
+            tl.until[tid] = end
+            tl.events.setdefault(tid, []).append(("audio", start, end))
+
+    def mark(self) -> threading.Event:
+        tl = self.timeline
+        tid = threading.get_ident()
+        event = threading.Event()
+        with tl.lock:
+            done_at = max(time.perf_counter(), tl.until.get(tid, 0.0))
+            tl.events.setdefault(tid, []).append(("mark", done_at))
+            delay = done_at - time.perf_counter()
+            if delay > 0:
+                timer = threading.Timer(delay, event.set)
+                timer.daemon = True
+                timer.start()
+                tl.pending.append(event)
+            else:
+                event.set()
+        return event
+
+    def play(self, pcm: bytes) -> threading.Event:
+        self.write(pcm)
+        return self.mark()
+
+    def clear(self):
+        tl = self.timeline
+        with tl.lock:
+            tl.until[threading.get_ident()] = time.perf_counter()
+            pending, tl.pending = tl.pending, []
+        for event in pending:
+            event.set()
+
+
+def _utterances(events: list) -> list[dict]:
+    """Split a thread's playback log into utterances (audio up to each mark)."""
+    result = []
+    current = []
+    for event in events:
+        if event[0] == "audio":
+            current.append(event)
+            continue
+        if current:
+            stalls = sum(max(0.0, b[1] - a[2]) for a, b in zip(current, current[1:]))
+            result.append({"start": current[0][1], "end": current[-1][2], "stall_seconds": stalls})
+        current = []
+    return result
+
+
+def _p(values, q):
+    return round(float(np.percentile(values, q)), 3) if len(values) else None
+
+
+def setup(args) -> tuple:
+    """Point tts_service at the mock (or live API), disable cache / pack, install null outputs."""
+    tts_service.USE_TTS_CACHE = False
+    tts_service._audio_pack = False
+    tts_service.TTS_ENGINE = "cloud"
+    tts_service.USE_STREAMING_TTS = args.mode == "stream"
+
+    server = None
+    if not args.live:
+        config = MockConfig(args.latency, args.jitter, args.realtime, args.chars_per_sec,
+                            args.quota_chars, args.max_concurrent, args.rate_limit_prob)
+        server = start_mock_server(config=config)
+        tts_service.ELEVENLABS_API_URL = server.base_url + "/v1/text-to-speech/{voice_id}"
+        tts_service.ELEVENLABS_STREAM_URL = tts_service.ELEVENLABS_API_URL + "/stream"
+        os.environ.setdefault("ELEVENLABS_API_KEY", "mock")
+
+    timeline = _Timeline()
+    with tts_service._pcm_outputs_lock:
+        for rate in NULL_OUTPUT_RATES:
+            tts_service._pcm_outputs[rate] = _NullOutput(rate, timeline)
+    tts_service.TTS_LATENCY_LOG.clear()
+    tts_service.TTS_HTTP_TIMINGS.clear()
+    return server, timeline
+
+
+def load_tour_script(path, lang: str, spots: int) -> list[list[str]]:
+    """[[sentence, ...] per spot]; --script file: one sentence per line, blank line between spots."""
+    if path:
+        with open(path, encoding="utf-8") as f:
+            blocks = [b for b in f.read().split("\n\n") if b.strip()]
+        script = [[line.strip() for line in b.splitlines() if line.strip()] for b in blocks]
+    else:
+        from main_tour_loop import PHRASES, SPOT_SCRIPTS
+        from tour_route import TOUR_ROUTE
+
+        arrived = PHRASES["arrived"].get(lang, PHRASES["arrived"]["en"])
+        scripts = SPOT_SCRIPTS.get(lang, SPOT_SCRIPTS["en"])
+        script = [
+            [arrived.format(spot_name=spot.get(f"name_{lang}", spot["name_en"]))] + scripts[spot["spot_code"]]
+            for spot in TOUR_ROUTE
+            if spot["spot_code"] in scripts
+        ]
+    return script[:spots]
+
+
+def run_tour(script: list, lang: str, timeline: _Timeline, pause: float, walk_seconds: float) -> dict:
+    """Arrival phrase with speak(), the rest with speak_sequence(), like run_spot_intro()."""
+    spots = []
+    playback_tid = None
+    for sentences in script:
+        t0 = time.perf_counter()
+        tts_service.speak(sentences[0], lang)
+        tts_service.speak_sequence(sentences[1:], lang, pause=pause)
+        t1 = time.perf_counter()
+        playback_tid = playback_tid or tts_service._playback_thread.ident
+        utterances = [u for u in _utterances(timeline.log(playback_tid)) if t0 <= u["start"] <= t1]
+        gaps = [b["start"] - a["end"] for a, b in zip(utterances, utterances[1:])]
+        spots.append({
+            "sentences": len(sentences),
+            "played": len(utterances),
+            "ttfs": round(utterances[0]["start"] - t0, 3) if utterances else None,
+            "gaps": [round(g, 3) for g in gaps],
+            "stall_seconds": round(sum(u["stall_seconds"] for u in utterances), 3),
+            "wall_seconds": round(t1 - t0, 2),
+        })
+        s = spots[-1]
+        print(f"  spot {len(spots)}: {s['played']}/{s['sentences']} played, TTFS {s['ttfs']}s, "
+              f"gaps {s['gaps']}, stalls {s['stall_seconds']}s")
+        time.sleep(walk_seconds)
+
+    ttfs = [s["ttfs"] for s in spots if s["ttfs"] is not None]
+    gaps = [g for s in spots for g in s["gaps"]]
+    return {
+        "spots": spots,
+        "summary": {
+            "ttfs_p50": _p(ttfs, 50),
+            "ttfs_max": round(max(ttfs), 3) if ttfs else None,
+            "gap_p50": _p(gaps, 50),
+            "gap_p95": _p(gaps, 95),
+            "gap_max": round(max(gaps), 3) if gaps else None,
+            "intended_pause": pause,
+            "stall_seconds": round(sum(s["stall_seconds"] for s in spots), 3),
+            "skipped": sum(s["sentences"] - s["played"] for s in spots),
+        },
+    }
+
+
+def run_load(sentences: list, lang: str, timeline: _Timeline, robots: int, utterances: int) -> dict:
+    """`robots` threads each speak `utterances` sentences back to back through _speak_single_chunk."""
+    results = []
+    results_lock = threading.Lock()
+
+    def robot(index):
+        tid = threading.get_ident()
+        for i in range(utterances):
+            text = sentences[(index + i) % len(sentences)]
+            seen = len(timeline.log(tid))
+            t0 = time.perf_counter()
+            tts_service._speak_single_chunk(text, lang, 1.0, 0.0)
+            t1 = time.perf_counter()
+            audio = [e for e in timeline.log(tid)[seen:] if e[0] == "audio"]
+            with results_lock:
+                results.append({
+                    "robot": index,
+                    "chars": len(text),
+                    "played": bool(audio),
+                    "ttfs": audio[0][1] - t0 if audio else None,
+                    "audio_seconds": sum(e[2] - e[1] for e in audio),
+                    "wall_seconds": t1 - t0,
+                })
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=robot, args=(i,), name=f"robot-{i}") for i in range(robots)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    played = [r for r in results if r["played"]]
+    ttfs = [r["ttfs"] for r in played]
+    return {
+        "robots": robots,
+        "utterances_per_robot": utterances,
+        "summary": {
+            "wall_seconds": round(wall, 2),
+            "utterances": len(results),
+            "played": len(played),
+            "skipped": len(results) - len(played),
+            "utterances_per_second": round(len(played) / wall, 3),
+            "chars_per_second": round(sum(r["chars"] for r in played) / wall, 1),
+            "audio_seconds_per_second": round(sum(r["audio_seconds"] for r in played) / wall, 3),
+            "ttfs_p50": _p(ttfs, 50),
+            "ttfs_p95": _p(ttfs, 95),
+            "ttfs_max": round(max(ttfs), 3) if ttfs else None,
+        },
+    }
+
+
+def _save(report: dict, server, out: str):
+    report["latency_by_source"] = tts_service.get_tts_latency_stats()
+    report["http"] = tts_service.get_tts_http_stats()
+    if server is not None:
+        report["mock_server"] = server.get_stats()
+        print(f"   mock server: {report['mock_server']}")
+    report["created_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Report saved to {out}")
+
+
+def _run_tour(args):
+    server, timeline = setup(args)
+    script = load_tour_script(args.script, args.lang, args.spots)
+    print(f"📥 {len(script)} spots, {sum(map(len, script))} sentences ({args.lang}, {args.mode}, "
+          f"{'live API' if args.live else server.base_url})")
+    report = run_tour(script, args.lang, timeline, args.pause, args.walk_seconds)
+    s = report["summary"]
+    print(f"\n   TTFS p50 {s['ttfs_p50']}s max {s['ttfs_max']}s  gaps p50 {s['gap_p50']}s p95 {s['gap_p95']}s "
+          f"(pause {s['intended_pause']}s)  stalls {s['stall_seconds']}s  skipped {s['skipped']}")
+    report.update(command="tour", mode=args.mode, lang=args.lang)
+    _save(report, server, args.out)
+
+
+def _run_load(args):
+    server, timeline = setup(args)
+    sentences = SAMPLE_SENTENCES
+    if args.script:
+        sentences = [s for spot in load_tour_script(args.script, args.lang, None) for s in spot]
+    print(f"📥 {args.robots} robots × {args.utterances} utterances ({args.mode}, "
+          f"{'live API' if args.live else server.base_url})")
+    report = run_load(sentences, args.lang, timeline, args.robots, args.utterances)
+    s = report["summary"]
+    print(f"\n   {s['played']}/{s['utterances']} played in {s['wall_seconds']}s  "
+          f"{s['utterances_per_second']} utt/s  {s['chars_per_second']} chars/s  "
+          f"{s['audio_seconds_per_second']} audio s/s  TTFS p50 {s['ttfs_p50']}s p95 {s['ttfs_p95']}s")
+    report.update(command="load", mode=args.mode, lang=args.lang)
+    _save(report, server, args.out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS latency / throughput benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(p, out):
+        p.add_argument("--lang", default="en")
+        p.add_argument("--script", default=None, help="UTF-8 file: one sentence per line, blank line between spots")
+        p.add_argument("--mode", choices=["stream", "download"], default="stream",
+                       help="/stream endpoint or whole-body requests (USE_STREAMING_TTS)")
+        p.add_argument("--live", action="store_true", help="use the real ElevenLabs API (costs credits)")
+        p.add_argument("--latency", type=float, default=0.3, help="mock: seconds to first byte")
+        p.add_argument("--jitter", type=float, default=0.1, help="mock: latency jitter (s)")
+        p.add_argument("--realtime", type=float, default=4.0, help="mock: audio generation speed vs. playback")
+        p.add_argument("--chars-per-sec", type=float, default=15.0, help="mock: speech rate")
+        p.add_argument("--quota-chars", type=int, default=None, help="mock: 401 quota_exceeded after N chars")
+        p.add_argument("--max-concurrent", type=int, default=None, help="mock: 429 above N requests in flight")
+        p.add_argument("--rate-limit-prob", type=float, default=0.0, help="mock: random 429 probability")
+        p.add_argument("--out", default=out)
+
+    tour = sub.add_parser("tour", help="spot intros at tour cadence: time-to-first-sound and sentence gaps")
+    add_common(tour, "tts_bench_tour.json")
+    tour.add_argument("--spots", type=int, default=3)
+    tour.add_argument("--pause", type=float, default=tts_service.TTS_SENTENCE_PAUSE)
+    tour.add_argument("--walk-seconds", type=float, default=1.0, help="idle time between spots")
+
+    load = sub.add_parser("load", help="concurrent robots sharing one API key: throughput and TTFS")
+    add_common(load, "tts_bench_load.json")
+    load.add_argument("--robots", type=int, default=4)
+    load.add_argument("--utterances", type=int, default=10, help="sentences per robot")
+
+    args = parser.parse_args()
+    if args.command == "tour":
+        _run_tour(args)
+    else:
+        _run_load(args)
+
+
+if __name__ == "__main__":
+    main()
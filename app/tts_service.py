@@ -1,10 +1,23 @@
 # tts_service.py
+import hashlib
 import io
+import json
 import os
+import queue
+import random
 import re
+import tempfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import requests
 import pygame
+import sounddevice as sd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # ===== ElevenLabs Voice IDs =====
 ELEVENLABS_VOICES = {
@@ -19,8 +32,112 @@ ELEVENLABS_VOICES = {
     "th": "nBoLwpO4PAjQaQwVKPI1",
 }
 
-# ElevenLabs API endpoint
-ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+# ElevenLabs API endpoint (ELEVENLABS_BASE_URL points it elsewhere, e.g. mock_elevenlabs_server.py)
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io").rstrip("/")
+ELEVENLABS_API_URL = ELEVENLABS_BASE_URL + "/v1/text-to-speech/{voice_id}"
+ELEVENLABS_STREAM_URL = ELEVENLABS_API_URL + "/stream"
+
+# ElevenLabs API 파라미터 - Consistent settings for all TTS calls
+ELEVENLABS_MODEL_ID = "eleven_multilingual_v2"  # 다국어 지원 모델
+ELEVENLABS_VOICE_SETTINGS = {
+    "stability": 0.5,  # Consistent stability
+    "similarity_boost": 0.75,  # Consistent similarity
+    "style": 0.0,  # Consistent style
+    "use_speaker_boost": True  # Always use speaker boost for maximum clarity
+}
+
+# ===== 디스크 캐시 =====
+# 같은 (text, lang, voice_id, model_id, voice_settings)는 한 번만 합성하고 이후 로컬 파일에서 재생.
+# PHRASES / SPOT_SCRIPTS 같은 고정 문장은 투어마다 반복되므로 두 번째부터 네트워크 왕복이 없다.
+USE_TTS_CACHE = True
+TTS_CACHE_DIR = "tts_cache"
+TTS_CACHE_MAX_BYTES = 500 * 1024 * 1024  # Least recently played files are evicted above this
+
+TTS_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0}
+_cache_lock = threading.Lock()
+_cache_bytes = None  # Total size on disk, scanned on first use
+
+# ===== 사전 렌더링 오디오 팩 (04_prerender_tour_audio.py로 생성) =====
+# 고정 멘트 전체를 디코딩된 PCM 하나(.bin) + 인덱스(.json)로 저장하고 np.memmap으로 열어 바로 재생
+TTS_AUDIO_PACK = "tour_audio_pack"  # <name>.bin (int16 mono PCM) + <name>.json (index)
+TTS_PACK_FORMAT = "pcm_22050"  # ElevenLabs output_format used for the pack
+_audio_pack = None  # (entries, memmap, sample_rate); False once we know there is no pack
+
+# ===== 스트리밍 재생 =====
+# /stream 엔드포인트에서 PCM 청크가 도착하는 대로 출력 스트림에 써서, 답변 길이와 상관없이
+# 첫 청크에서 소리가 나기 시작한다. (PCM이라 MP3 증분 디코딩이 필요 없음)
+USE_STREAMING_TTS = True
+TTS_STREAM_FORMAT = "pcm_22050"
+TTS_STREAM_CHUNK_BYTES = 4096
+
+# ===== 출력 포맷 / 지속 출력 스트림 =====
+# MP3를 받아 문장마다 pygame으로 디코딩하지 않고 PCM을 받아서, 계속 열려 있는 sounddevice
+# 출력 스트림에 바로 쓴다. 재생 완료는 100ms 폴링 대신 오디오 콜백이 이벤트로 알려준다.
+TTS_OUTPUT_FORMAT = "pcm_22050"  # Non-streaming requests; "mp3" = legacy pygame playback
+TTS_OUTPUT_BLOCKSIZE = 512  # Frames per audio callback (~23 ms at 22.05 kHz)
+TTS_MARK_TIMEOUT_MARGIN = 2.0  # A mark not reached this long after its audio should have ended = stalled output
+
+_pcm_outputs = {}  # sample_rate -> PcmOutput
+_pcm_outputs_lock = threading.Lock()
+
+TTS_LATENCY_LOG = deque(maxlen=200)  # Per-utterance timings, see get_tts_latency_stats()
+
+# ===== HTTP 세션 (keep-alive + 커넥션 풀 + 재시도) =====
+# 문장마다 DNS/TCP/TLS를 새로 맺지 않도록 모듈 전역 세션 하나를 모든 스레드가 공유한다.
+TTS_HTTP_POOL_SIZE = 8  # Kept-alive connections to api.elevenlabs.io (>= concurrent synth threads)
+TTS_CONNECT_TIMEOUT = 3.05  # Seconds to establish a connection
+TTS_READ_TIMEOUT = 30  # Seconds between bytes of the response
+TTS_RETRY_TOTAL = 3  # Retries for 429 / 5xx / connection errors (never for read timeouts)
+TTS_RETRY_BACKOFF = 0.5  # Base of the exponential backoff (s), jittered; Retry-After wins when sent
+TTS_RETRY_STATUS = (429, 500, 502, 503, 504)
+
+TTS_HTTP_TIMINGS = deque(maxlen=200)  # Per-request timings, see get_tts_http_stats()
+TTS_REQUEST_HOOKS = []  # Extra callables(timing dict) called after every ElevenLabs response
+
+_session = None
+_session_lock = threading.Lock()
+_api_key = None
+
+# ===== 선합성(synthesis-ahead) 재생 큐 =====
+# 여러 문장을 말할 때, 지금 문장이 재생되는 동안 다음 문장들을 미리 합성해 둔다.
+TTS_LOOKAHEAD = 2  # Sentences synthesized ahead of the one playing (also the worker count)
+TTS_SENTENCE_PAUSE = 0.3  # Intended pause between sentences (s)
+
+_synth_pool = ThreadPoolExecutor(max_workers=TTS_LOOKAHEAD, thread_name_prefix="tts-synth")
+
+# ===== TTS 엔진 선택 (클라우드 ElevenLabs / 로컬 Piper) =====
+# 공원 Wi-Fi가 느리면 문장마다 네트워크를 기다리지 않고 CPU 로컬 음성으로 바로 말한다.
+TTS_ENGINE = "auto"  # "auto" (latency-based), "cloud" or "local"
+TTS_CLOUD_MAX_LATENCY = 1.5  # Cloud time-to-first-sound (EWMA, s) above this → local voice
+TTS_CLOUD_PROBE_SECONDS = 30.0  # While on the local voice, retry the cloud this often
+TTS_LATENCY_EWMA_ALPHA = 0.3
+
+# Piper ONNX voices (https://github.com/rhasspy/piper) per ELEVENLABS_VOICES language.
+# None = no public Piper voice for that language yet; a custom-trained .onnx can be dropped in.
+PIPER_VOICE_DIR = "piper_voices"  # <voice>.onnx + <voice>.onnx.json
+PIPER_VOICES = {
+    "ko": None,
+    "en": "en_US-lessac-medium.onnx",
+    "zh": "zh_CN-huayan-medium.onnx",
+    "ja": None,
+    "fr": "fr_FR-siwis-medium.onnx",
+    "es": "es_ES-davefx-medium.onnx",
+    "vi": "vi_VN-vais1000-medium.onnx",
+    "th": None,
+}
+
+_local_voices = {}  # lang -> PiperEngine or None
+_local_voices_lock = threading.Lock()
+_cloud_ttfs_ewma = None
+_last_cloud_attempt = 0.0
+
+# ===== 비동기 재생 (speak_async) =====
+# 모든 재생은 하나의 재생 스레드가 큐 순서대로 처리한다 (소리가 겹치지 않음).
+_playback_queue = queue.Queue()
+_playback_thread = None
+_playback_lock = threading.Lock()
+_active_handle = None  # Handle whose audio is playing right now
+_active_lock = threading.Lock()  # Held by cancel() and while an output is started (no cancel can slip in between)
 
 
 def get_voice_id(lang):
@@ -29,16 +146,88 @@ def get_voice_id(lang):
 
 
 def get_api_key():
-    """Get ElevenLabs API key from environment variable."""
+    """Get ElevenLabs API key from environment variable (read once, then cached)."""
+    global _api_key
+    if _api_key:
+        return _api_key
     api_key = os.getenv("ELEVENLABS_API_KEY")
     if not api_key:
         raise ValueError(
             "ELEVENLABS_API_KEY environment variable is not set. "
             "Please set it with your ElevenLabs API key."
         )
+    _api_key = api_key
     return api_key
 
 
+class _JitterRetry(Retry):
+    """urllib3 Retry whose exponential backoff is jittered (spreads out retries after a 429)."""
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return random.uniform(0.5, 1.0) * backoff if backoff else 0
+
+
+def _timing_hook(response, *args, **kwargs):
+    """requests response hook: time to response headers, status and retries per request."""
+    retries = getattr(getattr(response.raw, "retries", None), "history", ()) or ()
+    timing = {
+        "path": response.request.path_url.split("?")[0],
+        "status": response.status_code,
+        "elapsed": round(response.elapsed.total_seconds(), 4),
+        "retries": len(retries),
+        "time": time.time(),
+    }
+    TTS_HTTP_TIMINGS.append(timing)
+    for hook in TTS_REQUEST_HOOKS:
+        try:
+            hook(timing)
+        except Exception:
+            pass
+
+
+def get_http_session() -> requests.Session:
+    """
+    Shared keep-alive session for ElevenLabs (created once).
+    The session is never mutated after creation, so threads can share it; the
+    adapter's pool hands each concurrent request its own connection.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = _JitterRetry(
+                total=TTS_RETRY_TOTAL,
+                read=0,  # A read timeout is a stalled synthesis: retrying would stall playback again
+                status_forcelist=TTS_RETRY_STATUS,
+                allowed_methods=frozenset({"POST"}),  # TTS POSTs are idempotent
+                backoff_factor=TTS_RETRY_BACKOFF,
+                respect_retry_after_header=True,
+                raise_on_status=False,  # Hand the last 429/5xx back to raise_for_status()
+            )
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=TTS_HTTP_POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.hooks["response"].append(_timing_hook)
+            _session = session
+        return _session
+
+
+def get_tts_http_stats() -> dict:
+    """Request count, p50/p95 time to headers, error count and total retries."""
+    timings = list(TTS_HTTP_TIMINGS)
+    if not timings:
+        return {"requests": 0}
+    elapsed = sorted(t["elapsed"] for t in timings)
+    return {
+        "requests": len(timings),
+        "elapsed_p50": elapsed[len(elapsed) // 2],
+        "elapsed_p95": elapsed[min(len(elapsed) - 1, int(len(elapsed) * 0.95))],
+        "errors": sum(1 for t in timings if t["status"] >= 400),
+        "retries": sum(t["retries"] for t in timings),
+    }
+
+
 # ElevenLabs credit calculation: ~0.15-0.18 credits per character for multilingual_v2
 CREDITS_PER_CHAR = 0.17  # Average estimate
 MAX_CHARS_PER_REQUEST = 5000  # ElevenLabs multilingual_v2 limit
@@ -103,12 +292,23 @@ def _estimate_credits_needed(text: str) -> float:
 # ===== TTS 메인 함수 =====
 def speak(text: str, lang="ko", speaking_rate=1.0, pitch=0.0):
     """
-    ElevenLabs TTS 기반 음성 출력
+    ElevenLabs TTS 기반 음성 출력 (재생이 끝날 때까지 블로킹)
     - text: 말할 내용 (자동으로 긴 텍스트는 청크로 분할)
     - lang: 언어 코드 (ko, en 등)
     - speaking_rate: 말 속도 (0.25 ~ 4.0, 기본 1.0)
     - pitch: 음 높낮이 (ElevenLabs는 stability와 similarity_preset 사용)
+    speak_async(...).wait()와 같다. 재생 스레드 안에서 부르면 그 자리에서 재생한다.
     """
+    if not text or text.strip() == "":
+        return
+    if _on_playback_thread():
+        _speak_blocking(text, lang, speaking_rate, pitch)
+        return
+    speak_async(text, lang, speaking_rate, pitch).result()
+
+
+def _speak_blocking(text: str, lang: str, speaking_rate: float, pitch: float):
+    """Synthesize and play `text` on the calling thread (the playback thread)."""
     if not text or text.strip() == "":
         return
 
@@ -119,49 +319,194 @@ def speak(text: str, lang="ko", speaking_rate=1.0, pitch=0.0):
     if char_count > SAFE_CHUNK_SIZE:
         chunks = _chunk_text_intelligently(text, SAFE_CHUNK_SIZE)
         
-        # Process each chunk sequentially (silently, like before)
-        for chunk in chunks:
-            _speak_single_chunk(chunk, lang, speaking_rate, pitch)
-            # Small delay between chunks for natural speech flow
-            time.sleep(0.3)
+        # Next chunks are synthesized while the current one plays; small pause between chunks
+        _speak_sequence_blocking(chunks, lang, TTS_SENTENCE_PAUSE)
         return
     
     # For normal texts, call directly
     _speak_single_chunk(text, lang, speaking_rate, pitch)
 
 
-def _speak_single_chunk(text: str, lang: str, speaking_rate: float, pitch: float):
+def _cache_key(text: str, lang: str, voice_id: str, model_id: str, voice_settings: dict, output_format="mp3") -> str:
+    payload = json.dumps(
+        [text, lang, voice_id, model_id, voice_settings, output_format], sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_path(key: str, output_format="mp3") -> str:
+    return os.path.join(TTS_CACHE_DIR, f"{key}.{output_format}")
+
+
+def _scan_cache_bytes() -> int:
+    if not os.path.isdir(TTS_CACHE_DIR):
+        return 0
+    return sum(
+        entry.stat().st_size
+        for entry in os.scandir(TTS_CACHE_DIR)
+        if entry.is_file() and not entry.name.startswith(".")  # skip in-flight / leftover .tmp- files
+    )
+
+
+def _cache_get(key: str, output_format="mp3"):
+    """Cached audio bytes or None. A hit refreshes the file's mtime (LRU order)."""
+    path = _cache_path(key, output_format)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)
+    except OSError:
+        with _cache_lock:
+            TTS_CACHE_STATS["misses"] += 1
+        return None
+    with _cache_lock:
+        TTS_CACHE_STATS["hits"] += 1
+    return data
+
+
+def _evict_cache_locked():
+    """Delete least recently used files until the cache fits TTS_CACHE_MAX_BYTES."""
+    global _cache_bytes
+    entries = sorted(
+        (entry for entry in os.scandir(TTS_CACHE_DIR) if entry.is_file() and not entry.name.startswith(".")),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in entries:
+        if _cache_bytes <= TTS_CACHE_MAX_BYTES:
+            break
+        try:
+            size = entry.stat().st_size
+            os.remove(entry.path)
+        except OSError:
+            continue
+        _cache_bytes -= size
+        TTS_CACHE_STATS["evictions"] += 1
+
+
+def _cache_put(key: str, data: bytes, output_format="mp3"):
+    """Atomically store audio (write to a temp file in the cache dir, then os.replace)."""
+    global _cache_bytes
+    path = _cache_path(key, output_format)
+    tmp_path = None
+    try:
+        os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=TTS_CACHE_DIR, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        try:
+            replaced = os.path.getsize(path)  # overwriting an existing entry
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        tmp_path = None
+    except OSError as e:
+        print(f"⚠️ TTS cache write failed: {e}")
+        return
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    with _cache_lock:
+        if _cache_bytes is None:
+            _cache_bytes = _scan_cache_bytes()
+        else:
+            _cache_bytes += len(data) - replaced
+        if _cache_bytes > TTS_CACHE_MAX_BYTES:
+            _evict_cache_locked()
+
+
+def get_tts_cache_stats() -> dict:
+    with _cache_lock:
+        stats = dict(TTS_CACHE_STATS)
+    total = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / total, 3) if total else None
+    return stats
+
+
+def pack_key(text: str, lang: str) -> str:
+    """Asset pack key (same hash as the disk cache, for the pack's PCM format)."""
+    return _cache_key(
+        text, lang, get_voice_id(lang), ELEVENLABS_MODEL_ID, ELEVENLABS_VOICE_SETTINGS, TTS_PACK_FORMAT
+    )
+
+
+def pcm_sample_rate(output_format: str) -> int:
+    """"pcm_22050" → 22050"""
+    return int(output_format.split("_")[1])
+
+
+def _pcm_from_bytes(data: bytes) -> np.ndarray:
+    """ElevenLabs PCM body → int16 samples (whole samples only)."""
+    return np.frombuffer(data[: len(data) - len(data) % 2], dtype=np.int16)
+
+
+def load_audio_pack(path=TTS_AUDIO_PACK):
+    """Memory-map the prerendered pack once. Returns (entries, memmap, sample_rate) or None."""
+    global _audio_pack
+    if _audio_pack is None:
+        try:
+            with open(f"{path}.json", encoding="utf-8") as f:
+                index = json.load(f)
+            pcm = np.memmap(f"{path}.bin", dtype=np.int16, mode="r")
+            _audio_pack = (index["entries"], pcm, index["sample_rate"])
+            print(f"🔊 TTS audio pack loaded: {len(index['entries'])} utterances")
+        except (OSError, ValueError, KeyError):
+            _audio_pack = False
+    return _audio_pack or None
+
+
+def _pack_lookup(text: str, lang: str):
+    """(PCM view, sample_rate) for a prerendered utterance, or None."""
+    pack = load_audio_pack()
+    if pack is None:
+        return None
+    entries, pcm, sample_rate = pack
+    entry = entries.get(pack_key(text, lang))
+    if entry is None:
+        return None
+    return pcm[entry["offset"]:entry["offset"] + entry["length"]], sample_rate
+
+
+def _tts_cache_key(text: str, lang: str, output_format="mp3") -> str:
+    return _cache_key(text, lang, get_voice_id(lang), ELEVENLABS_MODEL_ID, ELEVENLABS_VOICE_SETTINGS, output_format)
+
+
+def _post_tts(text: str, lang: str, output_format="mp3", stream=False):
     """
-    Internal function to handle a single TTS request (chunk).
-    This is where the actual API call happens.
+    POST to ElevenLabs (the /stream endpoint when stream=True).
+    Returns the response, or None when TTS should be skipped (quota exceeded, HTTP / network errors).
     """
-    voice_id = get_voice_id(lang)
     api_key = get_api_key()
 
     # ElevenLabs API 요청
-    url = ELEVENLABS_API_URL.format(voice_id=voice_id)
+    url = (ELEVENLABS_STREAM_URL if stream else ELEVENLABS_API_URL).format(voice_id=get_voice_id(lang))
     
-    # Use MP3 format (most reliable, no format issues)
+    # Use MP3 format (most reliable, no format issues) unless raw PCM is requested
     headers = {
-        "Accept": "audio/mpeg",  # Request MP3 format
+        "Accept": "audio/mpeg" if output_format == "mp3" else "audio/pcm",
         "Content-Type": "application/json",
         "xi-api-key": api_key
     }
+    params = {"output_format": output_format} if output_format != "mp3" else None
     
-    # ElevenLabs API 파라미터 - Consistent settings for all TTS calls
     data = {
         "text": text,
-        "model_id": "eleven_multilingual_v2",  # 다국어 지원 모델
-        "voice_settings": {
-            "stability": 0.5,  # Consistent stability
-            "similarity_boost": 0.75,  # Consistent similarity
-            "style": 0.0,  # Consistent style
-            "use_speaker_boost": True  # Always use speaker boost for maximum clarity
-        }
+        "model_id": ELEVENLABS_MODEL_ID,
+        "voice_settings": ELEVENLABS_VOICE_SETTINGS,
     }
     
     try:
-        response = requests.post(url, json=data, headers=headers, timeout=30)
+        response = get_http_session().post(
+            url,
+            json=data,
+            headers=headers,
+            params=params,
+            timeout=(TTS_CONNECT_TIMEOUT, TTS_READ_TIMEOUT),
+            stream=stream,
+        )
         
         # Check for HTTP errors before processing
         if response.status_code == 401:
@@ -170,54 +515,775 @@ def _speak_single_chunk(text: str, lang: str, speaking_rate: float, pitch: float
                 error_detail = response.json().get("detail", {})
                 if error_detail.get("status") == "quota_exceeded":
                     # Silently skip TTS when quota is exceeded (user said they don't need credit checking)
-                    return
+                    return None
             except (ValueError, KeyError):
                 pass
         
         # Raise for other HTTP errors
         response.raise_for_status()
         
-        # MP3 오디오 데이터 받기
-        mp3_data = response.content
-        
-        # Initialize pygame mixer if not already initialized
-        # Use consistent audio settings for all playback to ensure uniform quality
-        if not pygame.mixer.get_init():
-            pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
-        
-        # Stop any currently playing music to ensure clean playback
-        pygame.mixer.music.stop()
-        
-        # Load MP3 from memory using pygame (no file I/O)
-        mp3_file = io.BytesIO(mp3_data)
-        pygame.mixer.music.load(mp3_file)
-        
-        # Always set volume to maximum (1.0) right before playback
-        # This ensures consistent volume across all scripts and Q&A
-        # Set volume multiple times to ensure it's applied
-        pygame.mixer.music.set_volume(1.0)
-        
-        # Play and wait for completion
-        pygame.mixer.music.play()
-        
-        # Set volume again after starting playback to ensure it's at maximum
-        pygame.mixer.music.set_volume(1.0)
-        
-        # Wait until playback is finished
-        while pygame.mixer.music.get_busy():
-            pygame.time.wait(100)  # Check every 100ms
-        
-        print(f"🔊 TTS ({lang}) → {text}")
-        
-    except requests.exceptions.HTTPError as e:
-        # Handle HTTP errors (like 401, 403, 429, etc.) gracefully - silently skip
-        # Don't crash - just skip TTS and continue
-        return
-        
     except requests.exceptions.RequestException as e:
-        # Handle network/connection errors gracefully - silently skip
+        # Handle HTTP errors (401, 403, 429, ...) and network/connection errors gracefully - silently skip
+        return None
+
+    return response
+
+
+def synthesize(text: str, lang: str, output_format="mp3"):
+    """
+    Text → audio bytes (disk cache first, then ElevenLabs).
+    - output_format: "mp3" (default) or an ElevenLabs PCM format such as "pcm_22050"
+      (raw 16-bit little-endian mono)
+    Returns None when synthesis is skipped (quota exceeded, HTTP / network errors).
+    """
+    key = _tts_cache_key(text, lang, output_format)
+    if USE_TTS_CACHE:
+        cached = _cache_get(key, output_format)
+        if cached is not None:
+            return cached
+
+    response = _post_tts(text, lang, output_format)
+    if response is None:
+        return None
+
+    # 오디오 데이터 받기
+    try:
+        audio_data = response.content
+    except requests.exceptions.RequestException as e:
+        return None
+    if USE_TTS_CACHE and audio_data:
+        _cache_put(key, audio_data, output_format)
+    return audio_data
+
+
+def _record_latency(source: str, text: str, ttfb, ttfs, total):
+    """Per-utterance timings (seconds from request start) for get_tts_latency_stats()."""
+    if source in ("stream", "download"):
+        _note_cloud_latency(ttfs)
+    TTS_LATENCY_LOG.append({
+        "source": source,
+        "chars": len(text),
+        "ttfb": None if ttfb is None else round(ttfb, 4),
+        "ttfs": None if ttfs is None else round(ttfs, 4),
+        "total": round(total, 4),
+    })
+
+
+def get_tts_latency_stats() -> dict:
+    """Recent time-to-first-byte / time-to-first-sound per source (stream, download, cache, pack, local, prefetch)."""
+    summary = {}
+    for entry in list(TTS_LATENCY_LOG):
+        summary.setdefault(entry["source"], []).append(entry)
+    result = {}
+    for source, entries in summary.items():
+        ttfs = sorted(e["ttfs"] for e in entries if e["ttfs"] is not None)
+        ttfb = sorted(e["ttfb"] for e in entries if e["ttfb"] is not None)
+        result[source] = {
+            "count": len(entries),
+            "ttfb_p50": ttfb[len(ttfb) // 2] if ttfb else None,
+            "ttfs_p50": ttfs[len(ttfs) // 2] if ttfs else None,
+            "ttfs_max": ttfs[-1] if ttfs else None,
+        }
+    return result
+
+
+def _speak_streaming(text: str, lang: str) -> bool:
+    """
+    Stream PCM from the ElevenLabs /stream endpoint straight into an output stream,
+    so playback starts with the first chunk instead of after the whole body.
+    The complete PCM is stored in the disk cache afterwards. Returns False if TTS was skipped.
+    """
+    start = time.perf_counter()
+    response = _post_tts(text, lang, TTS_STREAM_FORMAT, stream=True)
+    if response is None:
+        return False
+
+    ttfb = ttfs = None
+    audio = bytearray()
+    leftover = b""
+    out = get_pcm_output(pcm_sample_rate(TTS_STREAM_FORMAT))
+    try:
+        for chunk in response.iter_content(chunk_size=TTS_STREAM_CHUNK_BYTES):
+            if _cancel_requested():
+                out.clear()
+                return True
+            if not chunk:
+                continue
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+            data = leftover + chunk
+            cut = len(data) - len(data) % 2  # whole int16 samples only
+            leftover = data[cut:]
+            if not cut:
+                continue
+            out.write(data[:cut])
+            if ttfs is None:
+                ttfs = time.perf_counter() - start + out.latency
+            audio.extend(data[:cut])
+    except requests.exceptions.RequestException as e:
+        # Connection dropped mid-stream: play what arrived, don't cache a partial utterance
+        out.mark().wait()
+        return True
+    finally:
+        response.close()
+    out.mark().wait()
+
+    _record_latency("stream", text, ttfb, ttfs, time.perf_counter() - start)
+    if USE_TTS_CACHE and audio:
+        _cache_put(_tts_cache_key(text, lang, TTS_STREAM_FORMAT), bytes(audio), TTS_STREAM_FORMAT)
+    return True
+
+
+class PlaybackMark(threading.Event):
+    """
+    Event returned by PcmOutput.mark().
+    wait() without a timeout gives up TTS_MARK_TIMEOUT_MARGIN after the audio queued before the
+    mark should have finished (stalled device), closing the output; it raises RuntimeError when
+    the mark failed (stall, callback error, stream closed) instead of returning normally.
+    """
+
+    def __init__(self, output: "PcmOutput", expected_seconds: float):
+        super().__init__()
+        self._output = output
+        self.deadline = time.monotonic() + expected_seconds + TTS_MARK_TIMEOUT_MARGIN
+        self.error = None
+
+    def fail(self, error: str):
+        self.error = error
+        self.set()
+
+    def wait(self, timeout=None) -> bool:
+        done = super().wait(max(0.0, self.deadline - time.monotonic()) if timeout is None else timeout)
+        if not done and timeout is None:
+            self._output.close(f"audio output stalled ({TTS_MARK_TIMEOUT_MARGIN:.1f}s past the expected end of playback)")
+        if self.error is not None:
+            raise RuntimeError(self.error)
+        return done
+
+
+class PcmOutput:
+    """
+    Long-lived int16 mono output stream for one sample rate.
+    write() only queues audio; the audio callback plays it (silence when idle) and
+    sets the marks returned by mark() once everything queued before them has come out
+    of the speaker: a marker is stamped with the time its last sample reaches the DAC
+    (block offset + stream.latency) and set by the first callback after that time.
+    If the stream stalls, errors or is closed, pending marks fail and get_pcm_output()
+    opens a new stream next time.
+    """
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self.error = None  # Set once the stream has failed / been closed
+        self._chunks = deque()  # bytes or PlaybackMark markers
+        self._offset = 0  # Bytes of _chunks[0] already played
+        self._due = []  # (monotonic deadline, mark): queued to the device, still playing
+        self._lock = threading.Lock()
+        self._stream = sd.RawOutputStream(
+            samplerate=sample_rate,
+            channels=1,
+            dtype="int16",
+            blocksize=TTS_OUTPUT_BLOCKSIZE,
+            callback=self._callback,
+            finished_callback=self._on_finished,
+        )
+        self._stream.start()
+
+    @property
+    def latency(self) -> float:
+        """Seconds from write() to sound, when nothing else is queued."""
+        return self._stream.latency + TTS_OUTPUT_BLOCKSIZE / self.sample_rate
+
+    def write(self, pcm: bytes):
+        if pcm:
+            with self._lock:
+                self._chunks.append(bytes(pcm))
+
+    def mark(self) -> PlaybackMark:
+        """Mark set when all audio written so far has finished playing (or clear() is called).
+        Safe to open the microphone right after wait() — the device latency is already included."""
+        with self._lock:
+            queued = sum(len(item) for item in self._chunks if isinstance(item, bytes)) - self._offset
+            mark = PlaybackMark(self, queued / 2 / self.sample_rate + self.latency)
+            if self.error is None:
+                self._chunks.append(mark)
+        if self.error is not None:
+            mark.fail(self.error)
+        return mark
+
+    def play(self, pcm: bytes) -> PlaybackMark:
+        self.write(pcm)
+        return self.mark()
+
+    def clear(self):
+        """Drop queued audio (cancel) and release everyone waiting on a mark."""
+        for mark in self._take_pending():
+            mark.set()
+
+    def close(self, reason="audio output stream closed"):
+        """Stop the stream and fail every pending mark with `reason`."""
+        self._fail(reason)
+        try:
+            self._stream.close()
+        except Exception as e:
+            print(f"⚠️ Closing audio output failed: {e!r}")
+
+    def _take_pending(self) -> list:
+        with self._lock:
+            pending = [item for item in self._chunks if isinstance(item, PlaybackMark)]
+            pending += [mark for _, mark in self._due]
+            self._chunks.clear()
+            self._offset = 0
+            self._due = []
+        return pending
+
+    def _fail(self, reason: str):
+        with self._lock:
+            if self.error is None:
+                self.error = reason
+        with _pcm_outputs_lock:
+            if _pcm_outputs.get(self.sample_rate) is self:
+                del _pcm_outputs[self.sample_rate]
+        for mark in self._take_pending():
+            mark.fail(self.error)
+
+    def _on_finished(self):
+        # Stream stopped: closed, aborted, device lost or the callback raised
+        self._fail("audio output stream closed")
+
+    def _callback(self, outdata, frames, time_info, status):
+        try:
+            self._fill(outdata)
+        except Exception as e:
+            self._fail(f"audio output callback failed: {e!r}")
+            raise  # sounddevice aborts the stream
+
+    def _fill(self, outdata):
+        need = len(outdata)
+        filled = 0
+        now = time.monotonic()
+        # This block starts sounding after the device latency; markers inside it end at their offset
+        block_start = now + self._stream.latency
+        with self._lock:
+            # Markers whose audio has left the speaker by now
+            still_playing = []
+            for deadline, mark in self._due:
+                if deadline <= now:
+                    mark.set()
+                else:
+                    still_playing.append((deadline, mark))
+            self._due = still_playing
+            while self._chunks and filled < need:
+                item = self._chunks[0]
+                if isinstance(item, PlaybackMark):
+                    self._due.append((block_start + filled / 2 / self.sample_rate, self._chunks.popleft()))
+                    continue
+                take = min(need - filled, len(item) - self._offset)
+                outdata[filled:filled + take] = item[self._offset:self._offset + take]
+                filled += take
+                self._offset += take
+                if self._offset == len(item):
+                    self._chunks.popleft()
+                    self._offset = 0
+        if filled < need:
+            outdata[filled:] = b"\x00" * (need - filled)
+
+
+def get_pcm_output(sample_rate: int) -> PcmOutput:
+    """The shared output stream for `sample_rate` (opened on first use, then kept open)."""
+    with _pcm_outputs_lock:
+        if sample_rate not in _pcm_outputs:
+            _pcm_outputs[sample_rate] = PcmOutput(sample_rate)
+        return _pcm_outputs[sample_rate]
+
+
+def _play_mp3(mp3_data: bytes):
+    """Play MP3 bytes through pygame and block until playback finishes (TTS_OUTPUT_FORMAT = "mp3")."""
+    # Initialize pygame mixer if not already initialized
+    # Use consistent audio settings for all playback to ensure uniform quality
+    if not pygame.mixer.get_init():
+        pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+    
+    # Stop any currently playing music to ensure clean playback
+    pygame.mixer.music.stop()
+    
+    # Load MP3 from memory using pygame (no file I/O)
+    mp3_file = io.BytesIO(mp3_data)
+    pygame.mixer.music.load(mp3_file)
+    
+    # Always set volume to maximum (1.0) right before playback
+    # This ensures consistent volume across all scripts and Q&A
+    # Set volume multiple times to ensure it's applied
+    pygame.mixer.music.set_volume(1.0)
+    
+    # Play and wait for completion (unless the active handle was cancelled while loading)
+    with _active_lock:
+        if _cancel_requested():
+            return
+        pygame.mixer.music.play()
+    
+    # Set volume again after starting playback to ensure it's at maximum
+    pygame.mixer.music.set_volume(1.0)
+    
+    # Wait until playback is finished
+    while pygame.mixer.music.get_busy():
+        pygame.time.wait(100)  # Check every 100ms
+
+
+def _play_pcm(pcm: np.ndarray, sample_rate: int):
+    """Play int16 mono PCM on the shared output stream and block until it has been played."""
+    out = get_pcm_output(sample_rate)
+    data = np.ascontiguousarray(pcm, dtype=np.int16).tobytes()
+    # Check-and-start under the lock cancel() takes: either cancel() sees this audio queued and
+    # clears it, or this sees the cancel and never starts
+    with _active_lock:
+        if _cancel_requested():
+            return
+        mark = out.play(data)
+    mark.wait()
+
+
+class ElevenLabsEngine:
+    """Cloud engine: streams PCM from ElevenLabs (or downloads whole TTS_OUTPUT_FORMAT audio when USE_STREAMING_TTS is off)."""
+
+    name = "elevenlabs"
+
+    def speak(self, text: str, lang: str) -> bool:
+        """Play `text`; False if the request was skipped (quota / HTTP / network error)."""
+        global _last_cloud_attempt
+        _last_cloud_attempt = time.monotonic()
+        start = time.perf_counter()
+        if USE_STREAMING_TTS:
+            played = _speak_streaming(text, lang)
+        else:
+            data = synthesize(text, lang, TTS_OUTPUT_FORMAT)
+            played = bool(data)
+            if played:
+                ttfs = time.perf_counter() - start
+                if TTS_OUTPUT_FORMAT == "mp3":
+                    _play_mp3(data)
+                else:
+                    _play_pcm(_pcm_from_bytes(data), pcm_sample_rate(TTS_OUTPUT_FORMAT))
+                _record_latency("download", text, None, ttfs, time.perf_counter() - start)
+        if not played:
+            _note_cloud_failure()
+        return played
+
+    def synthesize_pcm(self, text: str, lang: str):
+        """(int16 samples, sample_rate) or None."""
+        output_format = TTS_STREAM_FORMAT if USE_STREAMING_TTS else TTS_OUTPUT_FORMAT
+        data = synthesize(text, lang, output_format)
+        if not data:
+            return None
+        return _pcm_from_bytes(data), pcm_sample_rate(output_format)
+
+
+class PiperEngine:
+    """
+    Local CPU neural TTS: one Piper ONNX voice (PIPER_VOICES[lang]).
+    Audio is synthesized sentence by sentence and written to the output device as it is produced.
+    """
+
+    name = "piper"
+
+    def __init__(self, lang: str):
+        from piper import PiperVoice
+
+        self.lang = lang
+        self.voice = PiperVoice.load(local_voice_path(lang))
+        self.sample_rate = self.voice.config.sample_rate
+
+    def stream_pcm(self, text: str):
+        """Raw int16 mono PCM bytes, one chunk per sentence (piper-tts >= 1.3 AudioChunk API)."""
+        for chunk in self.voice.synthesize(text):
+            yield chunk.audio_int16_bytes
+
+    def speak(self, text: str, lang: str) -> bool:
+        start = time.perf_counter()
+        ttfs = None
+        out = get_pcm_output(self.sample_rate)
+        for chunk in self.stream_pcm(text):
+            if _cancel_requested():
+                out.clear()
+                return True
+            out.write(chunk)
+            if ttfs is None:
+                ttfs = time.perf_counter() - start + out.latency
+        out.mark().wait()
+        _record_latency("local", text, None, ttfs, time.perf_counter() - start)
+        return True
+
+    def synthesize_pcm(self, text: str, lang: str):
+        pcm = b"".join(self.stream_pcm(text))
+        return np.frombuffer(pcm, dtype=np.int16), self.sample_rate
+
+
+_cloud_engine = ElevenLabsEngine()
+
+
+def local_voice_path(lang: str):
+    """Path of the Piper voice for `lang`, or None if none is configured / installed."""
+    name = PIPER_VOICES.get(lang)
+    if not name:
+        return None
+    path = os.path.join(PIPER_VOICE_DIR, name)
+    return path if os.path.exists(path) else None
+
+
+def load_local_voice(lang: str):
+    """Load (once) and return the PiperEngine for `lang`, or None if unavailable."""
+    with _local_voices_lock:
+        if lang not in _local_voices:
+            engine = None
+            if local_voice_path(lang):
+                try:
+                    print(f"🔵 Loading local TTS voice ({lang}): {PIPER_VOICES[lang]}")
+                    engine = PiperEngine(lang)
+                except Exception as e:  # piper-tts not installed, broken model, ...
+                    print(f"⚠️ Local TTS voice for {lang} unavailable: {e}")
+            _local_voices[lang] = engine
+        return _local_voices[lang]
+
+
+def _note_cloud_latency(ttfs):
+    global _cloud_ttfs_ewma
+    if ttfs is None:
         return
-        
+    if _cloud_ttfs_ewma is None:
+        _cloud_ttfs_ewma = ttfs
+    else:
+        _cloud_ttfs_ewma = (1 - TTS_LATENCY_EWMA_ALPHA) * _cloud_ttfs_ewma + TTS_LATENCY_EWMA_ALPHA * ttfs
+
+
+def _note_cloud_failure():
+    """A skipped cloud request counts as a very slow one."""
+    _note_cloud_latency(2 * TTS_CLOUD_MAX_LATENCY)
+
+
+def choose_tts_engine(lang: str):
+    """
+    Per-request engine choice:
+    - TTS_ENGINE "cloud" / "local" forces one (local falls back to cloud without a voice)
+    - "auto": cloud while its recent time-to-first-sound (EWMA) stays under TTS_CLOUD_MAX_LATENCY,
+      otherwise the local voice; the cloud is probed again every TTS_CLOUD_PROBE_SECONDS
+    The Piper model is loaded only once the local voice is actually picked (not while the cloud is fine).
+    """
+    if TTS_ENGINE == "cloud":
+        return _cloud_engine
+    if TTS_ENGINE != "local":
+        if _cloud_ttfs_ewma is None or _cloud_ttfs_ewma <= TTS_CLOUD_MAX_LATENCY:
+            return _cloud_engine
+        if time.monotonic() - _last_cloud_attempt >= TTS_CLOUD_PROBE_SECONDS:
+            return _cloud_engine
+    return load_local_voice(lang) or _cloud_engine
+
+
+def _speak_single_chunk(text: str, lang: str, speaking_rate: float, pitch: float):
+    """
+    Internal function to handle a single TTS request (chunk):
+    prerendered pack → disk cache → engine chosen by choose_tts_engine() → play.
+    If the chosen engine skips the request, the other engine gets a chance.
+    """
+    start = time.perf_counter()
+    try:
+        prerendered = _pack_lookup(text, lang)
+        if prerendered is not None:
+            _record_latency("pack", text, None, time.perf_counter() - start, time.perf_counter() - start)
+            _play_pcm(*prerendered)
+            print(f"🔊 TTS ({lang}, pack) → {text}")
+            return
+
+        if USE_STREAMING_TTS and USE_TTS_CACHE:
+            cached = _cache_get(_tts_cache_key(text, lang, TTS_STREAM_FORMAT), TTS_STREAM_FORMAT)
+            if cached is not None:
+                pcm = _pcm_from_bytes(cached)
+                _record_latency("cache", text, None, time.perf_counter() - start, time.perf_counter() - start)
+                _play_pcm(pcm, pcm_sample_rate(TTS_STREAM_FORMAT))
+                print(f"🔊 TTS ({lang}, cache) → {text}")
+                return
+
+        engine = choose_tts_engine(lang)
+        if _engine_speak(engine, text, lang):
+            print(f"🔊 TTS ({lang}, {engine.name}) → {text}")
+            return
+
+        fallback = load_local_voice(lang) if engine is _cloud_engine else _cloud_engine
+        if fallback is not None and _engine_speak(fallback, text, lang):
+            print(f"🔊 TTS ({lang}, {fallback.name} fallback) → {text}")
     except Exception as e:
         # Handle any other unexpected errors gracefully - silently skip
         return
+
+
+def _engine_speak(engine, text: str, lang: str) -> bool:
+    """engine.speak(); an exception counts as a skipped request so the other engine can try."""
+    try:
+        return engine.speak(text, lang)
+    except Exception as e:
+        print(f"⚠️ TTS engine {engine.name} failed: {e!r}")
+        if engine is _cloud_engine:
+            _note_cloud_failure()
+        return False
+
+
+def _prepare_audio(text: str, lang: str):
+    """
+    Fetch playable audio without playing it, with the same chain as _speak_single_chunk:
+    pack → cache → engine chosen by choose_tts_engine() → the other engine if that one skips.
+    Returns ("pcm", samples, sample_rate), ("mp3", bytes) or None if TTS is skipped.
+    """
+    prerendered = _pack_lookup(text, lang)
+    if prerendered is not None:
+        return ("pcm", *prerendered)
+
+    if USE_STREAMING_TTS and USE_TTS_CACHE:
+        cached = _cache_get(_tts_cache_key(text, lang, TTS_STREAM_FORMAT), TTS_STREAM_FORMAT)
+        if cached is not None:
+            return ("pcm", _pcm_from_bytes(cached), pcm_sample_rate(TTS_STREAM_FORMAT))
+
+    engine = choose_tts_engine(lang)
+    prepared = _engine_prepare(engine, text, lang)
+    if prepared is not None:
+        return prepared
+    fallback = load_local_voice(lang) if engine is _cloud_engine else _cloud_engine
+    if fallback is not None:
+        return _engine_prepare(fallback, text, lang)
+    return None
+
+
+def _engine_prepare(engine, text: str, lang: str):
+    """_prepare_audio counterpart of _engine_speak: None (not an exception) when the engine skips or fails."""
+    global _last_cloud_attempt
+    prepared = None
+    try:
+        if engine is _cloud_engine:
+            _last_cloud_attempt = time.monotonic()
+        if engine is _cloud_engine and not USE_STREAMING_TTS and TTS_OUTPUT_FORMAT == "mp3":
+            data = synthesize(text, lang)
+            prepared = ("mp3", data) if data else None
+        else:
+            result = engine.synthesize_pcm(text, lang)
+            prepared = ("pcm", *result) if result else None
+    except Exception as e:
+        print(f"⚠️ TTS engine {engine.name} failed: {e!r}")
+    if prepared is None and engine is _cloud_engine:
+        _note_cloud_failure()
+    return prepared
+
+
+def _play_prepared(prepared):
+    if prepared[0] == "pcm":
+        _play_pcm(prepared[1], prepared[2])
+    else:
+        _play_mp3(prepared[1])
+
+
+def speak_sequence(texts, lang="ko", pause=TTS_SENTENCE_PAUSE, after_each=None):
+    """
+    Speak sentences back to back while up to TTS_LOOKAHEAD upcoming ones are synthesized
+    in the background, so the gap between sentences is just `pause`.
+    - The first sentence goes through the normal (streaming) path for the fastest first sound.
+    - after_each(index, text): called after each sentence (before the pause) on the calling
+      thread, while the playback thread is idle and the next sentences keep prefetching;
+      it may record, speak() or block. Return False to stop early (prefetches are cancelled).
+    Blocks until done; speak_sequence_async() returns a PlaybackHandle instead.
+    """
+    if after_each is None:
+        if _on_playback_thread():
+            _speak_sequence_blocking(texts, lang, pause)
+            return
+        speak_sequence_async(texts, lang, pause).result()
+        return
+
+    # One playback job per sentence, so the playback thread only ever plays audio
+    prefetch = _SentencePrefetcher(texts, lang)
+    try:
+        for i, text in enumerate(prefetch.texts):
+            prefetch.fill(i)
+            if _on_playback_thread():
+                prefetch.play(i)
+            else:
+                handle = _enqueue(lambda i=i: prefetch.play(i), text, lang)
+                handle.result()
+                if handle.cancelled:
+                    break
+            if after_each(i, text) is False:
+                break
+            if i < len(prefetch.texts) - 1 and pause:
+                time.sleep(pause)
+    finally:
+        prefetch.cancel()
+
+
+def speak_sequence_async(texts, lang="ko", pause=TTS_SENTENCE_PAUSE, on_progress=None):
+    """Queue a sentence sequence as one playback job; on_progress gets a "sentence" event per sentence."""
+    texts = [t for t in texts if t and t.strip()]
+    return _enqueue(lambda: _speak_sequence_blocking(texts, lang, pause), " ".join(texts), lang, on_progress)
+
+
+class _SentencePrefetcher:
+    """Synthesizes up to TTS_LOOKAHEAD sentences ahead of the one being played."""
+
+    def __init__(self, texts, lang: str):
+        self.texts = [t for t in texts if t and t.strip()]
+        self.lang = lang
+        self.pending = {}  # index -> Future of _prepare_audio
+
+    def fill(self, current: int):
+        for j in range(current + 1, min(len(self.texts), current + 1 + TTS_LOOKAHEAD)):
+            if j not in self.pending:
+                self.pending[j] = _synth_pool.submit(_prepare_audio, self.texts[j], self.lang)
+
+    def play(self, i: int):
+        """Play sentence i (blocking): prefetched audio if there is any, else the normal path."""
+        text = self.texts[i]
+        _emit_progress("sentence", text)
+        if i == 0 or i not in self.pending:
+            _speak_single_chunk(text, self.lang, 1.0, 0.0)
+            return
+        wait_start = time.perf_counter()
+        try:
+            prepared = self.pending.pop(i).result()
+            if prepared is not None:
+                # ttfs here = how long playback waited on the prefetch (0 when lookahead kept up)
+                waited = time.perf_counter() - wait_start
+                _play_prepared(prepared)
+                _record_latency("prefetch", text, None, waited, time.perf_counter() - wait_start)
+                print(f"🔊 TTS ({self.lang}, prefetched) → {text}")
+        except Exception as e:
+            # Same policy as _speak_single_chunk: skip this sentence silently
+            pass
+
+    def cancel(self):
+        for future in self.pending.values():
+            future.cancel()
+
+
+def _speak_sequence_blocking(texts, lang, pause):
+    prefetch = _SentencePrefetcher(texts, lang)
+    try:
+        for i in range(len(prefetch.texts)):
+            if _cancel_requested():
+                break
+            prefetch.fill(i)
+            prefetch.play(i)
+            if i < len(prefetch.texts) - 1 and pause:
+                time.sleep(pause)
+    finally:
+        prefetch.cancel()
+
+
+class PlaybackHandle:
+    """
+    Handle of one queued utterance (speak_async / speak_sequence_async).
+    - wait(timeout): block until played, skipped or cancelled
+    - result(): wait(), then re-raise the exception the job raised on the playback thread (if any)
+    - cancel(): drop it from the queue, or stop the audio if it is playing
+    - done: True once finished
+    - on_progress(handle, event, text): "started", "sentence", "finished" or "cancelled"
+    """
+
+    def __init__(self, text: str, lang: str, on_progress=None):
+        self.text = text
+        self.lang = lang
+        self.cancelled = False
+        self.error = None
+        self._done = threading.Event()
+        self._callbacks = [on_progress] if on_progress else []
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout=None) -> bool:
+        return self._done.wait(timeout)
+
+    def result(self):
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+
+    def cancel(self):
+        with _active_lock:
+            self.cancelled = True
+            if _active_handle is self:
+                _stop_output()
+
+    def add_progress_callback(self, callback):
+        self._callbacks.append(callback)
+
+    def _emit(self, event: str, text=None):
+        for callback in self._callbacks:
+            try:
+                callback(self, event, text)
+            except Exception as e:
+                print(f"⚠️ TTS progress callback failed: {e}")
+
+
+def _on_playback_thread() -> bool:
+    return threading.current_thread() is _playback_thread
+
+
+def _cancel_requested() -> bool:
+    handle = _active_handle
+    return handle is not None and handle.cancelled
+
+
+def _emit_progress(event: str, text=None):
+    handle = _active_handle
+    if handle is not None:
+        handle._emit(event, text)
+
+
+def _stop_output():
+    """Interrupt whatever the playback thread is playing (PCM output streams / pygame)."""
+    with _pcm_outputs_lock:
+        outputs = list(_pcm_outputs.values())
+    for out in outputs:
+        out.clear()
+    if pygame.mixer.get_init():
+        pygame.mixer.music.stop()
+
+
+def _playback_loop():
+    global _active_handle
+    while True:
+        job, handle = _playback_queue.get()
+        # Become active under the lock cancel() takes, before the job starts any output
+        with _active_lock:
+            if not handle.cancelled:
+                _active_handle = handle
+        if _active_handle is not handle:
+            handle._emit("cancelled")
+            handle._done.set()
+            continue
+        handle._emit("started", handle.text)
+        try:
+            job()
+        except Exception as e:
+            handle.error = e
+            print(f"⚠️ TTS playback failed ({handle.text[:40]}): {e!r}")
+        finally:
+            with _active_lock:
+                _active_handle = None
+            handle._emit("cancelled" if handle.cancelled else "finished")
+            handle._done.set()
+
+
+def _enqueue(job, text: str, lang: str, on_progress=None) -> PlaybackHandle:
+    global _playback_thread
+    with _playback_lock:
+        if _playback_thread is None:
+            _playback_thread = threading.Thread(target=_playback_loop, daemon=True, name="tts-playback")
+            _playback_thread.start()
+    handle = PlaybackHandle(text, lang, on_progress)
+    _playback_queue.put((job, handle))
+    return handle
+
+
+def speak_async(text: str, lang="ko", speaking_rate=1.0, pitch=0.0, on_progress=None) -> PlaybackHandle:
+    """
+    Queue `text` for playback and return immediately with a PlaybackHandle.
+    Utterances play one at a time, in order, on a single playback thread.
+    """
+    return _enqueue(lambda: _speak_blocking(text, lang, speaking_rate, pitch), text, lang, on_progress)
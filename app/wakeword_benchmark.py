@@ -0,0 +1,349 @@
+# wakeword_benchmark.py
+"""
+웨이크워드 벤치마크.
+
+1) replay : 긴 배경 녹음(소음/일반 대화)에 웨이크워드 클립을 알려진 위치에 섞어 넣고,
+            실제 리스너 루프(_voice_listener_loop / _kws_listener_loop → is_wakeword)를
+            녹음 재생 버스(가상 실시간 시계) 위에서 돌려 감지 지연(느린 디코딩 뒤의 대기 포함),
+            미검출률, 시간당 오인식, 오디오 1시간당 CPU 초를 측정
+2) text   : 웨이크워드가 없는 일반 문장 코퍼스를 is_wakeword에 넣어 텍스트 단계 오인식률 측정
+            (fuzzy max_distance / 후보 목록 튜닝용)
+
+replay 입력 구조:
+    background/                 ← 웨이크워드가 없는 긴 16-bit WAV (거리 소음, 관람객 대화 ...)
+        street_01.wav
+    wakewords/
+        en/hey_dori_01.wav      ← 언어 코드 디렉터리 아래 웨이크워드 클립
+        ko/doriya_01.wav
+
+사용 예:
+    python wakeword_benchmark.py replay background/ wakewords/ --engine whisper --interval 30 --out wakeword_bench.json
+    python wakeword_benchmark.py text tourist_questions.txt --lang en
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+import wakeword_service
+from audio_bus import AudioBusReader
+from stt_benchmark import load_wav_int16
+from wakeword_service import is_wakeword
+
+SAMPLE_RATE = 16000
+MATCH_WINDOW_SECONDS = 4.0  # A detection up to this long after a clip ends still counts as a hit
+
+
+class _ReplayBus:
+    """
+    AudioBus stand-in over a recording, on a virtual real-time clock:
+    - time the listener spends computing (decodes) lets audio arrive at the real rate,
+      so a listener that decodes slower than real time falls behind exactly as it would live
+    - time spent waiting for audio is skipped, so the benchmark still runs faster than real time
+    """
+
+    def __init__(self, samples: np.ndarray, sample_rate=SAMPLE_RATE):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.capacity = len(samples) + 1
+        self.blocksize = int(sample_rate * 0.03)
+        self._pos = 0
+        self._tick_wall = time.perf_counter()
+
+    def _tick(self):
+        """Let audio arrive for the wall time elapsed since the last call (listener compute time)."""
+        now = time.perf_counter()
+        arrived = int((now - self._tick_wall) * self.sample_rate)
+        self._tick_wall = now
+        if arrived > 0:
+            self._pos = min(len(self.samples), self._pos + arrived)
+
+    @property
+    def position(self) -> int:
+        self._tick()
+        return self._pos
+
+    @property
+    def exhausted(self) -> bool:
+        return self._pos >= len(self.samples)
+
+    def is_available(self, start: int) -> bool:
+        return True
+
+    def view(self, start: int, end: int) -> np.ndarray:
+        return self.samples[max(0, start):end]
+
+    def latest(self, seconds: float) -> np.ndarray:
+        pos = self.position
+        return self.view(pos - int(seconds * self.sample_rate), pos)
+
+    def wait_until(self, position: int, timeout=None) -> bool:
+        self._tick()
+        if position > len(self.samples):
+            self._pos = len(self.samples)
+            return False
+        if position > self._pos:
+            self._pos = position  # idle wait: skipped
+        return True
+
+    def advance(self, seconds: float):
+        self.wait_until(min(len(self.samples), self.position + int(seconds * self.sample_rate)))
+
+    def reader(self) -> AudioBusReader:
+        return AudioBusReader(self)
+
+
+class _ReplayListener:
+    """
+    WakewordListener stand-in: records detections and replays the state machine in audio
+    time (tour-active is resumed immediately, then WAKEWORD_COOLDOWN of audio is skipped).
+    """
+
+    def __init__(self, bus: _ReplayBus, cooldown: float):
+        self.bus = bus
+        self.cooldown = cooldown
+        self.lang = "en"
+        self.detections = []
+        self._rearm = False
+
+    def wait_armed(self, on_rearm=None) -> bool:
+        if self._rearm:
+            self._rearm = False
+            self.bus.advance(self.cooldown)
+            if on_rearm:
+                on_rearm()
+        self.bus._tick()
+        return not self.bus.exhausted
+
+    def detected(self, lang: str):
+        self.detections.append({
+            # Live audio position at the decision: includes decode time and any backlog
+            "position": self.bus.position,
+            "lang": lang,
+        })
+        self._rearm = True
+
+
+def _list_wavs(root: str) -> list:
+    return sorted(
+        os.path.join(dirpath, name)
+        for dirpath, _, names in os.walk(root)
+        for name in names
+        if name.lower().endswith(".wav")
+    )
+
+
+def load_wakeword_clips(root: str) -> list[dict]:
+    """<root>/<lang>/*.wav → [{"path", "lang", "samples"}]"""
+    clips = []
+    for lang in sorted(os.listdir(root)):
+        lang_dir = os.path.join(root, lang)
+        if os.path.isdir(lang_dir):
+            clips.extend({"path": p, "lang": lang, "samples": load_wav_int16(p)} for p in _list_wavs(lang_dir))
+    return clips
+
+
+def splice_wakewords(background: np.ndarray, clips: list, interval: float, gain_db: float, rng: random.Random):
+    """
+    Mix clips into the background roughly every `interval` seconds (±25 % jitter).
+    Returns (mixed int16 audio, ground truth [{"start", "end", "lang", "clip"}] in samples).
+    """
+    mixed = background.astype(np.int32)
+    gain = 10 ** (gain_db / 20)
+    truth = []
+    pos = int(rng.uniform(0.25, 1.0) * interval * SAMPLE_RATE)
+    i = 0
+    while clips:
+        clip = clips[i % len(clips)]
+        n = len(clip["samples"])
+        if pos + n >= len(mixed):
+            break
+        mixed[pos:pos + n] += (clip["samples"].astype(np.float32) * gain).astype(np.int32)
+        truth.append({"start": pos, "end": pos + n, "lang": clip["lang"], "clip": os.path.basename(clip["path"])})
+        pos += n + int(interval * rng.uniform(0.75, 1.25) * SAMPLE_RATE)
+        i += 1
+    return np.clip(mixed, -32768, 32767).astype(np.int16), truth
+
+
+def _run_engine(listener: _ReplayListener, bus: _ReplayBus, engine: str, spotter=None):
+    if engine == "kws":
+        wakeword_service._kws_listener_loop(listener, spotter, bus=bus)
+    else:
+        wakeword_service._voice_listener_loop(listener, bus=bus)
+
+
+def score_detections(detections: list, truth: list) -> tuple[list, int]:
+    """Match detections to spliced wakewords. Returns (hits with latency, false accepts)."""
+    hits = []
+    false_accepts = 0
+    matched = set()
+    window = int(MATCH_WINDOW_SECONDS * SAMPLE_RATE)
+    for det in detections:
+        for k, t in enumerate(truth):
+            if k not in matched and t["start"] <= det["position"] <= t["end"] + window:
+                matched.add(k)
+                audio_latency = (det["position"] - t["end"]) / SAMPLE_RATE
+                hits.append({
+                    **t,
+                    "detected_lang": det["lang"],
+                    "latency_seconds": round(audio_latency, 4),
+                })
+                break
+        else:
+            false_accepts += 1
+    return hits, false_accepts
+
+
+def run_replay(backgrounds: list, clips: list, engine: str, interval: float, gain_db: float, seed: int = 0,
+               spotter=None) -> dict:
+    rng = random.Random(seed)
+    for key in wakeword_service.WAKEWORD_STATS:
+        wakeword_service.WAKEWORD_STATS[key] = 0
+
+    files = []
+    all_hits, total_truth, total_fa, total_seconds = [], 0, 0, 0.0
+    cpu_start = time.process_time()
+    for path in backgrounds:
+        mixed, truth = splice_wakewords(load_wav_int16(path), clips, interval, gain_db, rng)
+        bus = _ReplayBus(mixed)
+        listener = _ReplayListener(bus, wakeword_service.WAKEWORD_COOLDOWN)
+        if spotter is not None:
+            spotter.reset()
+
+        file_cpu = time.process_time()
+        _run_engine(listener, bus, engine, spotter)
+        file_cpu = time.process_time() - file_cpu
+
+        hits, false_accepts = score_detections(listener.detections, truth)
+        seconds = len(mixed) / SAMPLE_RATE
+        files.append({
+            "path": path,
+            "audio_seconds": round(seconds, 1),
+            "wakewords": len(truth),
+            "detected": len(hits),
+            "false_accepts": false_accepts,
+            "cpu_seconds": round(file_cpu, 2),
+            "hits": hits,
+        })
+        print(f"  {os.path.basename(path)}: {len(hits)}/{len(truth)} detected, {false_accepts} false accepts, "
+              f"{file_cpu:.1f} CPU s for {seconds / 60:.1f} min")
+        all_hits.extend(hits)
+        total_truth += len(truth)
+        total_fa += false_accepts
+        total_seconds += seconds
+    cpu_seconds = time.process_time() - cpu_start
+
+    hours = total_seconds / 3600
+    latencies = np.array([h["latency_seconds"] for h in all_hits]) if all_hits else np.zeros(0)
+    return {
+        "engine": engine,
+        "interval_seconds": interval,
+        "gain_db": gain_db,
+        "cooldown_seconds": wakeword_service.WAKEWORD_COOLDOWN,
+        "summary": {
+            "audio_hours": round(hours, 3),
+            "wakewords": total_truth,
+            "detected": len(all_hits),
+            "miss_rate": round(1 - len(all_hits) / total_truth, 4) if total_truth else None,
+            "false_accepts": total_fa,
+            "false_accepts_per_hour": round(total_fa / hours, 2) if hours else None,
+            "latency_p50": round(float(np.percentile(latencies, 50)), 3) if latencies.size else None,
+            "latency_p95": round(float(np.percentile(latencies, 95)), 3) if latencies.size else None,
+            "cpu_seconds": round(cpu_seconds, 1),
+            "cpu_seconds_per_hour": round(cpu_seconds / hours, 1) if hours else None,
+            "queue_lag_max_seconds": round(wakeword_service.WAKEWORD_STATS["max_lag_seconds"], 3),
+            "dropped_hops": wakeword_service.WAKEWORD_STATS["dropped_hops"],
+            "windows": dict(wakeword_service.WAKEWORD_STATS),
+            "kws_frames": (
+                {"processed": spotter.frames_processed, "gated": spotter.frames_gated} if spotter is not None else None
+            ),
+        },
+        "files": files,
+    }
+
+
+def run_text(lines: list, lang: str) -> dict:
+    """is_wakeword over sentences that do not contain the wakeword."""
+    triggered = [line for line in lines if is_wakeword(line, lang)]
+    return {
+        "lang": lang,
+        "sentences": len(lines),
+        "false_accepts": len(triggered),
+        "false_accept_rate": round(len(triggered) / len(lines), 4) if lines else None,
+        "triggered": triggered,
+    }
+
+
+def _run_replay(args):
+    backgrounds = _list_wavs(args.background)
+    clips = load_wakeword_clips(args.wakewords)
+    if not backgrounds or not clips:
+        print(f"⚠️ Need background WAVs under {args.background} and <lang>/*.wav clips under {args.wakewords}")
+        return
+
+    spotter = None
+    if args.engine == "kws":
+        from kws_engine import KeywordSpotter
+
+        spotter = KeywordSpotter.load(args.template_dir)
+        if spotter is None:
+            print(f"⚠️ No KWS templates in {args.template_dir}")
+            return
+
+    print(f"📥 {len(backgrounds)} background recordings, {len(clips)} wakeword clips, engine={args.engine}")
+    report = run_replay(backgrounds, clips, args.engine, args.interval, args.gain_db, args.seed, spotter)
+    s = report["summary"]
+    print(
+        f"\n   miss {s['miss_rate']}  FA/h {s['false_accepts_per_hour']}  "
+        f"latency p50 {s['latency_p50']}s p95 {s['latency_p95']}s  CPU s/h {s['cpu_seconds_per_hour']}"
+    )
+    print(f"   queue lag max {s['queue_lag_max_seconds']}s  dropped hops {s['dropped_hops']}")
+    print(f"   windows: {s['windows']}")
+
+    report["created_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Report saved to {args.out}")
+
+
+def _run_text(args):
+    with open(args.corpus, encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    result = run_text(lines, args.lang)
+    for line in result["triggered"]:
+        print(f"  ⚠️ {line}")
+    print(f"\n   {result['false_accepts']}/{result['sentences']} sentences trigger is_wakeword "
+          f"({result['false_accept_rate']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wakeword benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    replay = sub.add_parser("replay", help="splice wakewords into background audio and replay the listener")
+    replay.add_argument("background", help="directory of long background WAVs without the wakeword")
+    replay.add_argument("wakewords", help="directory with <lang>/*.wav wakeword clips")
+    replay.add_argument("--engine", choices=["whisper", "kws"], default="whisper")
+    replay.add_argument("--template-dir", default="kws_templates")
+    replay.add_argument("--interval", type=float, default=30.0, help="mean seconds between spliced wakewords")
+    replay.add_argument("--gain-db", type=float, default=0.0, help="clip gain relative to its recording")
+    replay.add_argument("--seed", type=int, default=0)
+    replay.add_argument("--out", default="wakeword_bench.json")
+
+    text = sub.add_parser("text", help="false accepts of is_wakeword on ordinary sentences")
+    text.add_argument("corpus", help="UTF-8 text file, one sentence per line")
+    text.add_argument("--lang", default="en")
+
+    args = parser.parse_args()
+    if args.command == "replay":
+        _run_replay(args)
+    else:
+        _run_text(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,62 +3,37 @@
 from typing import Callable
 import threading
 import time
-import re
 
-from stt_service import listen_for_seconds, listen_for_seconds_with_lang
+import numpy as np
 
-WakeWordCallback = Callable[[], None]
+from fuzzy_matcher import FuzzyMatcher, compact
+from stt_service import transcribe_with_lang
+
+WakeWordCallback = Callable[[str], None]
 
 # 허용 표현 (소문자 비교). 약간의 철자/발음 흔들림을 허용하기 위해 부분 매칭 사용.
 WAKEWORD_COOLDOWN = 2.0  # 중복 인식 방지 간격(초)
 
+# 웨이크워드 엔진
+# - "kws": MFCC+DTW 키워드 스포터가 스트리밍 프레임을 보고, 후보일 때만 Whisper로 확인
+# - "whisper": 3초마다 Whisper 전사 (템플릿이 등록되지 않았으면 자동으로 이 모드)
+WAKEWORD_ENGINE = "kws"
+KWS_CHUNK_MS = 30  # Audio bus read size for the keyword spotter
+KWS_CONFIRM_SECONDS = 2.0  # Audio (ending at the hit) sent to Whisper for confirmation
+KWS_CONFIRM_TAIL = 0.3  # Extra audio captured after the hit before confirming
 
-def _levenshtein_distance(s1: str, s2: str) -> int:
-    """Calculate Levenshtein distance between two strings for fuzzy matching."""
-    if len(s1) < len(s2):
-        return _levenshtein_distance(s2, s1)
-    if len(s2) == 0:
-        return len(s1)
-    
-    previous_row = range(len(s2) + 1)
-    for i, c1 in enumerate(s1):
-        current_row = [i + 1]
-        for j, c2 in enumerate(s2):
-            insertions = previous_row[j + 1] + 1
-            deletions = current_row[j] + 1
-            substitutions = previous_row[j] + (c1 != c2)
-            current_row.append(min(insertions, deletions, substitutions))
-        previous_row = current_row
-    
-    return previous_row[-1]
+# Whisper 모드: 연속 스트림 위의 겹치는 슬라이딩 윈도우 + 에너지/ZCR 게이트
+WAKEWORD_WINDOW_SECONDS = 3.0  # Audio transcribed per decode
+WAKEWORD_HOP_SECONDS = 1.0  # Window advance (window - hop = overlap)
+WAKEWORD_GATE_FRAME_MS = 20
+WAKEWORD_GATE_MIN_RMS = 300.0  # int16 RMS a frame needs to count as voiced
+WAKEWORD_GATE_MAX_ZCR = 0.25  # Zero crossings per sample above this = noise-like frame
+WAKEWORD_GATE_MIN_VOICED = 0.15  # Seconds of voiced frames in the new hop to decode the window
+WAKEWORD_STATS_LOG_EVERY = 300  # Print the counters every N windows (0 = never)
 
-
-def _fuzzy_match(text: str, pattern: str, max_distance: int = 2) -> bool:
-    """
-    Check if text matches pattern with fuzzy matching.
-    Returns True if:
-    - Exact substring match, OR
-    - Edit distance is within max_distance for similar pronunciations
-    """
-    text_lower = text.lower()
-    pattern_lower = pattern.lower()
-    
-    # Exact substring match
-    if pattern_lower in text_lower:
-        return True
-    
-    # Extract words from text
-    words = re.findall(r'\b\w+\b', text_lower)
-    
-    # Check each word for fuzzy match
-    for word in words:
-        # Only check words of similar length (more efficient)
-        if abs(len(word) - len(pattern_lower)) <= max_distance and len(word) >= 3:
-            distance = _levenshtein_distance(word, pattern_lower)
-            if distance <= max_distance:
-                return True
-    
-    return False
+# dropped_hops: hops skipped to catch up with live audio after slow decodes
+# max_lag_seconds: worst queueing delay (live audio position - window end) when a decode started
+WAKEWORD_STATS = {"windows": 0, "skipped": 0, "decoded": 0, "detections": 0, "dropped_hops": 0, "max_lag_seconds": 0.0}
 
 
 def _wakewords_for_lang(lang: str):
@@ -92,6 +67,21 @@ def _wakewords_for_lang(lang: str):
     ]
 
 
+def _core_patterns_for_lang(lang: str):
+    # "dori" 패턴에 대해 fuzzy match (더 관대한 매칭)
+    return ["도리", "dori"] if lang.lower().startswith("ko") else ["dori", "dory", "tori", "도리"]
+
+
+# 후보/핵심 패턴은 import 시 한 번만 정규화 (언어별: 한국어 / 그 외)
+_WAKEWORD_MATCHERS = {
+    key: (
+        FuzzyMatcher(_wakewords_for_lang(key), normalize=compact),
+        FuzzyMatcher(_core_patterns_for_lang(key), max_distance=2, min_length=3, normalize=compact),
+    )
+    for key in ("ko", "en")
+}
+
+
 def is_wakeword(text: str, lang: str) -> bool:
     """
     향상된 민감도 로직:
@@ -102,41 +92,79 @@ def is_wakeword(text: str, lang: str) -> bool:
     if not text:
         return False
     
-    norm = text.lower().strip()
-    # 구두점 제거
-    for ch in [",", ".", "?", "!", "'", '"', "-", " "]:
-        norm = norm.replace(ch, "")
-    
-    # 정확한 매칭 먼저 시도
-    for w in _wakewords_for_lang(lang):
-        candidate = w.replace(",", "").replace(".", "").replace("-", "").replace(" ", "").lower()
-        if candidate in norm or norm in candidate:
-            return True
-    
-    # Fuzzy matching으로 유사한 발음도 인식
-    # "dori" 패턴에 대해 fuzzy match (더 관대한 매칭)
-    core_patterns = ["dori", "dory", "tori", "도리"] if not lang.startswith("ko") else ["도리", "dori"]
+    norm = compact(text)
+    if not norm:
+        return False
+    candidates, core = _WAKEWORD_MATCHERS["ko" if lang.lower().startswith("ko") else "en"]
     
-    for pattern in core_patterns:
-        if _fuzzy_match(norm, pattern, max_distance=2):
-            return True
+    # 정확한 매칭 먼저 시도 (후보가 발화에 포함되거나, 발화가 후보의 일부)
+    if candidates.find(norm) or candidates.is_fragment(norm):
+        return True
     
-    return False
+    # Fuzzy matching으로 유사한 발음도 인식 (공백 제거 후이므로 발화 전체가 한 단어)
+    return core.matches(norm)
 
 
 def wakeword_label(lang: str) -> str:
     return "도리야" if lang.lower().startswith("ko") else "hey dori"
 
 
-def _voice_listener_loop(on_detect: WakeWordCallback, default_lang: str = "en"):
+def _window_gate(samples: np.ndarray, sample_rate: int) -> bool:
+    """
+    Cheap "worth decoding?" check: enough frames that are loud (RMS) and
+    not noise-like (zero-crossing rate; hiss / wind cross zero far more often than voice).
+    """
+    frame_len = int(sample_rate * WAKEWORD_GATE_FRAME_MS / 1000)
+    n = len(samples) // frame_len
+    if n == 0:
+        return False
+    frames = samples[: n * frame_len].reshape(n, frame_len).astype(np.float32)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    zcr = np.mean(np.abs(np.diff(np.signbit(frames), axis=1)), axis=1)
+    voiced = (rms >= WAKEWORD_GATE_MIN_RMS) & (zcr <= WAKEWORD_GATE_MAX_ZCR)
+    return voiced.sum() * WAKEWORD_GATE_FRAME_MS / 1000 >= WAKEWORD_GATE_MIN_VOICED
+
+
+def get_wakeword_stats() -> dict:
+    """Windows seen / skipped by the gate / sent to Whisper, detections, and catch-up / lag (for tuning)."""
+    return dict(WAKEWORD_STATS)
+
+
+def _voice_listener_loop(listener: "WakewordListener", bus=None):
     """
     마이크로 'hey dori'를 듣고 감지하면 콜백 실행.
-    Google STT를 사용하므로 GCP 자격증명이 필요합니다.
+    오디오 버스 위에서 WAKEWORD_WINDOW_SECONDS 창을 WAKEWORD_HOP_SECONDS마다 겹쳐서 밀고,
+    새로 들어온 hop에 음성이 있을 때만 창 전체를 Whisper로 전사한다
+    (블록 경계에 걸친 웨이크워드도 다음 창에 온전히 들어감).
+    bus: 오디오 버스 (None이면 공유 마이크 버스, 벤치마크는 녹음 재생 버스를 넘김)
     """
+    from audio_bus import start_audio_bus
+
     print(f"[WakeWord] Voice mode on. Please call Dori in any language! (e.g., 'hey dori', 'dori', '도리야').")
-    last_trigger = 0.0
-    while True:
-        text, detected_lang = listen_for_seconds_with_lang(seconds=3)
+    bus = bus or start_audio_bus()
+    reader = bus.reader()
+    sr = bus.sample_rate
+    window = int(WAKEWORD_WINDOW_SECONDS * sr)
+    hop = int(WAKEWORD_HOP_SECONDS * sr)
+    # 투어/쿨다운 중 쌓인 오디오는 버리고, 재무장 시점 이후만 본다
+    while listener.wait_armed(on_rearm=reader.skip_to_now):
+        if reader.read(hop, timeout=WAKEWORD_HOP_SECONDS * 4) is None:
+            continue
+        end = reader.cursor
+        WAKEWORD_STATS["windows"] += 1
+        if WAKEWORD_STATS_LOG_EVERY and WAKEWORD_STATS["windows"] % WAKEWORD_STATS_LOG_EVERY == 0:
+            print(f"[WakeWord] stats: {get_wakeword_stats()}")
+
+        # Gate on the newest hop: silence/noise there means this window adds nothing new
+        if not _window_gate(bus.view(end - hop, end), sr):
+            WAKEWORD_STATS["skipped"] += 1
+            continue
+        WAKEWORD_STATS["decoded"] += 1
+        WAKEWORD_STATS["max_lag_seconds"] = max(WAKEWORD_STATS["max_lag_seconds"], (bus.position - end) / sr)
+
+        audio = bus.view(max(0, end - window), end)
+        text, detected_lang = transcribe_with_lang(audio, lang_hint=None, policy="wakeword")
+        _catch_up(reader, bus, hop)
         if text:
             normalized = text.lower().strip()
             # 제한: ko/en만 사용, 그 외는 en으로 처리
@@ -145,51 +173,221 @@ def _voice_listener_loop(on_detect: WakeWordCallback, default_lang: str = "en"):
             else:
                 lang_to_use = "en"
             print(f"[WakeWord] STT captured: {normalized} (detected={detected_lang}, used={lang_to_use})")
-            now = time.time()
-            if now - last_trigger < WAKEWORD_COOLDOWN:
-                time.sleep(0.2)
-                continue
             if is_wakeword(normalized, lang_to_use):
-                print("[WakeWord] 'Hey, Dori' 감지됨 → 콜백 호출")
-                on_detect(lang_to_use)
-                last_trigger = now
-                continue
+                listener.detected(lang_to_use)
         else:
             print("[WakeWord] (무음 또는 인식 실패)")
 
-        # 짧게 쉼
-        time.sleep(0.2)
 
+def _catch_up(reader, bus, hop: int):
+    """
+    Decodes can take longer than a hop; instead of working through a growing backlog
+    (and detecting a wakeword tens of seconds late), jump so the next window ends at live audio.
+    """
+    behind = bus.position - reader.cursor
+    if behind > hop:
+        WAKEWORD_STATS["dropped_hops"] += -(-(behind - hop) // hop)
+        reader.cursor = bus.position - hop
+
+
+def _kws_listener_loop(listener: "WakewordListener", spotter, bus=None):
+    """
+    키워드 스포터가 오디오 버스 프레임을 계속 보고, 후보가 잡히면
+    그 구간만 Whisper로 전사해서 웨이크워드 확인 + 언어 감지 후 콜백 실행.
+    """
+    from audio_bus import start_audio_bus
+
+    bus = bus or start_audio_bus()
+    reader = bus.reader()
+    chunk = int(bus.sample_rate * KWS_CHUNK_MS / 1000)
+    print("[WakeWord] KWS mode on. Say 'hey dori' or '도리야'.")
+
+    def _flush():
+        spotter.reset()
+        reader.skip_to_now()
+
+    while listener.wait_armed(on_rearm=_flush):
+        frame = reader.read(chunk, timeout=1.0)
+        if frame is None:
+            continue
+        for hit in spotter.process(frame):
+            print(f"[WakeWord] KWS candidate '{hit['label']}' (score={hit['score']:.2f}) → Whisper 확인")
+
+            # Let the rest of the phrase arrive, then confirm on the window ending now
+            bus.wait_until(bus.position + int(KWS_CONFIRM_TAIL * bus.sample_rate))
+            audio = bus.latest(KWS_CONFIRM_SECONDS)
+            WAKEWORD_STATS["decoded"] += 1
+            text, detected_lang = transcribe_with_lang(audio, lang_hint=None, policy="wakeword")
+            # Skip whatever was captured while confirming
+            _flush()
+            if not text:
+                print("[WakeWord] Whisper 확인 실패 (무음 또는 인식 실패)")
+                continue
+
+            lang_to_use = "ko" if detected_lang and detected_lang.startswith("ko") else "en"
+            normalized = text.lower().strip()
+            print(f"[WakeWord] STT captured: {normalized} (detected={detected_lang}, used={lang_to_use})")
+            if is_wakeword(normalized, lang_to_use):
+                listener.detected(lang_to_use)
+
+
+# 리스너 상태: idle → armed → tour-active → cooldown → armed ...
+STATE_IDLE = "idle"
+STATE_ARMED = "armed"
+STATE_TOUR_ACTIVE = "tour-active"
+STATE_COOLDOWN = "cooldown"
+
+
+class WakewordListener:
+    """
+    Single wakeword thread driven by an explicit state machine.
+
+    - armed: decoding audio and looking for the wakeword
+    - tour-active: a detection (or pause()) handed the mic to the tour; no decoding at all
+    - cooldown: resume() was called; stays quiet for WAKEWORD_COOLDOWN, then re-arms
+    - idle: stopped, the thread exits
 
-def start_wakeword_listener(on_detect: WakeWordCallback, use_voice: bool = True, lang: str = "en"):
+    on_detect(lang) is called from the listener thread right after it switches to
+    tour-active; it should hand off (e.g. put into a queue) and return. The owner
+    calls resume() once the tour is over.
     """
-    웨이크워드 리스너 시작.
-    - use_voice=True: 마이크 STT로 'hey dori' 감지
+
+    def __init__(self, on_detect, use_voice: bool = True, lang: str = "en"):
+        self.on_detect = on_detect
+        self.use_voice = use_voice
+        self.lang = lang
+        self._state = STATE_IDLE
+        self._cond = threading.Condition()
+        self._cooldown_until = 0.0
+        self._thread = None
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def _set_state(self, state: str):
+        with self._cond:
+            if self._state != state:
+                print(f"[WakeWord] state: {self._state} → {state}")
+            self._state = state
+            self._cond.notify_all()
+
+    def start(self):
+        """Arm the listener; starts the thread only if it is not already running."""
+        with self._cond:
+            running = self._thread is not None and self._thread.is_alive()
+            if not running:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="wakeword-listener")
+        self._set_state(STATE_ARMED)
+        if not running:
+            self._thread.start()
+
+    def pause(self):
+        """Stop decoding (the tour owns the microphone)."""
+        if self._state != STATE_IDLE:
+            self._set_state(STATE_TOUR_ACTIVE)
+
+    def resume(self, cooldown=None):
+        """Re-arm after WAKEWORD_COOLDOWN (or `cooldown`) seconds."""
+        with self._cond:
+            if self._state == STATE_IDLE:
+                return
+            self._cooldown_until = time.monotonic() + (WAKEWORD_COOLDOWN if cooldown is None else cooldown)
+        self._set_state(STATE_COOLDOWN)
+
+    def stop(self):
+        self._set_state(STATE_IDLE)
+
+    def wait_armed(self, on_rearm=None) -> bool:
+        """
+        Block while tour-active / cooling down. Returns False once stopped.
+        on_rearm() runs when the listener becomes armed again after waiting
+        (engines use it to drop stale audio).
+        """
+        waited = False
+        with self._cond:
+            while self._state != STATE_ARMED:
+                if self._state == STATE_IDLE:
+                    return False
+                waited = True
+                if self._state == STATE_COOLDOWN:
+                    remaining = self._cooldown_until - time.monotonic()
+                    if remaining <= 0:
+                        print(f"[WakeWord] state: {STATE_COOLDOWN} → {STATE_ARMED}")
+                        self._state = STATE_ARMED
+                        break
+                    self._cond.wait(remaining)
+                else:
+                    self._cond.wait()
+        if waited and on_rearm:
+            on_rearm()
+        return True
+
+    def detected(self, lang: str):
+        """Engine found the wakeword: hand the mic to the tour, then notify."""
+        with self._cond:
+            if self._state != STATE_ARMED:
+                return  # paused while this window was being decoded
+        print("[WakeWord] 'Hey, Dori' 감지됨 → 콜백 호출")
+        WAKEWORD_STATS["detections"] += 1
+        self._set_state(STATE_TOUR_ACTIVE)
+        self.on_detect(lang)
+
+    def _run(self):
+        if not self.use_voice:
+            _console_listener_loop(self)
+            return
+        if WAKEWORD_ENGINE == "kws":
+            from kws_engine import KeywordSpotter
+
+            spotter = KeywordSpotter.load()
+            if spotter is not None:
+                _kws_listener_loop(self, spotter)
+                return
+            print("⚠️ No KWS templates enrolled (python kws_engine.py enroll hey_dori) → Whisper wakeword loop")
+        _voice_listener_loop(self)
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def start_wakeword_listener(on_detect: WakeWordCallback, use_voice: bool = True, lang: str = "en") -> WakewordListener:
+    """
+    웨이크워드 리스너 시작 (프로세스당 스레드 하나, 이미 실행 중이면 재무장만).
+    - use_voice=True: 마이크로 'hey dori' 감지 (WAKEWORD_ENGINE: kws 또는 whisper)
     - use_voice=False: 이전 콘솔 입력 방식 (백업용)
     """
-    if use_voice:
-        target = _voice_listener_loop
-    else:
-        target = _console_listener_loop
-
-    thread = threading.Thread(
-        target=target,
-        args=(on_detect, lang),
-        daemon=True,
-    )
-    thread.start()
+    global _listener
+    with _listener_lock:
+        if _listener is None or _listener.state == STATE_IDLE:
+            _listener = WakewordListener(on_detect, use_voice=use_voice, lang=lang)
+        else:
+            _listener.on_detect = on_detect
+        _listener.start()
+        return _listener
+
+
+def pause_wakeword_listener():
+    if _listener is not None:
+        _listener.pause()
+
+
+def resume_wakeword_listener(cooldown=None):
+    if _listener is not None:
+        _listener.resume(cooldown)
 
 
 # 백업: 기존 콘솔 입력 모드 (개발 편의를 위해 유지)
-def _console_listener_loop(on_detect: WakeWordCallback):
+def _console_listener_loop(listener: WakewordListener):
     print("[WakeWord] 콘솔 모드 시작. 'hey' 입력 시 깨우기, 'q' 종료.")
-    while True:
+    while listener.wait_armed():
         text = input("[WakeWord] 입력 (hey/q): ").strip().lower()
         if text == "hey":
-            print("[WakeWord] 'Hey, Dori' 감지됨 → 콜백 호출")
-            on_detect()
+            listener.detected(listener.lang)
         elif text == "q":
             print("[WakeWord] 종료")
+            listener.stop()
             break
         else:
             print("[WakeWord] 인식하지 못했어요. (hey / q 중 입력)")
@@ -0,0 +1,62 @@
+# test_kws_engine.py
+"""An enrolled "hey dori" clip, replayed through the live KeywordSpotter.process() path, must be detected."""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+import kws_engine  # noqa: E402
+from kws_engine import SAMPLE_RATE, KeywordSpotter, save_wav_int16  # noqa: E402
+
+CHUNK = int(SAMPLE_RATE * 0.03)  # Same 30 ms reads as the wakeword listener
+
+
+def _keyword(stretch=1.0, f0=140.0, seed=0) -> np.ndarray:
+    """Two voiced 'syllables' with different formants — a stand-in for a recorded keyword."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(0.7 * stretch * SAMPLE_RATE)) / SAMPLE_RATE
+    x = np.zeros_like(t)
+    for start, end, f1, f2 in [(0.0, 0.3, 700.0, 1200.0), (0.4, 0.7, 400.0, 2200.0)]:
+        start, end = start * stretch, end * stretch
+        harmonics = sum(
+            np.sin(2 * np.pi * h * f0 * t) * (np.exp(-((h * f0 - f1) / 200) ** 2) + np.exp(-((h * f0 - f2) / 300) ** 2))
+            for h in range(1, 30)
+        )
+        x += ((t >= start) & (t < end)) * harmonics * np.sin(np.pi * np.clip((t - start) / (end - start), 0, 1))
+    x = x / np.sqrt(np.mean(x ** 2)) * 3000 + rng.standard_normal(len(t)) * 50
+    return x.astype(np.int16)
+
+
+def _background(seconds: float, seed: int) -> np.ndarray:
+    return (np.random.default_rng(seed).standard_normal(int(seconds * SAMPLE_RATE)) * 60).astype(np.int16)
+
+
+def _replay(spotter: KeywordSpotter, audio: np.ndarray) -> list:
+    hits = []
+    for i in range(0, len(audio), CHUNK):
+        hits += spotter.process(audio[i:i + CHUNK])
+    return hits
+
+
+def test_enrolled_clip_is_detected(tmp_path):
+    clips = [_keyword(1.0, 140.0, 0), _keyword(0.9, 150.0, 1), _keyword(1.1, 130.0, 2)]
+    save_wav_int16(str(tmp_path / kws_engine.KWS_BACKGROUND_FILE), _background(kws_engine.KWS_LEAD_IN_SECONDS, 7))
+    for i, clip in enumerate(clips):
+        save_wav_int16(str(tmp_path / "hey_dori" / f"hey_dori_{i + 1:02d}.wav"), clip)
+
+    spotter = KeywordSpotter.load(str(tmp_path))
+    hits = _replay(spotter, np.concatenate([_background(3.0, 9), clips[0], _background(1.0, 10)]))
+
+    assert [hit["label"] for hit in hits] == ["hey_dori"]
+    assert hits[0]["score"] <= spotter.thresholds["hey_dori"]
+
+
+def test_background_alone_is_not_detected():
+    spotter = KeywordSpotter({"hey_dori": [kws_engine.stream_mfcc(_keyword(s, f, i))
+                                           for i, (s, f) in enumerate([(1.0, 140.0), (0.9, 150.0)])]})
+    loud_noise = (np.random.default_rng(3).standard_normal(10 * SAMPLE_RATE) * 800).astype(np.int16)
+
+    assert _replay(spotter, loud_noise) == []